@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Run from the repository root: python scripts/benchmark_local_vector_index.py --vectors 200000
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from stores.vectordb.providers.LocalVectorProvider import LocalVectorProvider
+from stores.vectordb.VectorDBEnums import LocalIndexEnums
+
+COLLECTION_NAME = "collection_benchmark_0"
+
+
+async def build(provider: LocalVectorProvider, vectors: np.ndarray, batch_size: int):
+    await provider.create_collection(COLLECTION_NAME, embedding_size=vectors.shape[1], do_reset=True)
+
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch_size):
+        batch = vectors[i:i+batch_size]
+        await provider.insert_many(
+            COLLECTION_NAME, texts=[""] * len(batch), vectors=batch,
+            record_ids=list(range(i, i + len(batch))),
+        )
+    return time.perf_counter() - start
+
+
+async def query(provider: LocalVectorProvider, queries: np.ndarray, limit: int):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        documents = await provider.search_by_vector(COLLECTION_NAME, q, limit=limit)
+        latencies.append(time.perf_counter() - start)
+        results.append({doc.chunk_id for doc in documents})
+    return np.array(latencies), results
+
+
+async def main(count: int, dimension: int, num_queries: int, limit: int, m: int, ef_construction: int, ef_search: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    queries = rng.standard_normal((num_queries, dimension), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as db_path:
+        flat = LocalVectorProvider(db_path=os.path.join(db_path, "flat"), default_vector_size=dimension)
+        hnsw = LocalVectorProvider(db_path=os.path.join(db_path, "hnsw"), default_vector_size=dimension,
+                                   index_type=LocalIndexEnums.HNSW.value, hnsw_m=m,
+                                   hnsw_ef_construction=ef_construction, hnsw_ef_search=ef_search)
+        for provider in (flat, hnsw):
+            await provider.connect()
+
+        flat_build = await build(flat, vectors, batch_size=1000)
+        hnsw_build = await build(hnsw, vectors, batch_size=1000)
+        await hnsw.disconnect()
+
+        # time a cold start: load the saved graph
+        reloaded = LocalVectorProvider(db_path=os.path.join(db_path, "hnsw"), default_vector_size=dimension,
+                                       index_type=LocalIndexEnums.HNSW.value, hnsw_m=m,
+                                       hnsw_ef_construction=ef_construction, hnsw_ef_search=ef_search)
+        start = time.perf_counter()
+        await reloaded.connect()
+        load_seconds = time.perf_counter() - start
+
+        flat_latencies, exact = await query(flat, queries, limit)
+        hnsw_latencies, approximate = await query(reloaded, queries, limit)
+
+    recall = np.mean([len(e & a) / len(e) for e, a in zip(exact, approximate)])
+
+    print(f"{count} vectors x {dimension} dims, {num_queries} queries, top-{limit}")
+    print(f"Build:   flat {flat_build:.1f}s, HNSW {hnsw_build:.1f}s (M={m}, ef_construction={ef_construction})")
+    print(f"Load:    HNSW {load_seconds * 1000:.0f} ms")
+    for name, latencies in (("flat", flat_latencies), ("HNSW", hnsw_latencies)):
+        print(f"Latency: {name:4} p50 {np.percentile(latencies, 50) * 1000:.2f} ms, "
+              f"p95 {np.percentile(latencies, 95) * 1000:.2f} ms")
+    print(f"Recall@{limit}: {recall:.3f} (ef_search={ef_search})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HNSW and exact search on the LOCAL vector backend.")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, default=64)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.vectors, args.dimension, args.queries, args.limit,
+                     args.m, args.ef_construction, args.ef_search))
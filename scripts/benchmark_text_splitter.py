@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Run from the repository root: python scripts/benchmark_text_splitter.py --paragraphs 20000
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from helpers.text_splitter import TextSplitter
+from controllers.ContextController import TOKEN_PATTERN
+
+WORDS = ("the of and to in is that for it as with was on be by this are from at or an which revenue "
+         "quarter report company policy section table figure results analysis data customer contract").split()
+
+
+def make_text(paragraphs: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n\n".join(
+        "\n".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(5, 60))) + rng.choice([".", ",", ":", ""])
+            for _ in range(rng.randint(1, 8))
+        )
+        for _ in range(paragraphs)
+    )
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def bench(name: str, split, text: str, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = split(text)
+        timings.append(time.perf_counter() - start)
+
+    tokens = [count_tokens(chunk) for chunk in chunks]
+    best = min(timings)
+    print(f"{name:40} {best * 1000:8.1f} ms  {len(text) / best / 1e6:6.1f} MB/s  "
+          f"{len(chunks):6} chunks  tokens/chunk mean {statistics.mean(tokens):6.1f} max {max(tokens):5}")
+    return best
+
+
+def main(paragraphs: int, chunk_size: int, overlap: int, repeats: int):
+    text = make_text(paragraphs)
+    print(f"{len(text) / 1e6:.1f} MB of text, {count_tokens(text)} tokens; "
+          f"chunk_size={chunk_size}, overlap={overlap} (tokens for the native splitter)")
+
+    # Same post-processing the old ProcessController applied: strip, then drop short chunks
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    # characters sized to the same average token budget (~4 characters per token)
+    langchain_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size * 4, chunk_overlap=overlap * 4,
+                                                        length_function=len, is_separator_regex=False)
+    langchain_seconds = bench(
+        "RecursiveCharacterTextSplitter",
+        lambda t: [c.strip() for c in langchain_splitter.split_text(t) if len(c.strip()) >= 10],
+        text, repeats,
+    )
+
+    # the like-for-like baseline: langchain sized in the same tokens through a length_function
+    langchain_token_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap,
+                                                              length_function=count_tokens, is_separator_regex=False)
+    langchain_token_seconds = bench(
+        "RecursiveCharacterTextSplitter (tokens)",
+        lambda t: [c.strip() for c in langchain_token_splitter.split_text(t) if len(c.strip()) >= 10],
+        text, repeats,
+    )
+
+    native_splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=overlap, length_unit="tokens")
+    native_seconds = bench("TextSplitter (tokens)", lambda t: [c["text"] for c in native_splitter.split(t)], text, repeats)
+
+    character_splitter = TextSplitter(chunk_size=chunk_size * 4, chunk_overlap=overlap * 4, length_unit="characters")
+    bench("TextSplitter (characters)", lambda t: [c["text"] for c in character_splitter.split(t)], text, repeats)
+
+    print(f"Speedup (tokens vs langchain tokens): {langchain_token_seconds / native_seconds:.1f}x, "
+          f"vs langchain characters: {langchain_seconds / native_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the native TextSplitter with RecursiveCharacterTextSplitter.")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--overlap", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.paragraphs, args.chunk_size, args.overlap, args.repeats)
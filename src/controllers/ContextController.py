@@ -0,0 +1,164 @@
+from .BaseController import BaseController
+from models.db_schemes import RetrievedDocument
+from typing import List
+import logging
+import math
+import re
+
+# Words and standalone punctuation; a close, tokenizer-free approximation of LLM tokens
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Sentence ends (Latin and Arabic punctuation) and line breaks
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?\u061F])\s+|\n+")
+
+
+class ContextController(BaseController):
+
+    # Overlap between neighbouring chunks is at most the splitter overlap; don't look further
+    max_overlap_characters = 2000
+    # Shorter suffix/prefix matches are treated as coincidence (a repeated word or phrase), not
+    # splitter overlap; an overlap below this is kept twice, which costs tokens but never text
+    min_overlap_characters = 20
+
+    def __init__(self, max_tokens: int = None, min_score_ratio: float = None,
+                 compression_enabled: bool = None, compression_max_sentences: int = None):
+        super().__init__()
+
+        self.max_tokens = max_tokens if max_tokens is not None else self.app_settings.CONTEXT_MAX_TOKENS
+        self.min_score_ratio = min_score_ratio if min_score_ratio is not None else self.app_settings.CONTEXT_MIN_SCORE_RATIO
+        self.compression_enabled = compression_enabled if compression_enabled is not None else self.app_settings.CONTEXT_COMPRESSION_ENABLED
+        self.compression_max_sentences = compression_max_sentences or self.app_settings.CONTEXT_COMPRESSION_MAX_SENTENCES
+        self.logger = logging.getLogger(__name__)
+
+    def count_tokens(self, text: str) -> int:
+        return len(TOKEN_PATTERN.findall(text or ""))
+
+    def filter_by_score(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        if not documents or not self.min_score_ratio:
+            return documents
+
+        top_score = max(doc.score for doc in documents)
+        if top_score <= 0:
+            return documents
+
+        cutoff = top_score * self.min_score_ratio
+        return [doc for doc in documents if doc.score >= cutoff]
+
+    def merge_texts(self, first: str, second: str) -> str:
+        # Drop the part of `second` that repeats the tail of `first` (splitter overlap)
+        max_overlap = min(len(first), len(second), self.max_overlap_characters)
+        for size in range(max_overlap, self.min_overlap_characters - 1, -1):
+            if first.endswith(second[:size]):
+                return first + second[size:]
+        return f"{first}\n{second}"
+
+    def merge_adjacent(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        merged, seen_texts = [], set()
+        runs = {}
+
+        for doc in documents:
+            if doc.text in seen_texts:
+                continue
+            seen_texts.add(doc.text)
+
+            if doc.chunk_asset_id is None or doc.chunk_order is None:
+                merged.append(doc)
+                continue
+            runs.setdefault(doc.chunk_asset_id, []).append(doc)
+
+        for asset_docs in runs.values():
+            asset_docs.sort(key=lambda d: d.chunk_order)
+            current = asset_docs[0]
+
+            for doc in asset_docs[1:]:
+                if doc.chunk_order == current.chunk_order + 1:
+                    current = RetrievedDocument(
+                        text=self.merge_texts(current.text, doc.text),
+                        score=max(current.score, doc.score),
+                        chunk_id=current.chunk_id,
+                        chunk_asset_id=current.chunk_asset_id,
+                        chunk_order=doc.chunk_order,
+                    )
+                    continue
+                merged.append(current)
+                current = doc
+
+            merged.append(current)
+
+        return merged
+
+    def split_sentences(self, text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+    def get_terms(self, text: str) -> set:
+        return {word.lower() for word in WORD_PATTERN.findall(text) if len(word) > 1}
+
+    def compress(self, documents: List[RetrievedDocument], query: str) -> List[RetrievedDocument]:
+        query_terms = self.get_terms(query)
+        if not query_terms:
+            return documents
+
+        documents_sentences = [self.split_sentences(doc.text) for doc in documents]
+        sentences_terms = [[self.get_terms(sentence) for sentence in sentences] for sentences in documents_sentences]
+
+        # IDF over every retrieved sentence, so terms common to all of them (stopwords) weigh little
+        total_sentences = sum(len(sentences) for sentences in documents_sentences)
+        document_frequency = {
+            term: sum(term in terms for doc_terms in sentences_terms for terms in doc_terms)
+            for term in query_terms
+        }
+        idf = {
+            term: math.log(1 + total_sentences / (1 + frequency))
+            for term, frequency in document_frequency.items()
+        }
+
+        compressed, saved_tokens = [], 0
+        for doc, sentences, doc_terms in zip(documents, documents_sentences, sentences_terms):
+            if len(sentences) <= self.compression_max_sentences:
+                compressed.append(doc)
+                continue
+
+            scores = [sum(idf[term] for term in query_terms & terms) for terms in doc_terms]
+            if not any(scores):
+                # no lexical evidence; the chunk was retrieved semantically, keep it whole
+                compressed.append(doc)
+                continue
+
+            top_indices = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)[:self.compression_max_sentences]
+            text = " ".join(sentences[i] for i in sorted(top_indices) if scores[i] > 0)
+
+            saved_tokens += self.count_tokens(doc.text) - self.count_tokens(text)
+            compressed.append(doc.copy(update={"text": text}))
+
+        self.logger.info(f"Compression removed ~{saved_tokens} tokens from {len(documents)} documents")
+        return compressed
+
+    def pack(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        ranked = sorted(documents, key=lambda d: d.score, reverse=True)
+        if not self.max_tokens:
+            return ranked
+
+        packed, used_tokens, seen_texts = [], 0, set()
+        for doc in ranked:
+            if doc.text in seen_texts:
+                continue
+            seen_texts.add(doc.text)
+
+            doc_tokens = self.count_tokens(doc.text)
+            if used_tokens + doc_tokens > self.max_tokens:
+                # a smaller, less relevant chunk may still fit
+                continue
+            packed.append(doc)
+            used_tokens += doc_tokens
+
+        self.logger.info(f"Packed {len(packed)}/{len(ranked)} documents into {used_tokens}/{self.max_tokens} tokens")
+        return packed
+
+    def build_context(self, documents: List[RetrievedDocument], query: str = None) -> List[RetrievedDocument]:
+        documents = self.filter_by_score(documents)
+        if self.compression_enabled and query:
+            documents = self.compress(documents, query=query)
+        # Packing picks single chunks, so an oversize run of neighbours can't crowd out the top one;
+        # merging only removes overlap, so the merged runs still fit the budget
+        documents = self.merge_adjacent(self.pack(documents))
+        return sorted(documents, key=lambda d: d.score, reverse=True)
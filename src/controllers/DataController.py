@@ -3,7 +3,12 @@ from .BaseController import BaseController
 from fastapi import UploadFile
 from models.enums.ResponseEnums import ResponseStatus
 from .ProjectController import ProjectController
+import base64
+import hashlib
+import hmac
+import json
 import re
+import time
 
 class DataController(BaseController):
     def __init__(self):
@@ -11,18 +16,26 @@ class DataController(BaseController):
 
 
     def validate_file(self, file: UploadFile) -> bool:
-        if file.content_type not in self.app_settings.FILE_ALLOWED_TYPES:
+        return self.validate_file_metadata(content_type=file.content_type, file_size=self.get_file_size(file))
+
+    def validate_file_metadata(self, content_type: str, file_size: int) -> bool:
+        # Also used for direct uploads, where only the declared type and size are known
+        if content_type not in self.app_settings.FILE_ALLOWED_TYPES:
             return False, ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value
-        
-        # Check file size
-        file.file.seek(0, os.SEEK_END)
-        file_size = file.file.tell()
-        file.file.seek(0)
-        
+
         if file_size > self.app_settings.FILE_MAX_SIZE:
-            return False, ResponseStatus.FILE_UPLOADED_FAILED.value # We could add a more specific signal later
+            return False, ResponseStatus.FILE_SIZE_EXCEEDED.value
     
         return True, ResponseStatus.FILE_UPLOADED_SUCCESSFULLY.value
+
+    def get_file_size(self, file: UploadFile) -> int:
+        # The multipart parser records the size while spooling; seek only when it didn't
+        if file.size is not None:
+            return file.size
+        file.file.seek(0, os.SEEK_END)
+        file_size = file.file.tell()
+        file.file.seek(0)
+        return file_size
     
     def generate_unique_file_path(self, original_file_name: str, project_id: str) -> str:
         random_key = self.generate_random_string()
@@ -41,6 +54,31 @@ class DataController(BaseController):
     def  get_clean_file_name(self, original_file_name: str) -> str:
         clean_file_name = re.sub(r'[^a-zA-Z0-9_.-]', '_', original_file_name)
         return clean_file_name
-        
 
-      
\ No newline at end of file
+    def _upload_ticket_signature(self, payload: str) -> str:
+        # the service role key never leaves the server either, so it can stand in for a dedicated secret
+        secret = self.app_settings.UPLOAD_TICKET_SECRET or self.app_settings.SUPABASE_SERVICE_ROLE_KEY
+        return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+    def create_upload_ticket(self, project_id: int, bucket: str, file_id: str, file_size: int, md5: str = None) -> str:
+        # Binds a signed upload to what the sign step issued, so confirm never trusts client-sent names
+        payload = base64.urlsafe_b64encode(json.dumps({
+            "project_id": project_id,
+            "bucket": bucket,
+            "file_id": file_id,
+            "file_size": file_size,
+            "md5": md5,
+            "expires_at": int(time.time()) + self.app_settings.UPLOAD_TICKET_TTL,
+        }, separators=(",", ":")).encode()).decode()
+        return f"{payload}.{self._upload_ticket_signature(payload)}"
+
+    def read_upload_ticket(self, ticket: str, project_id: int):
+        # The ticket's upload, or None when it is forged, expired or was issued for another project
+        payload, _, signature = (ticket or "").partition(".")
+        if not payload or not hmac.compare_digest(signature, self._upload_ticket_signature(payload)):
+            return None
+
+        upload = json.loads(base64.urlsafe_b64decode(payload.encode()))
+        if upload["project_id"] != project_id or upload["expires_at"] < time.time():
+            return None
+        return upload
@@ -0,0 +1,128 @@
+from .BaseController import BaseController
+from typing import List
+import hashlib
+import logging
+import re
+import zlib
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Mersenne prime 2^31 - 1: a * x + b stays below 2^62, so the permutations never overflow uint64
+MINHASH_PRIME = (1 << 31) - 1
+
+
+class DedupController(BaseController):
+    """
+    Collapses duplicate chunks before they are embedded.
+    Exact duplicates are found by hashing the normalized text; near-duplicates (repeated
+    headers, footers and boilerplate pages that differ in a page number or date) by MinHash
+    signatures over word shingles, bucketed with LSH and verified against the threshold.
+    One instance is kept per ingest run, so duplicates are found across all of its files.
+    """
+
+    shingle_size = 3
+    rows_per_band = 8
+
+    def __init__(self, enabled: bool = None, threshold: float = None, num_perm: int = None):
+        super().__init__()
+
+        self.enabled = enabled if enabled is not None else self.app_settings.CHUNK_DEDUP_ENABLED
+        self.threshold = threshold if threshold is not None else self.app_settings.CHUNK_DEDUP_THRESHOLD
+        num_perm = num_perm or self.app_settings.CHUNK_DEDUP_NUM_PERM
+        self.num_bands = max(1, num_perm // self.rows_per_band)
+        self.num_perm = self.num_bands * self.rows_per_band
+
+        rng = np.random.default_rng(0)
+        self.perm_a = rng.integers(1, MINHASH_PRIME, size=self.num_perm, dtype=np.uint64)
+        self.perm_b = rng.integers(0, MINHASH_PRIME, size=self.num_perm, dtype=np.uint64)
+
+        self.known_hashes = set()
+        self.lsh_buckets = {}  # (band, band bytes) -> [(chunk_hash, signature)]
+
+        self.total_count = 0
+        self.duplicate_count = 0
+        self.saved_characters = 0
+        self.logger = logging.getLogger(__name__)
+
+    def normalize(self, text: str) -> str:
+        return " ".join(WORD_PATTERN.findall((text or "").lower()))
+
+    def hash_text(self, text: str) -> str:
+        return hashlib.sha1(self.normalize(text).encode("utf-8")).hexdigest()
+
+    def get_signature(self, text: str):
+        words = WORD_PATTERN.findall((text or "").lower())
+        if len(words) < self.shingle_size:
+            return None
+
+        shingles = {" ".join(words[i:i+self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        values = np.fromiter((zlib.crc32(s.encode("utf-8")) % MINHASH_PRIME for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+
+        # (num_perm, num_shingles) universal hashes; the signature is the per-permutation minimum
+        hashed = (self.perm_a[:, None] * values[None, :] + self.perm_b[:, None]) % MINHASH_PRIME
+        return hashed.min(axis=1)
+
+    def add_known_hashes(self, hashes):
+        # Canonical chunks already stored for the project (exact matches only)
+        self.known_hashes.update(hashes)
+
+    def find_near_duplicate(self, signature):
+        candidates = set()
+        for band in range(self.num_bands):
+            key = (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+            for chunk_hash, other in self.lsh_buckets.get(key, []):
+                if chunk_hash in candidates:
+                    continue
+                candidates.add(chunk_hash)
+                if np.mean(signature == other) >= self.threshold:
+                    return chunk_hash
+        return None
+
+    def add_signature(self, chunk_hash: str, signature):
+        for band in range(self.num_bands):
+            key = (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+            self.lsh_buckets.setdefault(key, []).append((chunk_hash, signature))
+
+    def deduplicate(self, chunks: List[dict]) -> List[dict]:
+        """
+        Sets chunk_hash on every chunk and chunk_duplicate_of (the canonical chunk's hash) on
+        duplicates. Returns the canonical chunks, the only ones that need embedding.
+        """
+        canonical = []
+        for chunk in chunks:
+            text = chunk["chunk_text"]
+            chunk["chunk_hash"] = self.hash_text(text)
+            chunk["chunk_duplicate_of"] = None
+            self.total_count += 1
+
+            duplicate_of = None
+            if self.enabled:
+                if chunk["chunk_hash"] in self.known_hashes:
+                    duplicate_of = chunk["chunk_hash"]
+                else:
+                    signature = self.get_signature(text)
+                    if signature is not None:
+                        duplicate_of = self.find_near_duplicate(signature)
+                        if duplicate_of is None:
+                            self.add_signature(chunk["chunk_hash"], signature)
+
+            if duplicate_of is not None:
+                chunk["chunk_duplicate_of"] = duplicate_of
+                self.duplicate_count += 1
+                self.saved_characters += len(text)
+                continue
+
+            self.known_hashes.add(chunk["chunk_hash"])
+            canonical.append(chunk)
+
+        return canonical
+
+    def get_report(self) -> dict:
+        return {
+            "total_chunks": self.total_count,
+            "duplicate_chunks": self.duplicate_count,
+            "saved_characters": self.saved_characters,
+            "duplicate_ratio": round(self.duplicate_count / self.total_count, 4) if self.total_count else 0.0,
+        }
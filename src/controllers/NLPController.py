@@ -1,11 +1,19 @@
 from .BaseController import BaseController
 from typing import List
 from stores.llm.LLMEnums import DocumentTypeEnum
+from stores.vectordb.VectorDBEnums import VectorDBEnums
+import asyncio
 import logging
 import json
 
 from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
+from models.ProjectModel import ProjectModel
+from models.IndexCheckpointModel import IndexCheckpointModel
+from models.ProjectStatsModel import ProjectStatsModel
+from models.enums.IndexStageEnum import IndexStageEnum
+from .ContextController import ContextController
+from .DedupController import DedupController
 
 
 class NLPController(BaseController):
@@ -18,37 +26,78 @@ class NLPController(BaseController):
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.dedup_report = None
         self.logger = logging.getLogger(__name__)
 
-    def create_collection_name(self, project_id: int):
+    def create_collection_name(self, project_id: int, generation: int = 0):
+        # The project id stays the last segment: the chunks-table providers parse it from there
+        if generation:
+            return f"collection_{self.vectordb_client.default_vector_size}_g{generation}_{project_id}".strip()
         collection_name = f"collection_{self.vectordb_client.default_vector_size}_{project_id}".strip()
         return collection_name
+
+    def get_active_collection_name(self, project: dict):
+        return self.create_collection_name(project_id=project["project_id"],
+                                           generation=project.get("project_active_generation") or 0)
+
+    @property
+    def vectors_in_chunks_table(self) -> bool:
+        # SUPABASE/PGVECTOR keep vectors on the chunk rows, so a chunk generation is also an index generation
+        return self.app_settings.VECTOR_DB_BACKEND in (VectorDBEnums.SUPABASE.value, VectorDBEnums.PGVECTOR.value)
     
     async def reset_vector_db_collection(self, project: dict):
-        collection_name = self.create_collection_name(project_id=project["project_id"])
+        collection_name = self.get_active_collection_name(project)
         return await self.vectordb_client.delete_collection(collection_name=collection_name)
     
     async def get_vector_db_collection_info(self, project: dict):
-        collection_name = self.create_collection_name(project_id=project["project_id"])
+        collection_name = self.get_active_collection_name(project)
         collection_info = await self.vectordb_client.get_collection_info(collection_name=collection_name)
 
         return json.loads(
             json.dumps(collection_info, default=lambda x: x.__dict__)
         )
     
+    async def get_project_stats(self, project: dict):
+        # Trigger-maintained counters of the active generation: one row, no scan of chunks
+        stats_model = await ProjectStatsModel.create_instance()
+        stats = await stats_model.get_stats(project_id=project["project_id"]) or {}
+        return {
+            "chunk_count": stats.get("chunk_count", 0),
+            "vector_count": stats.get("vector_count", 0),
+            "text_bytes": stats.get("text_bytes", 0),
+            "vector_bytes": stats.get("vector_bytes", 0),
+            "last_indexed_at": str(stats["last_indexed_at"]) if stats.get("last_indexed_at") else None,
+            "embedding_model": stats.get("embedding_model"),
+        }
+
+    async def record_index_model(self, project: dict, generation: int):
+        stats_model = await ProjectStatsModel.create_instance()
+        await stats_model.set_embedding_model(project_id=project["project_id"], generation=generation,
+                                              embedding_model=self.app_settings.EMBEDDING_MODEL_ID)
+    
     async def index_into_vector_db(self, project: dict, chunks: List[dict],
                                    chunks_ids: List[int], 
-                                   do_reset: bool = False):
+                                   do_reset: bool = False,
+                                   generation: int = None):
         
         # step1: get collection name
-        collection_name = self.create_collection_name(project_id=project["project_id"])
+        if generation is None:
+            collection_name = self.get_active_collection_name(project)
+        else:
+            collection_name = self.create_collection_name(project_id=project["project_id"], generation=generation)
 
         # step2: manage items
         # Filter out chunks with less than 10 characters
-        valid_chunks = [c for c in chunks if c.get("chunk_text") and len(c["chunk_text"].strip()) >= 10]
+        # Collapsed duplicates are not embedded: their canonical chunk stands in for them
+        valid_chunks = [c for c in chunks if c.get("chunk_text") and len(c["chunk_text"].strip()) >= 10
+                        and not c.get("chunk_duplicate_of")]
         
         texts = [c["chunk_text"] for c in valid_chunks]
-        metadata = [c.get("chunk_metadata", {}) for c in valid_chunks]
+        # asset and order travel with the vector so stores outside the chunks table can report them
+        metadata = [
+            {**(c.get("chunk_metadata") or {}), "chunk_asset_id": c.get("chunk_asset_id"), "chunk_order": c.get("chunk_order")}
+            for c in valid_chunks
+        ]
         
         self.logger.info(f"Total chunks to process: {len(chunks)}")
         self.logger.info(f"Valid chunks after filtering: {len(valid_chunks)}")
@@ -74,66 +123,102 @@ class NLPController(BaseController):
                 texts=texts,
                 metadata=metadata,
                 vectors=vectors,
-                record_ids=chunks_ids,
+                # keep ids aligned with the filtered texts
+                record_ids=[c["chunk_id"] for c in valid_chunks] if chunks_ids else None,
             )
 
         return True
 
-    async def search_vector_db_collection(self, project: dict, text: str, limit: int = 10):
-
-        # step1: get collection name
-        query_vector = None
-        collection_name = self.create_collection_name(project_id=project["project_id"])
-
-        # step2: get text embedding vector
+    async def embed_query(self, text: str):
+        # Needs only the query, so it can run while the project is still being resolved
         vectors = await self.embedding_client.generate_embedding(text=text, 
                                                  document_type=DocumentTypeEnum.QUERY.value)
 
         if not vectors or len(vectors) == 0:
-            return False
+            return None
 
-        if isinstance(vectors, list) and len(vectors) > 0:
-            query_vector = vectors[0]
+        return vectors[0] or None
 
-        if not query_vector:
-            return False
+    async def embed_queries(self, texts: List[str]):
+        # All queries in a single call, in the order given
+        vectors = await self.embedding_client.generate_embedding(text=texts,
+                                                 document_type=DocumentTypeEnum.QUERY.value)
 
-        # step3: do semantic search
-        results = await self.vectordb_client.search_by_vector(
+        if not vectors or len(vectors) != len(texts):
+            self.logger.error(f"Expected {len(texts)} query embeddings, got {len(vectors) if vectors else 0}")
+            return None
+
+        return vectors
+
+    async def search_by_query_vector(self, project: dict, query_vector: list, limit: int = 10):
+        collection_name = self.get_active_collection_name(project)
+        self.check_index_model(project)
+
+        return await self.vectordb_client.search_by_vector(
             collection_name=collection_name,
             vector=query_vector,
             limit=limit
         )
 
+    async def search_by_query_vectors(self, project: dict, query_vectors: List[list], limit: int = 10):
+        # All searches in one vector db call
+        collection_name = self.get_active_collection_name(project)
+        self.check_index_model(project)
+
+        return await self.vectordb_client.search_by_vectors(
+            collection_name=collection_name,
+            vectors=query_vectors,
+            limit=limit
+        )
+
+    async def search_vector_db_collection(self, project: dict, text: str, limit: int = 10):
+
+        query_vector = await self.embed_query(text=text)
+        if not query_vector:
+            return False
+
+        results = await self.search_by_query_vector(project=project, query_vector=query_vector, limit=limit)
         if results is None:
             return False
 
         return results
     
-    async def answer_rag_question(self, project: dict, query: str, limit: int = 10):
-        
-        answer, full_prompt, chat_history = None, None, None
+    async def search_vector_db_collection_batch(self, project: dict, texts: List[str], limit: int = 10):
 
-        # step1: retrieve related documents
-        retrieved_documents = await self.search_vector_db_collection(
-            project=project,
-            text=query,
-            limit=limit,
-        )
+        # repeated queries are embedded and searched once
+        unique_texts = list(dict.fromkeys(texts))
+
+        vectors = await self.embed_queries(texts=unique_texts)
+        if not vectors:
+            return False
 
+        results = await self.search_by_query_vectors(project=project, query_vectors=vectors, limit=limit)
+        if results is None:
+            return False
+
+        return dict(zip(unique_texts, results))
+
+    def build_rag_prompt(self, query: str, retrieved_documents: list):
+        # Returns (full_prompt, chat_history), or None when nothing was retrieved
         if not retrieved_documents or len(retrieved_documents) == 0:
-            return answer, full_prompt, chat_history
+            return None
         
+        # step1: Select the context: score cutoff, merge neighbouring chunks,
+        # optionally keep only query-relevant sentences, fit the token budget
+        context_controller = ContextController()
+        retrieved_documents = context_controller.build_context(retrieved_documents, query=query)
+
         # step2: Construct LLM prompt
         system_prompt = self.template_parser.get("rag", "system_prompt")
 
-        documents_prompts = "\n".join([
-            self.template_parser.get("rag", "document_prompt", {
-                    "doc_num": idx + 1,
-                    "chunk_text": self.generation_client.process_text(doc.text),
-            })
+        # the token budget replaces per-chunk character truncation when configured
+        documents_prompts = "\n".join(self.template_parser.render_many("rag", "document_prompt", [
+            {
+                "doc_num": idx + 1,
+                "chunk_text": doc.text if context_controller.max_tokens else self.generation_client.process_text(doc.text),
+            }
             for idx, doc in enumerate(retrieved_documents)
-        ])
+        ]))
 
         footer_prompt = self.template_parser.get("rag", "footer_prompt")
 
@@ -151,33 +236,265 @@ class NLPController(BaseController):
 
         full_prompt = "\n\n".join([ documents_prompts, user_question_prompt, footer_prompt])
 
-        # step4: Retrieve the Answer
-        answer = await self.generation_client.generate_text(
+        return full_prompt, chat_history
+
+    async def generate_answer(self, full_prompt: str, chat_history: list):
+        # The generation client appends the user prompt to chat_history
+        return await self.generation_client.generate_text(
             prompt=full_prompt,
             chat_history=chat_history
         )
 
+    async def answer_rag_question(self, project: dict, query: str, limit: int = 10):
+        
+        answer, full_prompt, chat_history = None, None, None
+
+        # step1: retrieve related documents
+        retrieved_documents = await self.search_vector_db_collection(
+            project=project,
+            text=query,
+            limit=limit,
+        )
+
+        # step2: select the context and construct the prompt
+        prompt = self.build_rag_prompt(query=query, retrieved_documents=retrieved_documents)
+        if prompt is None:
+            return answer, full_prompt, chat_history
+        full_prompt, chat_history = prompt
+
+        # step3: Retrieve the Answer
+        answer = await self.generate_answer(full_prompt=full_prompt, chat_history=chat_history)
 
         return answer, full_prompt, chat_history
 
+    def check_index_model(self, project: dict):
+        index_model = project.get("project_index_model")
+        if index_model and index_model != self.app_settings.EMBEDDING_MODEL_ID:
+            self.logger.warning(f"Project {project['project_id']} is indexed with {index_model} but queries are "
+                                f"embedded with {self.app_settings.EMBEDDING_MODEL_ID}; rebuild its index.")
+
+    async def index_generation_chunks(self, project: dict, generation: int,
+                                      stage: str = IndexStageEnum.REBUILD.value,
+                                      throttle: bool = True, progress: object = None):
+        """
+        Embeds the chunks of `generation` in batches, in chunk_id order.
+        The last indexed chunk_id is checkpointed after every batch, so a restarted
+        run continues where the previous one stopped.
+        Returns the number of chunks indexed by this run, or None on failure.
+        """
+        chunk_model = await ChunkModel.create_instance()
+        checkpoint_model = await IndexCheckpointModel.create_instance()
+        batch_size = self.app_settings.INDEX_BUILD_BATCH_SIZE
+
+        last_chunk_id = await checkpoint_model.get_checkpoint(project_id=project["project_id"],
+                                                              generation=generation, stage=stage) or 0
+        if last_chunk_id:
+            self.logger.info(f"Project {project['project_id']}: resuming {stage} of generation {generation} "
+                             f"after chunk {last_chunk_id}")
+
+        collection_name = self.create_collection_name(project_id=project["project_id"], generation=generation)
+        _ = await self.vectordb_client.create_collection(
+            collection_name=collection_name,
+            embedding_size=self.embedding_client.embedding_dimension,
+        )
+
+        indexed_count = 0
+        while True:
+            page_chunks = await chunk_model.get_chunks_after(project_id=project["project_id"], generation=generation,
+                                                             after_chunk_id=last_chunk_id, page_size=batch_size)
+            if not page_chunks:
+                break
+
+            is_inserted = await self.index_into_vector_db(
+                project=project,
+                chunks=page_chunks,
+                chunks_ids=[chunk["chunk_id"] for chunk in page_chunks],
+                generation=generation,
+            )
+            if not is_inserted:
+                return None
+
+            last_chunk_id = page_chunks[-1]["chunk_id"]
+            await checkpoint_model.save_checkpoint(project_id=project["project_id"], generation=generation,
+                                                   stage=stage, last_chunk_id=last_chunk_id)
+
+            indexed_count += len(page_chunks)
+            if progress is not None:
+                progress.update(len(page_chunks))
+            if throttle and self.app_settings.INDEX_BUILD_BATCH_DELAY:
+                await asyncio.sleep(self.app_settings.INDEX_BUILD_BATCH_DELAY)
+
+        if indexed_count:
+            await self.record_index_model(project=project, generation=generation)
+        return indexed_count
+
+    async def promote_index_generation(self, project: dict, generation: int):
+        # Swap the active pointer, then garbage-collect everything outside the new generation
+        project_model = await ProjectModel.create_instance()
+        previous_generation = await project_model.promote_index_generation(
+            project_id=project["project_id"],
+            generation=generation,
+            index_model=self.app_settings.EMBEDDING_MODEL_ID,
+        )
+        if previous_generation is None:
+            self.logger.warning(f"Index generation {generation} of project {project['project_id']} was superseded.")
+            return False
+
+        self.logger.info(f"Project {project['project_id']}: index generation {generation} is active "
+                         f"(was {previous_generation}).")
+
+        if not self.vectors_in_chunks_table:
+            await self.vectordb_client.delete_collection(
+                collection_name=self.create_collection_name(project_id=project["project_id"], generation=previous_generation)
+            )
+
+        chunk_model = await ChunkModel.create_instance()
+        deleted_count = await chunk_model.delete_chunks_outside_generation(project_id=project["project_id"],
+                                                                           generation=generation)
+        self.logger.info(f"Project {project['project_id']}: removed {deleted_count} chunks of old generations.")
+
+        # The build is complete: its checkpoints and those of older generations are no longer needed
+        checkpoint_model = await IndexCheckpointModel.create_instance()
+        await checkpoint_model.delete_checkpoints_outside_generation(project_id=project["project_id"], generation=generation)
+        for stage in (IndexStageEnum.REBUILD.value, IndexStageEnum.PROCESS.value):
+            await checkpoint_model.delete_checkpoint(project_id=project["project_id"], generation=generation, stage=stage)
+
+        project["project_active_generation"] = generation
+        return True
+
+    async def build_index_generation(self, project: dict):
+        """
+        Re-embeds the active generation's chunks into a new generation and promotes it.
+        Searches are served from the old generation until the swap.
+        Returns the number of indexed chunks, or None on failure.
+        """
+        project_model = await ProjectModel.create_instance()
+        chunk_model = await ChunkModel.create_instance()
+        checkpoint_model = await IndexCheckpointModel.create_instance()
+        stage = IndexStageEnum.REBUILD.value
+
+        # A rebuild checkpoint on the generation in progress means its chunks were copied: resume it
+        generation = project.get("project_building_generation")
+        if generation is None or await checkpoint_model.get_checkpoint(project_id=project["project_id"],
+                                                                        generation=generation, stage=stage) is None:
+            generation = await project_model.begin_index_generation(project_id=project["project_id"])
+            copied_count = await chunk_model.copy_chunks_to_generation(project_id=project["project_id"], generation=generation)
+            await checkpoint_model.save_checkpoint(project_id=project["project_id"], generation=generation, stage=stage)
+            self.logger.info(f"Project {project['project_id']}: building index generation {generation} from {copied_count} chunks.")
+
+        indexed_count = await self.index_generation_chunks(project=project, generation=generation, stage=stage)
+        if indexed_count is None:
+            self.logger.error(f"Project {project['project_id']}: index generation {generation} failed; keeping the active one.")
+            return None
+
+        # Later pushes only need to index chunks added after this build
+        last_chunk_id = await checkpoint_model.get_checkpoint(project_id=project["project_id"],
+                                                              generation=generation, stage=stage)
+
+        if not await self.promote_index_generation(project=project, generation=generation):
+            return None
+
+        await checkpoint_model.save_checkpoint(project_id=project["project_id"], generation=generation,
+                                               stage=IndexStageEnum.PUSH.value, last_chunk_id=last_chunk_id or 0)
+
+        return indexed_count
+
+    async def delete_asset_chunks(self, project: dict, asset_id: int, max_chunk_id: int = None):
+        # Removes one asset's chunks and vectors; the rest of the project is untouched
+        chunk_model = await ChunkModel.create_instance()
+
+        if not self.vectors_in_chunks_table:
+            chunk_ids = await chunk_model.get_asset_chunk_ids(project_id=project["project_id"], asset_id=asset_id,
+                                                              max_chunk_id=max_chunk_id)
+            if chunk_ids:
+                await self.vectordb_client.delete_records(
+                    collection_name=self.get_active_collection_name(project), record_ids=chunk_ids
+                )
+
+        deleted_count = await chunk_model.delete_chunks_by_asset_id(project_id=project["project_id"], asset_id=asset_id,
+                                                                    max_chunk_id=max_chunk_id)
+
+        # Duplicates elsewhere in the project may have pointed at the deleted chunks
+        promoted_chunks = await chunk_model.promote_orphaned_duplicates(project_id=project["project_id"])
+        if promoted_chunks:
+            self.logger.info(f"Promoted {len(promoted_chunks)} orphaned duplicate chunks; embedding them.")
+            for generation in {chunk["chunk_generation"] for chunk in promoted_chunks}:
+                generation_chunks = [chunk for chunk in promoted_chunks if chunk["chunk_generation"] == generation]
+                await self.index_into_vector_db(
+                    project=project,
+                    chunks=generation_chunks,
+                    chunks_ids=[chunk["chunk_id"] for chunk in generation_chunks],
+                    generation=generation,
+                )
+
+        return deleted_count
+
+    async def delete_project(self, project: dict):
+        # Assets, chunks, stats and checkpoints cascade with the project row;
+        # stores outside the chunks table drop the project's collections first
+        if not self.vectors_in_chunks_table:
+            generations = {project.get("project_active_generation") or 0, project.get("project_building_generation")}
+            for generation in generations - {None}:
+                await self.vectordb_client.delete_collection(
+                    collection_name=self.create_collection_name(project_id=project["project_id"], generation=generation)
+                )
+
+        project_model = await ProjectModel.create_instance()
+        return await project_model.delete_project(project_id=project["project_id"])
+
     async def process_project_files(self, project: dict, file_ids: dict, do_reset: int,
-                                    chunk_size: int, overlap_size: int, process_controller: object):
+                                    chunk_size: int, overlap_size: int, process_controller: object,
+                                    replace_assets: bool = False, asset_records: dict = None):
+        """
+        do_reset=1 rebuilds the whole project into a new index generation.
+        replace_assets swaps only the processed assets' chunks: new chunks are inserted first,
+        then the asset's older chunks are deleted.
+        asset_records ({asset_id: record}) are the already loaded asset rows; missing ones are fetched in one query.
+        """
         
         num_records = 0
         processed_files = 0
+        # files that could not be read or chunked; a reset with any of these is not promoted
+        failed_files = 0
         
         chunk_model = await ChunkModel.create_instance()
 
+        # A reset builds a new generation next to the active one instead of deleting it first.
+        # If an earlier reset was interrupted, continue its generation and skip the assets it finished.
+        generation = project.get("project_active_generation") or 0
+        resuming = False
+        skipped_files = 0
         if do_reset == 1:
-            await self.reset_vector_db_collection(project=project)
-            _ = await chunk_model.delete_chunks_by_project_id(project_id=project["project_id"])
+            checkpoint_model = await IndexCheckpointModel.create_instance()
+            stage = IndexStageEnum.PROCESS.value
+            building_generation = project.get("project_building_generation")
+            if building_generation is not None and await checkpoint_model.get_checkpoint(
+                    project_id=project["project_id"], generation=building_generation, stage=stage) is not None:
+                generation, resuming = building_generation, True
+                self.logger.info(f"Project {project['project_id']}: resuming processing into generation {generation}")
+            else:
+                project_model = await ProjectModel.create_instance()
+                generation = await project_model.begin_index_generation(project_id=project["project_id"])
+                await checkpoint_model.save_checkpoint(project_id=project["project_id"], generation=generation, stage=stage)
 
         asset_model = await AssetModel.create_instance()
+        asset_records = dict(asset_records or {})
+        missing_asset_ids = [asset_id for asset_id in file_ids if asset_id not in asset_records]
+        if missing_asset_ids:
+            asset_records.update(await asset_model.get_assets_by_ids(asset_project_id=project["project_id"],
+                                                                     asset_ids=missing_asset_ids))
+
+        # one dedup state for the whole run: boilerplate repeated across files is embedded once
+        dedup_controller = DedupController()
 
         for asset_id, file_id in file_ids.items():
             
             # Dynamic bucket fetching
-            asset_record = await asset_model.get_asset_record(asset_project_id=project["project_id"], asset_name=file_id)
+            asset_record = asset_records.get(asset_id)
+
+            if resuming and asset_record and asset_record.get("asset_processed_generation") == generation:
+                skipped_files += 1
+                continue
             bucket_name = "fields1" # Default
             if asset_record and asset_record.get("asset_config"):
                 bucket_name = asset_record["asset_config"].get("bucket", "fields1")
@@ -190,6 +507,7 @@ class NLPController(BaseController):
             
             if not file_content:
                 self.logger.warning(f"Skipping file {file_id}: Could not extract content or file not found in Supabase ({bucket_name})")
+                failed_files += 1
                 continue
 
             
@@ -202,6 +520,7 @@ class NLPController(BaseController):
 
             if not chunks:
                 self.logger.error(f"File processing failed for: {file_id}")
+                failed_files += 1
                 continue
 
             self.logger.info(f"Successfully processed file: {file_id} into {len(chunks)} chunks")
@@ -212,28 +531,103 @@ class NLPController(BaseController):
                     "chunk_metadata": chunk.metadata,
                     "chunk_order": i+1,
                     "chunk_project_id": project["project_id"],
-                    "chunk_asset_id": asset_id
+                    "chunk_asset_id": asset_id,
+                    "chunk_generation": generation,
                 }
                 for i, chunk in enumerate(chunks)
             ]
             
-            # Generate vectors
-            vectors = await self.embedding_client.generate_embedding(
-                text=[c["chunk_text"] for c in file_chunks_data],
-                document_type=DocumentTypeEnum.DOCUMENT.value
-            )
-            
-            # Add vectors to chunks for Supabase
-            if self.app_settings.VECTOR_DB_BACKEND == "SUPABASE":
+            # Collapse exact and near-duplicate chunks; only canonical ones are embedded
+            if dedup_controller.enabled:
+                stored_hashes = await chunk_model.get_canonical_hashes(
+                    project_id=project["project_id"],
+                    generation=generation,
+                    hashes=[dedup_controller.hash_text(c["chunk_text"]) for c in file_chunks_data],
+                    # a replaced asset's old chunks are about to be deleted
+                    exclude_asset_id=asset_id if (replace_assets or resuming) else None,
+                )
+                dedup_controller.add_known_hashes(stored_hashes)
+            canonical_chunks = dedup_controller.deduplicate(file_chunks_data)
+
+            # Add vectors to chunks when the vector store is the chunks table itself;
+            # other stores embed the stored chunks, which need their chunk ids
+            if self.vectors_in_chunks_table:
+                vectors = []
+                if canonical_chunks:
+                    vectors = await self.embedding_client.generate_embedding(
+                        text=[c["chunk_text"] for c in canonical_chunks],
+                        document_type=DocumentTypeEnum.DOCUMENT.value
+                    )
                 for i, vector in enumerate(vectors):
-                    file_chunks_data[i]["vector"] = vector
+                    canonical_chunks[i]["vector"] = vector
+                # bulk inserts need the same keys on every row
+                for chunk in file_chunks_data:
+                    chunk.setdefault("vector", None)
+
 
+            # chunks at or below this id belong to the asset's previous version
+            previous_max_chunk_id = None
+            if replace_assets:
+                previous_max_chunk_id = await chunk_model.get_max_asset_chunk_id(project_id=project["project_id"],
+                                                                                 asset_id=asset_id)
+
+            # Drop whatever an interrupted run inserted for this asset before it was marked done
+            if resuming:
+                _ = await chunk_model.delete_chunks_by_asset_id(project_id=project["project_id"], asset_id=asset_id,
+                                                                generation=generation)
 
             # Insert into SQL Table (Supabase)
-            inserted_chunks = await chunk_model.insert_many_chunks(file_chunks_data)
-            num_records += len(inserted_chunks) if inserted_chunks else 0
+            num_records += await chunk_model.insert_many_chunks(file_chunks_data)
+            await asset_model.mark_asset_processed(asset_id=asset_id, generation=generation)
+
+            # A replaced asset is live in another vector store: index its new chunks before the old vectors go
+            if replace_assets and do_reset != 1 and not self.vectors_in_chunks_table:
+                new_chunks = await chunk_model.get_asset_chunks_after(project_id=project["project_id"], asset_id=asset_id,
+                                                                      after_chunk_id=previous_max_chunk_id or 0)
+                is_inserted = await self.index_into_vector_db(
+                    project=project,
+                    chunks=new_chunks,
+                    chunks_ids=[chunk["chunk_id"] for chunk in new_chunks],
+                    generation=generation,
+                )
+                if not is_inserted:
+                    self.logger.error(f"Indexing the new chunks of {file_id} failed; keeping its previous version.")
+                    continue
+
+            if previous_max_chunk_id is not None:
+                deleted_count = await self.delete_asset_chunks(project=project, asset_id=asset_id,
+                                                               max_chunk_id=previous_max_chunk_id)
+                self.logger.info(f"Replaced {deleted_count} previous chunks of {file_id}")
             
             processed_files += 1
 
+        if dedup_controller.duplicate_count:
+            report = dedup_controller.get_report()
+            self.logger.info(f"Project {project['project_id']}: collapsed {report['duplicate_chunks']} of "
+                             f"{report['total_chunks']} chunks ({report['duplicate_ratio']:.1%}), "
+                             f"{report['saved_characters']} characters not embedded")
+        self.dedup_report = dedup_controller.get_report()
+
+        # chunks were inserted with their vectors
+        if num_records and self.vectors_in_chunks_table:
+            await self.record_index_model(project=project, generation=generation)
+
+        if do_reset == 1 and (processed_files or skipped_files):
+            # The PROCESS checkpoint stays until the swap, so the next reset resumes this generation
+            if failed_files:
+                self.logger.error(f"Project {project['project_id']}: {failed_files} files failed in index generation "
+                                  f"{generation}; keeping the active one.")
+                return num_records, processed_files
+
+            # Other vector stores get the new generation indexed before it goes live
+            if not self.vectors_in_chunks_table:
+                indexed_count = await self.index_generation_chunks(project=project, generation=generation)
+                if indexed_count is None:
+                    self.logger.error(f"Project {project['project_id']}: index generation {generation} failed; "
+                                      f"keeping the active one.")
+                    return num_records, processed_files
+
+            await self.promote_index_generation(project=project, generation=generation)
+
         return num_records, processed_files
 
@@ -1,6 +1,5 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
-from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
 from models.enums.ProcessingEnum import ProcessingEnum
 from stores.OCR.OCRProvidorFactory import OCRProviderFactory
 from helpers.config import get_settings
@@ -9,6 +8,9 @@ import logging
 from typing import List
 from dataclasses import dataclass
 from helpers.SupabaseStorageManager import SupabaseStorageManager
+from helpers.text_splitter import TextSplitter
+from bisect import bisect_right
+import codecs
 import tempfile
 
 logger = logging.getLogger('uvicorn.error')
@@ -19,7 +21,20 @@ class Document:
     metadata: dict
 
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+class TextDownload:
+    """Sink for SupabaseStorageManager.download_into: decodes UTF-8 as the chunks arrive."""
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.parts = []
+
+    def write(self, data: bytes):
+        self.parts.append(self.decoder.decode(data))
+
+    def getvalue(self) -> str:
+        self.parts.append(self.decoder.decode(b"", final=True))
+        return "".join(self.parts)
+
 
 class ProcessController(BaseController):
     def __init__(self, project_id: str):
@@ -29,10 +44,16 @@ class ProcessController(BaseController):
         self.project_path = ProjectController().get_project_path(project_id=project_id)
         self.storage_manager = SupabaseStorageManager()
         
-        # Initialize OCR provider
+        # OCR provider (and its SDK) is created on first use
         self.settings = get_settings()
         self.ocr_factory = OCRProviderFactory(self.settings)
-        self.ocr_provider = self.ocr_factory.create_provider(self.settings.OCR_BACKEND)
+        self._ocr_provider = None
+
+    @property
+    def ocr_provider(self):
+        if self._ocr_provider is None:
+            self._ocr_provider = self.ocr_factory.create_provider(self.settings.OCR_BACKEND)
+        return self._ocr_provider
 
 
     def get_file_extension(self, file_id: str) -> str:
@@ -46,9 +67,11 @@ class ProcessController(BaseController):
         file_ext_with_dot = f".{file_ext}"
         
         if file_ext_with_dot == ProcessingEnum.TEXT.value:
+            from langchain_community.document_loaders import TextLoader
             return TextLoader(file_path, encoding='utf-8')
         
         if file_ext_with_dot == ProcessingEnum.PDF.value:
+            from langchain_community.document_loaders import PyMuPDFLoader
             return PyMuPDFLoader(file_path)
         
         logger.error(f"Unsupported file extension: {file_ext_with_dot}")
@@ -56,20 +79,33 @@ class ProcessController(BaseController):
     
 
     async def get_file_content(self, file_id: str, bucket_name: str, use_ocr: bool = True):
-        # Download from Supabase
-        try:
-            file_bytes = await self.storage_manager.get_file_content(bucket_name, file_id)
-        except Exception as e:
-            logger.error(f"Failed to download file {file_id} from Supabase bucket {bucket_name}: {e}")
-            return None
-
         file_ext = self.get_file_extension(file_id=file_id)
         file_ext_with_dot = f".{file_ext}"
-        
-        # Create a temporary file to work with existing loaders
+
+        # Text is decoded while it downloads, without a temp file
+        if file_ext_with_dot == ProcessingEnum.TEXT.value:
+            text_download = TextDownload()
+            try:
+                await self.storage_manager.download_into(bucket_name, file_id, text_download)
+                return [Document(page_content=text_download.getvalue(), metadata={"source": file_id})]
+            except Exception as e:
+                logger.error(f"Failed to download file {file_id} from Supabase bucket {bucket_name}: {e}")
+                return None
+
+        # Loaders and OCR need a path (a PDF can't be parsed before its trailer arrives):
+        # stream into the temporary file chunk by chunk instead of holding the bytes in memory
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext_with_dot) as temp_file:
-            temp_file.write(file_bytes)
             file_path = temp_file.name
+            try:
+                await self.storage_manager.download_into(bucket_name, file_id, temp_file)
+                downloaded = True
+            except Exception as e:
+                logger.error(f"Failed to download file {file_id} from Supabase bucket {bucket_name}: {e}")
+                downloaded = False
+
+        if not downloaded:
+            os.remove(file_path)
+            return None
 
         try:
             # Use OCR for PDF files if enabled
@@ -117,22 +153,31 @@ class ProcessController(BaseController):
         # Join all parts of the file content (mostly for PDF pages)
         # Use double newline to maintain some separation between pages
         full_text = "\n\n".join([rec.page_content for rec in file_content])
-        
-        text_splitter = RecursiveCharacterTextSplitter(
+
+        # Offset where each part starts, to map chunk offsets back to pages
+        page_starts, offset = [], 0
+        for rec in file_content:
+            page_starts.append(offset)
+            offset += len(rec.page_content) + 2
+
+        # chunk_size / chunk_overlap are counted in CHUNK_SIZE_UNIT (tokens or characters)
+        text_splitter = TextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            length_function=len,
-            is_separator_regex=False,
+            length_unit=self.settings.CHUNK_SIZE_UNIT,
         )
-        
-        split_chunks = text_splitter.split_text(full_text)
-        
+
         chunks = [
             Document(
-                page_content=chunk.strip(),
-                metadata={"source": file_id}
+                page_content=chunk["text"],
+                metadata={
+                    "source": file_id,
+                    "page": bisect_right(page_starts, chunk["start_index"]),
+                    "start_index": chunk["start_index"],
+                    "end_index": chunk["end_index"],
+                }
             )
-            for chunk in split_chunks if len(chunk.strip()) >= 10
+            for chunk in text_splitter.split(full_text)
         ]
         
         # Fallback if no chunks were created but there is content
@@ -143,4 +188,3 @@ class ProcessController(BaseController):
             ))
 
         return chunks
-
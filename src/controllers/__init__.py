@@ -2,3 +2,5 @@ from .DataController import DataController
 from .ProjectController import ProjectController
 from .ProcessController import ProcessController
 from .NLPController import NLPController
+from .ContextController import ContextController
+from .DedupController import DedupController
@@ -1,65 +1,139 @@
+import asyncio
+import base64
+import hashlib
 import logging
+import tempfile
+import time
+import httpx
 from supabase import Client
 from helpers.config import get_settings
 from helpers.supabase_client import get_supabase_client
+from models.StorageBucketModel import StorageBucketModel
 import re
 
 logger = logging.getLogger('uvicorn.error')
 
+# Supabase's resumable (TUS) endpoint requires every part except the last to be exactly 6MB
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
 class SupabaseStorageManager:
+    # A manager is created per request, so the active bucket's ledger entry is cached on the class:
+    # {"bucket_name", "bucket_index", "bucket_size", "pending", "loaded_at"}; pending counts bytes
+    # of this process's uploads in flight, so concurrent uploads roll over in time
+    _active_bucket = None
+
     def __init__(self):
         self.settings = get_settings()
         self.client: Client = get_supabase_client()
         self.bucket_prefix = "fields"
-        self.max_bucket_size = 50 * 1024 * 1024 # 50MB
+        self.max_bucket_size = self.settings.STORAGE_BUCKET_MAX_SIZE
+        self.list_page_size = 1000
 
     def _get_bucket_index(self, bucket_name: str) -> int:
         match = re.search(rf"{self.bucket_prefix}(\d+)", bucket_name)
         return int(match.group(1)) if match else 0
 
-    async def get_or_create_active_bucket(self) -> str:
+    def _cache_active_bucket(self, bucket_name: str, bucket_index: int, bucket_size: int, pending_delta: int = 0):
+        cached = SupabaseStorageManager._active_bucket
+        pending = cached["pending"] if cached and cached["bucket_name"] == bucket_name else 0
+        SupabaseStorageManager._active_bucket = {
+            "bucket_name": bucket_name,
+            "bucket_index": bucket_index,
+            "bucket_size": bucket_size or 0,
+            "pending": max(pending + pending_delta, 0),
+            "loaded_at": time.monotonic(),
+        }
+
+    def _release_reservation(self, bucket_name: str, size: int):
+        cached = SupabaseStorageManager._active_bucket
+        if cached and cached["bucket_name"] == bucket_name:
+            cached["pending"] = max(cached["pending"] - size, 0)
+
+    def _create_bucket(self, bucket_name: str):
+        try:
+            self.client.storage.create_bucket(bucket_name, options={"public": False})
+        except Exception as e:
+            # another worker rolled over first
+            if "exist" not in str(e).lower():
+                raise
+
+    async def _load_active_bucket(self, bucket_model: StorageBucketModel) -> dict:
+        cached = SupabaseStorageManager._active_bucket
+        if cached and time.monotonic() - cached["loaded_at"] < self.settings.STORAGE_LEDGER_CACHE_TTL:
+            return cached
+
+        record = await bucket_model.get_active_bucket()
+        if record is None:
+            # Empty ledger: count the existing buckets once (a deployment from before the ledger)
+            await self.reconcile_bucket_sizes(bucket_model=bucket_model)
+            record = await bucket_model.get_active_bucket()
+
+        if record is None:
+            # No buckets at all: create the first one
+            bucket_name = f"{self.bucket_prefix}1"
+            self._create_bucket(bucket_name)
+            await bucket_model.record_usage(bucket_name=bucket_name, bucket_index=1)
+            record = {"bucket_name": bucket_name, "bucket_index": 1, "bucket_size": 0}
+
+        self._cache_active_bucket(record["bucket_name"], record["bucket_index"], record["bucket_size"])
+        return SupabaseStorageManager._active_bucket
+
+    async def get_or_create_active_bucket(self, incoming_size: int = 0, reserve: bool = True) -> str:
         """
-        Finds the latest bucket (fields1, fields2, ...) and checks its total size.
-        If it exceeds 50MB, creates the next one.
+        Returns the latest bucket (fields1, fields2, ...) according to the size ledger.
+        If the incoming file would take it past max_bucket_size, creates the next one.
         """
         try:
-            buckets = self.client.storage.list_buckets()
-            relevant_buckets = [b.name for b in buckets if b.name.startswith(self.bucket_prefix)]
-            
-            if not relevant_buckets:
-                # Create the first bucket
-                active_bucket = f"{self.bucket_prefix}1"
-                self.client.storage.create_bucket(active_bucket, options={"public": False})
-                return active_bucket
-
-            # Sort by index to get the latest
-            relevant_buckets.sort(key=self._get_bucket_index, reverse=True)
-            latest_bucket = relevant_buckets[0]
-
-            # Check bucket size
-            # Note: Supabase doesn't provide a direct "bucket size" API easily.
-            # We'll list files and sum their sizes.
-            files = self.client.storage.from_(latest_bucket).list()
-            total_size = sum(f.get('metadata', {}).get('size', 0) for f in files)
-
-            if total_size >= self.max_bucket_size:
-                next_index = self._get_bucket_index(latest_bucket) + 1
-                active_bucket = f"{self.bucket_prefix}{next_index}"
-                self.client.storage.create_bucket(active_bucket, options={"public": False})
-                logger.info(f"Created new bucket: {active_bucket} as {latest_bucket} reached limit.")
-                return active_bucket
-            
-            return latest_bucket
+            bucket_model = await StorageBucketModel.create_instance()
+            active = await self._load_active_bucket(bucket_model)
+
+            used = active["bucket_size"] + active["pending"]
+            if used > 0 and used + incoming_size > self.max_bucket_size:
+                next_index = active["bucket_index"] + 1
+                next_bucket = f"{self.bucket_prefix}{next_index}"
+                self._create_bucket(next_bucket)
+                bucket_size = await bucket_model.record_usage(bucket_name=next_bucket, bucket_index=next_index)
+                self._cache_active_bucket(next_bucket, next_index, bucket_size)
+                logger.info(f"Created new bucket: {next_bucket} as {active['bucket_name']} reached limit.")
+                active = SupabaseStorageManager._active_bucket
+
+            # reserved until the upload is recorded in the ledger (or fails)
+            if reserve:
+                active["pending"] += incoming_size
+            return active["bucket_name"]
         except Exception as e:
             logger.error(f"Error managing Supabase buckets: {e}")
             raise
 
-    async def upload_file(self, file: object, file_name: str, content_type: str) -> dict:
+    async def _record_usage(self, bucket_name: str, size_delta: int, file_delta: int, reserved: bool = True):
+        # The object operation already succeeded: a ledger failure is only logged, reconciliation repairs it
+        try:
+            bucket_model = await StorageBucketModel.create_instance()
+            bucket_index = self._get_bucket_index(bucket_name)
+            bucket_size = await bucket_model.record_usage(bucket_name=bucket_name, bucket_index=bucket_index,
+                                                          size_delta=size_delta, file_delta=file_delta)
+            cached = SupabaseStorageManager._active_bucket
+            if cached and cached["bucket_name"] == bucket_name:
+                released = max(size_delta, 0) if reserved else 0
+                self._cache_active_bucket(bucket_name, bucket_index, bucket_size, pending_delta=-released)
+        except Exception as e:
+            if reserved:
+                self._release_reservation(bucket_name, max(size_delta, 0))
+            logger.warning(f"Could not update the size ledger of {bucket_name}: {e}")
+
+    async def upload_file(self, file: object, file_name: str, content_type: str, file_size: int = None) -> dict:
         """
         Uploads a file to the active bucket and returns destination info.
         Accepts a file-like object (bytes or binary stream).
         """
-        active_bucket = await self.get_or_create_active_bucket()
+        if file_size is None and isinstance(file, (bytes, bytearray)):
+            file_size = len(file)
+
+        active_bucket = await self.get_or_create_active_bucket(incoming_size=file_size or 0)
         try:
             # reset file pointer if it's a file object
             if hasattr(file, 'seek'):
@@ -70,31 +144,273 @@ class SupabaseStorageManager:
                 file=file,
                 file_options={"content-type": content_type, "upsert": "true"}
             )
-            return {
-                "bucket": active_bucket,
-                "path": file_name,
-                "full_path": f"{active_bucket}/{file_name}"
-            }
         except Exception as e:
+            self._release_reservation(active_bucket, file_size or 0)
             logger.error(f"Error uploading to Supabase Storage: {e}")
             raise
 
-    async def get_file_content(self, bucket_name: str, file_path: str) -> bytes:
+        await self._record_usage(active_bucket, size_delta=file_size or 0, file_delta=1)
+        return {
+            "bucket": active_bucket,
+            "path": file_name,
+            "full_path": f"{active_bucket}/{file_name}",
+            "size": file_size or 0,
+        }
+
+    def _read_chunks(self, file, offset: int, chunk_size: int, state: dict):
+        # Yields the file from offset; hashes each byte once even when a part is re-sent after a resume
+        file.seek(offset)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            end = offset + len(chunk)
+            if end > state["hashed"]:
+                state["sha256"].update(chunk[state["hashed"] - offset:] if state["hashed"] > offset else chunk)
+                state["hashed"] = end
+            if state["hashed"] > state["max_size"]:
+                raise UploadTooLargeError(f"Upload exceeds {state['max_size']} bytes.")
+            offset = end
+            yield chunk
+
+    def _stream_simple(self, bucket_name: str, file_name: str, file, content_type: str, file_size: int, state: dict):
+        # One request whose body is read from the spooled file chunk by chunk
+        response = self.client.storage.session.post(
+            f"object/{bucket_name}/{file_name}",
+            content=self._read_chunks(file, 0, self.settings.STORAGE_UPLOAD_CHUNK_SIZE, state),
+            headers={"content-type": content_type, "content-length": str(file_size), "x-upsert": "true"},
+        )
+        response.raise_for_status()
+
+    def _stream_resumable(self, bucket_name: str, file_name: str, file, content_type: str, file_size: int, state: dict):
+        # TUS: create the upload, PATCH 6MB parts, and after a failure ask the server for its offset and resume there
+        session = self.client.storage.session
+        tus_headers = {"tus-resumable": "1.0.0"}
+        metadata = {"bucketName": bucket_name, "objectName": file_name, "contentType": content_type}
+        response = session.post("upload/resumable", headers={
+            **tus_headers,
+            "upload-length": str(file_size),
+            "upload-metadata": ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items()),
+            "x-upsert": "true",
+        })
+        response.raise_for_status()
+        upload_url = response.headers["location"]
+
+        offset, failures = 0, 0
+        while offset < file_size:
+            try:
+                chunk = next(self._read_chunks(file, offset, RESUMABLE_CHUNK_SIZE, state))
+                response = session.patch(upload_url, content=chunk, headers={
+                    **tus_headers,
+                    "upload-offset": str(offset),
+                    "content-type": "application/offset+octet-stream",
+                })
+                response.raise_for_status()
+                offset = int(response.headers["upload-offset"])
+                failures = 0
+            except UploadTooLargeError:
+                raise
+            except Exception as e:
+                failures += 1
+                if failures > self.settings.STORAGE_UPLOAD_RETRIES:
+                    raise
+                logger.warning(f"Resumable upload of {file_name} failed at byte {offset} ({e}); resuming.")
+                response = session.head(upload_url, headers=tus_headers)
+                response.raise_for_status()
+                offset = int(response.headers["upload-offset"])
+
+    async def upload_stream(self, file, file_name: str, content_type: str, file_size: int) -> dict:
         """
-        Downloads file content from a specific bucket.
+        Streams a seekable file object (e.g. UploadFile.file) to the active bucket without
+        reading it into memory: a single streamed request up to STORAGE_RESUMABLE_THRESHOLD,
+        a resumable upload in 6MB parts above it. The SHA-256 is computed on the way through.
         """
+        active_bucket = await self.get_or_create_active_bucket(incoming_size=file_size)
+        state = {"sha256": hashlib.sha256(), "hashed": 0, "max_size": file_size}
+        upload = self._stream_resumable if file_size > self.settings.STORAGE_RESUMABLE_THRESHOLD else self._stream_simple
         try:
-            return self.client.storage.from_(bucket_name).download(file_path)
+            # the storage client is synchronous: keep the event loop free while the body streams
+            await asyncio.to_thread(upload, active_bucket, file_name, file, content_type, file_size, state)
+        except Exception as e:
+            self._release_reservation(active_bucket, file_size)
+            logger.error(f"Error streaming upload to Supabase Storage: {e}")
+            raise
+
+        await self._record_usage(active_bucket, size_delta=file_size, file_delta=1)
+        return {
+            "bucket": active_bucket,
+            "path": file_name,
+            "full_path": f"{active_bucket}/{file_name}",
+            "size": file_size,
+            "sha256": state["sha256"].hexdigest(),
+        }
+
+    def is_upload_bucket(self, bucket_name: str) -> bool:
+        return bool(re.fullmatch(rf"{self.bucket_prefix}\d+", bucket_name or ""))
+
+    async def create_signed_upload(self, file_name: str, file_size: int) -> dict:
+        """
+        Returns a signed URL the client PUTs the file to directly, in the bucket the file
+        would have been uploaded to. Nothing is reserved: the ledger is updated on confirm.
+        """
+        active_bucket = await self.get_or_create_active_bucket(incoming_size=file_size, reserve=False)
+        try:
+            signed = self.client.storage.from_(active_bucket).create_signed_upload_url(file_name)
+        except Exception as e:
+            logger.error(f"Error creating signed upload URL: {e}")
+            raise
+
+        return {
+            "bucket": active_bucket,
+            "path": file_name,
+            "upload_url": signed["signed_url"],
+            "token": signed["token"],
+        }
+
+    async def confirm_signed_upload(self, bucket_name: str, file_path: str, file_size: int, md5: str = None) -> dict:
+        """
+        Checks a directly uploaded object against the size (and MD5, when given) the client
+        declared, and records it in the ledger. A mismatching object is deleted, so callers
+        pass only uploads their sign step issued (see DataController.read_upload_ticket).
+        Returns {"verified", "size", "md5", "reason"}.
+        """
+        info = self.client.storage.from_(bucket_name).info(file_path)
+        metadata = info.get("metadata") or {}
+        stored_size = int(info.get("size") or metadata.get("size") or 0)
+        # single-request uploads get the body's MD5 as their ETag
+        etag = (info.get("etag") or metadata.get("eTag") or "").strip('"').lower()
+
+        reason = None
+        if stored_size != file_size:
+            reason = f"Stored size {stored_size} does not match the declared size {file_size}."
+        elif stored_size > self.settings.FILE_MAX_SIZE:
+            reason = f"File exceeds {self.settings.FILE_MAX_SIZE} bytes."
+        elif md5 and etag != md5.lower():
+            reason = "Stored object's MD5 does not match the declared MD5."
+
+        if reason:
+            self.client.storage.from_(bucket_name).remove([file_path])
+            return {"verified": False, "size": stored_size, "md5": etag, "reason": reason}
+
+        await self._record_usage(bucket_name, size_delta=stored_size, file_delta=1, reserved=False)
+        return {"verified": True, "size": stored_size, "md5": etag, "reason": None}
+
+    def _list_files(self, bucket_name: str, search: str = None):
+        # storage lists 100 objects by default; page through all of them
+        offset = 0
+        while True:
+            options = {"limit": self.list_page_size, "offset": offset}
+            if search:
+                options["search"] = search
+            files = self.client.storage.from_(bucket_name).list(options=options)
+            yield from files
+            if len(files) < self.list_page_size:
+                return
+            offset += self.list_page_size
+
+    async def reconcile_bucket_sizes(self, bucket_model: StorageBucketModel = None) -> dict:
+        """
+        Recounts every bucket from storage and overwrites the ledger, correcting drift
+        (failed ledger updates, files removed outside the app). Returns {bucket_name: size}.
+        """
+        bucket_model = bucket_model or await StorageBucketModel.create_instance()
+        buckets = self.client.storage.list_buckets()
+        sizes = {}
+        for bucket in buckets:
+            if not bucket.name.startswith(self.bucket_prefix):
+                continue
+            files = [f for f in self._list_files(bucket.name) if f.get("id")]  # folders have no id
+            sizes[bucket.name] = sum((f.get("metadata") or {}).get("size", 0) for f in files)
+            await bucket_model.set_usage(bucket_name=bucket.name, bucket_index=self._get_bucket_index(bucket.name),
+                                         bucket_size=sizes[bucket.name], file_count=len(files))
+
+        SupabaseStorageManager._active_bucket = None
+        logger.info(f"Reconciled storage ledger for {len(sizes)} buckets.")
+        return sizes
+
+    def _iter_download(self, bucket_name: str, file_path: str):
+        """
+        Yields the object in STORAGE_DOWNLOAD_CHUNK_SIZE pieces. A dropped connection is resumed
+        with a Range request from the last byte received instead of starting over.
+        """
+        session = self.client.storage.session
+        received, failures = 0, 0
+        while True:
+            headers = {"range": f"bytes={received}-"} if received else {}
+            try:
+                with session.stream("GET", f"object/{bucket_name}/{file_path}", headers=headers) as response:
+                    response.raise_for_status()
+                    # a server that ignores Range sends the whole object again
+                    skip = received if response.status_code != 206 else 0
+                    for chunk in response.iter_bytes(self.settings.STORAGE_DOWNLOAD_CHUNK_SIZE):
+                        if skip:
+                            dropped = min(skip, len(chunk))
+                            chunk, skip = chunk[dropped:], skip - dropped
+                            if not chunk:
+                                continue
+                        received += len(chunk)
+                        failures = 0
+                        yield chunk
+                return
+            except httpx.TransportError as e:
+                failures += 1
+                if failures > self.settings.STORAGE_DOWNLOAD_RETRIES:
+                    raise
+                logger.warning(f"Download of {bucket_name}/{file_path} dropped at byte {received} ({e}); resuming.")
+
+    async def download_into(self, bucket_name: str, file_path: str, sink) -> int:
+        """
+        Streams an object into anything with a write() method (a file, a spool, an incremental
+        decoder) as the bytes arrive. Returns the number of bytes written.
+        """
+        def copy():
+            size = 0
+            for chunk in self._iter_download(bucket_name, file_path):
+                sink.write(chunk)
+                size += len(chunk)
+            return size
+
+        try:
+            # the storage client is synchronous: keep the event loop free while the body streams
+            return await asyncio.to_thread(copy)
         except Exception as e:
             logger.error(f"Error downloading from Supabase Storage: {e}")
             raise
 
-    async def delete_file(self, bucket_name: str, file_path: str):
+    async def download_to_spool(self, bucket_name: str, file_path: str):
+        """
+        Downloads into a SpooledTemporaryFile: kept in memory up to
+        STORAGE_DOWNLOAD_SPOOL_MAX_MEMORY bytes, moved to disk above that. Rewound on return.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.settings.STORAGE_DOWNLOAD_SPOOL_MAX_MEMORY)
+        try:
+            await self.download_into(bucket_name, file_path, spool)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    async def get_file_content(self, bucket_name: str, file_path: str) -> bytes:
+        """
+        Downloads file content from a specific bucket.
+        Prefer download_into / download_to_spool, which never hold the whole object in memory.
+        """
+        with await self.download_to_spool(bucket_name, file_path) as spool:
+            return spool.read()
+
+    async def delete_file(self, bucket_name: str, file_path: str, file_size: int = None):
         """
         Deletes a file from Supabase Storage.
         """
         try:
-            self.client.storage.from_(bucket_name).remove([file_path])
+            if file_size is None:
+                matches = [f for f in self._list_files(bucket_name, search=file_path) if f.get("name") == file_path]
+                file_size = (matches[0].get("metadata") or {}).get("size", 0) if matches else 0
+            removed = self.client.storage.from_(bucket_name).remove([file_path])
         except Exception as e:
             logger.error(f"Error deleting from Supabase Storage: {e}")
             raise
+
+        if removed:
+            await self._record_usage(bucket_name, size_delta=-file_size, file_delta=-1)
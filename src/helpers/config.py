@@ -11,6 +11,19 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES: List[str]
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNK_SIZE: int
+    STORAGE_BUCKET_MAX_SIZE: int = 50 * 1024 * 1024
+    STORAGE_LEDGER_CACHE_TTL: float = 30.0
+    STORAGE_RECONCILE_INTERVAL: float = 0.0
+    STORAGE_UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    STORAGE_RESUMABLE_THRESHOLD: int = 6 * 1024 * 1024
+    STORAGE_UPLOAD_RETRIES: int = 3
+    STORAGE_UPLOAD_CONCURRENCY: int = 4
+    STORAGE_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    STORAGE_DOWNLOAD_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024
+    STORAGE_DOWNLOAD_RETRIES: int = 3
+    FILE_MAX_BATCH_COUNT: int = 100
+    UPLOAD_TICKET_SECRET: Optional[str] = None
+    UPLOAD_TICKET_TTL: int = 7200
 
     # Database
     # MONGODB_URI: str
@@ -22,6 +35,22 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int
     POSTGRES_MAIN_DATABASE: str
 
+    # SUPABASE (PostgREST over HTTP) or POSTGRES (asyncpg pool on the POSTGRES_* settings)
+    DATA_BACKEND: str = "SUPABASE"
+    POSTGRES_POOL_MIN_SIZE: int = 1
+    POSTGRES_POOL_MAX_SIZE: int = 10
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    CHUNKS_INSERT_BATCH_SIZE: int = 500
+    INDEX_BUILD_BATCH_SIZE: int = 100
+    INDEX_BUILD_BATCH_DELAY: float = 0.2
+    CHUNK_DEDUP_ENABLED: bool = True
+    CHUNK_DEDUP_THRESHOLD: float = 0.85
+    CHUNK_DEDUP_NUM_PERM: int = 64
+    CHUNK_SIZE_UNIT: str = "characters"
+    PROJECT_CACHE_TTL: float = 5.0
+    PROJECT_CACHE_NEGATIVE_TTL: float = 1.0
+    PROJECT_CACHE_MAX_SIZE: int = 10000
+
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
@@ -52,6 +81,12 @@ class Settings(BaseSettings):
     GENERATION_DEFAULT_MAX_TOKENS: Optional[int] = None
     GENERATION_DEFAULT_TEMPERATURE: Optional[float] = None
 
+    # Context params
+    CONTEXT_MAX_TOKENS: Optional[int] = None
+    CONTEXT_MIN_SCORE_RATIO: float = 0.0
+    CONTEXT_COMPRESSION_ENABLED: bool = False
+    CONTEXT_COMPRESSION_MAX_SENTENCES: int = 3
+
     # Vector DB
     VECTOR_DB_BACKEND_LITERAL: Optional[List[str]] = None
     VECTOR_DB_BACKEND: str
@@ -59,10 +94,23 @@ class Settings(BaseSettings):
     VECTOR_DB_DISTANCE_METHOD: Optional[str] = None
     VECTOR_DB_DEFAULT_VECTOR_SIZE: int = 1536
     VECTOR_DB_INDEX_THRESHOLD: int = 100
+    VECTOR_DB_COMPACT_MODE: Optional[str] = None
+    VECTOR_DB_RERANK_MULTIPLIER: int = 4
+    VECTOR_DB_LOCAL_INDEX: str = "FLAT"
+    VECTOR_DB_HNSW_M: int = 16
+    VECTOR_DB_HNSW_EF_CONSTRUCTION: int = 200
+    VECTOR_DB_HNSW_EF_SEARCH: int = 64
+    VECTOR_DB_CACHE_ENABLED: bool = False
+    VECTOR_DB_CACHE_MAX_PROJECTS: int = 8
+    VECTOR_DB_CACHE_MAX_MB: int = 512
+    VECTOR_DB_CACHE_MIN_HITS: int = 3
+    VECTOR_DB_CACHE_VERSION_CHECK_INTERVAL: float = 5.0
     
 
     PRIMARY_LANG: str = "en"
     DEFAULT_LANG: str = "en"
+    TEMPLATE_WATCH_RELOAD: bool = False
+    TEMPLATE_WATCH_INTERVAL: float = 2.0
 
 
 
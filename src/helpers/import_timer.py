@@ -0,0 +1,37 @@
+import importlib
+import logging
+import resource
+import time
+
+logger = logging.getLogger('uvicorn.error')
+
+# module name -> (seconds, peak RSS growth in KB), filled as backends are imported
+import_costs = {}
+
+
+def timed_import(module_name: str):
+    """
+    Imports a module and records how long it took and how much the process peak RSS grew.
+    Used by the provider factories so only the configured backends' SDKs get imported.
+    """
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.perf_counter()
+
+    module = importlib.import_module(module_name)
+
+    elapsed = time.perf_counter() - start_time
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+    import_costs.setdefault(module_name, (elapsed, rss_growth))
+
+    return module
+
+
+def log_import_report():
+    if not import_costs:
+        return
+
+    for module_name, (elapsed, rss_growth) in sorted(import_costs.items(), key=lambda item: item[1][0], reverse=True):
+        logger.info(f"Imported {module_name} in {elapsed * 1000:.1f} ms (+{rss_growth / 1024:.1f} MB peak RSS)")
+
+    total_elapsed = sum(elapsed for elapsed, _ in import_costs.values())
+    logger.info(f"Backend imports took {total_elapsed * 1000:.1f} ms in total")
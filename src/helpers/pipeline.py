@@ -0,0 +1,102 @@
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def _call_in_thread(func, inputs: dict):
+    # The provider SDKs block inside their async methods, so the coroutine gets a loop of its own here
+    result = func(**inputs)
+    if inspect.iscoroutine(result):
+        return asyncio.run(result)
+    return result
+
+
+class StagePipeline:
+    """
+    Runs named stages as soon as the stages they depend on have finished, so independent
+    stages overlap and the whole run takes about as long as its critical path.
+
+    A stage is called with its dependencies' results as keyword arguments named after them and
+    may return a value or a coroutine. A result of None or False marks the stage as failed
+    (the repo's usual failure values): stages depending on it are skipped and report None.
+    Stages marked in_thread run in a worker thread, for calls that would block the event loop.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages = {}
+        # stage name -> (start offset, duration) in seconds, relative to the start of run()
+        self.timings = {}
+        self.elapsed = None
+
+    def add_stage(self, name: str, func, depends_on: tuple = (), in_thread: bool = False):
+        # Dependencies must be added first, which also rules out cycles
+        unknown = [dependency for dependency in depends_on if dependency not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+
+        self.stages[name] = (func, tuple(depends_on), in_thread)
+
+    async def _run_stage(self, name: str, tasks: dict, started_at: float):
+        func, depends_on, in_thread = self.stages[name]
+
+        inputs = {}
+        for dependency in depends_on:
+            result = await tasks[dependency]
+            if result is None or result is False:
+                return None
+            inputs[dependency] = result
+
+        stage_start = time.perf_counter()
+        try:
+            if in_thread:
+                return await asyncio.to_thread(_call_in_thread, func, inputs)
+
+            result = func(**inputs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self.timings[name] = (stage_start - started_at, time.perf_counter() - stage_start)
+
+    async def run(self) -> dict:
+        """
+        Returns every stage's result by name. The first exception cancels the stages
+        still running and is re-raised.
+        """
+        started_at = time.perf_counter()
+        tasks = {}
+        for name in self.stages:
+            tasks[name] = asyncio.ensure_future(self._run_stage(name, tasks, started_at))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            self.elapsed = time.perf_counter() - started_at
+            self.log_timings()
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    def ordered_timings(self):
+        return sorted(self.timings.items(), key=lambda item: item[1][0])
+
+    def log_timings(self):
+        stages = ", ".join(
+            f"{name} {duration * 1000:.1f} ms (+{offset * 1000:.1f})"
+            for name, (offset, duration) in self.ordered_timings()
+        )
+        logger.info(f"{self.name} took {self.elapsed * 1000:.1f} ms: {stages or 'no stages ran'}")
+
+    def server_timing(self) -> str:
+        # Server-Timing header value, so clients and browser dev tools see the per-stage breakdown
+        metrics = [f"{name};dur={duration * 1000:.1f}" for name, (_, duration) in self.ordered_timings()]
+        if self.elapsed is not None:
+            metrics.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(metrics)
@@ -0,0 +1,82 @@
+import json
+import logging
+import struct
+from helpers.config import get_settings
+from helpers.import_timer import timed_import
+
+logger = logging.getLogger('uvicorn.error')
+
+# One pool per worker, shared by the data models and the PGVECTOR provider
+_pool = None
+
+
+def encode_vector(vector: list) -> bytes:
+    # pgvector binary format: int16 dimensions, int16 unused, float4 values (network byte order)
+    return struct.pack(f">HH{len(vector)}f", len(vector), 0, *vector)
+
+
+def decode_vector(data: bytes) -> list:
+    dimensions, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dimensions}f", data, 4))
+
+
+def encode_jsonb(value) -> bytes:
+    # jsonb binary format: a version byte (1) followed by the JSON text
+    return b"\x01" + json.dumps(value).encode()
+
+
+def decode_jsonb(data: bytes):
+    return json.loads(data[1:])
+
+
+async def init_connection(connection):
+    # Binary, because copy_records_to_table only sends binary COPY data
+    await connection.set_type_codec(
+        "jsonb", schema="pg_catalog",
+        encoder=encode_jsonb, decoder=decode_jsonb, format="binary",
+    )
+
+    # pgvector may live in public or (on Supabase) in the extensions schema
+    vector_schema = await connection.fetchval(
+        "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace WHERE t.typname = 'vector'"
+    )
+    if vector_schema:
+        await connection.set_type_codec(
+            "vector", schema=vector_schema,
+            encoder=encode_vector, decoder=decode_vector, format="binary",
+        )
+    else:
+        logger.warning("pgvector type not found; vector columns will not be decoded")
+
+
+async def get_postgres_pool():
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    settings = get_settings()
+    asyncpg = timed_import("asyncpg")
+
+    _pool = await asyncpg.create_pool(
+        user=settings.POSTGRES_USERNAME,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database=settings.POSTGRES_MAIN_DATABASE,
+        min_size=settings.POSTGRES_POOL_MIN_SIZE,
+        max_size=settings.POSTGRES_POOL_MAX_SIZE,
+        # asyncpg prepares every statement and caches it per connection; 0 disables it (pgbouncer transaction mode)
+        statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        init=init_connection,
+    )
+    logger.info(f"Connected to Postgres at {settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}")
+    return _pool
+
+
+async def close_postgres_pool():
+    global _pool
+    if _pool is None:
+        return
+
+    await _pool.close()
+    _pool = None
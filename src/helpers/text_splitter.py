@@ -0,0 +1,147 @@
+from collections import deque
+from typing import List
+import numpy as np
+
+# Character classes for the Basic Multilingual Plane, matching the regex \w and \s classes:
+# 0 = word character, 1 = whitespace, 2 = anything else (a single-character token).
+# The last entry (U+FFFF, a noncharacter) stands in for everything outside the BMP.
+WORD, SPACE, OTHER = 0, 1, 2
+CHARACTER_CLASSES = np.array([
+    WORD if (ch.isalnum() or ch == "_") else SPACE if ch.isspace() else OTHER
+    for ch in map(chr, range(0xFFFF))
+] + [WORD], dtype=np.uint8)
+
+# A run of word characters is one token to the approximation, but a base64 blob, long URL or
+# minified text is many to a real tokenizer: a range counts at least one token per this many
+# characters, so such runs are still cut to fit the embedding model's input.
+MAX_CHARACTERS_PER_TOKEN = 10
+
+
+class TextSplitter:
+    """
+    Recursive splitter with RecursiveCharacterTextSplitter's separator hierarchy
+    ("\\n\\n", "\\n", " ", ""), sized in approximate tokens or characters.
+
+    Tokens follow ContextController's approximation (runs of word characters and standalone
+    punctuation). They are marked once with a vectorized lookup over the code points, and a prefix
+    sum makes the token count of any range O(1), so splitting never copies substrings until the
+    final chunks. Pieces keep their separator at the start (like keep_separator=True), merging
+    and overlap happen in one pass over all pieces, and each chunk carries its character offsets.
+    Runs longer than MAX_CHARACTERS_PER_TOKEN characters per token are cut by characters.
+    """
+
+    separators = ["\n\n", "\n", " ", ""]
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0, length_unit: str = "tokens", min_chunk_length: int = 10):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.count_tokens = length_unit == "tokens"
+        self.min_chunk_length = min_chunk_length
+
+    def _index_tokens(self, text: str):
+        # surrogatepass: text decoded leniently can hold lone surrogates, which are one code point each
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        classes = CHARACTER_CLASSES[np.minimum(codes, 0xFFFF)]
+
+        # A token starts at every non-word, non-space character and at the first character of each word
+        word = classes == WORD
+        self.token_starts = classes == OTHER
+        self.token_starts[1:] |= word[1:] & ~word[:-1]
+        self.token_starts[:1] |= word[:1]
+
+        self.token_prefix = np.zeros(len(codes) + 1, dtype=np.int32)
+        np.cumsum(self.token_starts, dtype=np.int32, out=self.token_prefix[1:])
+
+    def _length(self, start: int, end: int) -> int:
+        if self.count_tokens:
+            return max(int(self.token_prefix[end] - self.token_prefix[start]),
+                       (end - start) // MAX_CHARACTERS_PER_TOKEN)
+        return end - start
+
+    def _split_range(self, start: int, end: int, level: int, pieces: list):
+        # Appends (start, end, length) pieces that partition text[start:end], each within chunk_size
+        length = self._length(start, end)
+        if length <= self.chunk_size:
+            if length:
+                pieces.append((start, end, length))
+            return
+
+        separator = self.separators[level]
+        if not separator:
+            self._split_hard(start, end, pieces)
+            return
+
+        cuts = [start]
+        position = self.text.find(separator, start + 1, end)
+        while position != -1:
+            cuts.append(position)
+            position = self.text.find(separator, position + len(separator), end)
+        cuts.append(end)
+
+        if len(cuts) == 2:
+            self._split_range(start, end, level + 1, pieces)
+            return
+
+        for piece_start, piece_end in zip(cuts, cuts[1:]):
+            self._split_range(piece_start, piece_end, level + 1, pieces)
+
+    def _split_hard(self, start: int, end: int, pieces: list):
+        # Last resort: cut every chunk_size tokens (or characters)
+        if not self.count_tokens:
+            for piece_start in range(start, end, self.chunk_size):
+                piece_end = min(piece_start + self.chunk_size, end)
+                pieces.append((piece_start, piece_end, piece_end - piece_start))
+            return
+
+        token_offsets = np.flatnonzero(self.token_starts[start:end]) + start
+        boundaries = [start] + token_offsets[self.chunk_size::self.chunk_size].tolist() + [end]
+        max_characters = self.chunk_size * MAX_CHARACTERS_PER_TOKEN
+        for piece_start, piece_end in zip(boundaries, boundaries[1:]):
+            # runs too long for their token count are cut by characters
+            for cut in range(piece_start, piece_end, max_characters):
+                cut_end = min(cut + max_characters, piece_end)
+                pieces.append((cut, cut_end, self._length(cut, cut_end)))
+
+    def _make_chunk(self, start: int, end: int, length: int):
+        # Trim surrounding whitespace by moving the offsets instead of copying twice
+        raw = self.text[start:end]
+        stripped = raw.strip()
+        if len(stripped) < self.min_chunk_length:
+            return None
+        start += len(raw) - len(raw.lstrip())
+        return {"text": stripped, "start_index": start, "end_index": start + len(stripped), "length": length}
+
+    def split(self, text: str) -> List[dict]:
+        """
+        Returns chunks as dicts: text, start_index and end_index (offsets into `text`)
+        and length (in the configured unit).
+        """
+        self.text = text
+        if self.count_tokens:
+            self._index_tokens(text)
+
+        pieces = []
+        self._split_range(0, len(text), 0, pieces)
+
+        chunks, window, window_length = [], deque(), 0
+        for piece in pieces:
+            if window and window_length + piece[2] > self.chunk_size:
+                chunk = self._make_chunk(window[0][0], window[-1][1], window_length)
+                if chunk:
+                    chunks.append(chunk)
+                # keep at most chunk_overlap of the tail, and leave room for this piece
+                while window and (window_length > self.chunk_overlap or window_length + piece[2] > self.chunk_size):
+                    window_length -= window.popleft()[2]
+            window.append(piece)
+            window_length += piece[2]
+
+        if window:
+            chunk = self._make_chunk(window[0][0], window[-1][1], window_length)
+            if chunk:
+                chunks.append(chunk)
+
+        self.text, self.token_starts, self.token_prefix = None, None, None
+        return chunks
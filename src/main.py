@@ -1,12 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from routes import base, data, nlp
 from helpers.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
 from stores.llm.templates.template_parser import TemplateParser
+from helpers.import_timer import log_import_report
+from helpers.postgres_client import get_postgres_pool, close_postgres_pool
+from models.enums.DataBackendEnum import DataBackendEnum
+from helpers.SupabaseStorageManager import SupabaseStorageManager
+import logging
+
+logger = logging.getLogger("uvicorn.error")
 
 
 @asynccontextmanager
@@ -48,14 +56,48 @@ async def startup_span():
     )
     await app.state.vectordb_client.connect()
 
+    # open the shared pool up front so the first request doesn't pay for it
+    if settings.DATA_BACKEND == DataBackendEnum.POSTGRES.value:
+        await get_postgres_pool()
+
     app.state.template_parser = TemplateParser(
         language=settings.PRIMARY_LANG,
         default_language=settings.DEFAULT_LANG,
     )
 
+    app.state.template_watch_task = None
+    if settings.TEMPLATE_WATCH_RELOAD:
+        app.state.template_watch_task = asyncio.create_task(
+            app.state.template_parser.watch(interval=settings.TEMPLATE_WATCH_INTERVAL)
+        )
+
+    app.state.storage_reconcile_task = None
+    if settings.STORAGE_RECONCILE_INTERVAL > 0:
+        app.state.storage_reconcile_task = asyncio.create_task(
+            reconcile_storage_ledger(interval=settings.STORAGE_RECONCILE_INTERVAL)
+        )
+
+    # how much each configured backend cost to import
+    log_import_report()
+
+
+async def reconcile_storage_ledger(interval: float):
+    # Periodically recounts the storage buckets so the size ledger can't drift for long
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await SupabaseStorageManager().reconcile_bucket_sizes()
+        except Exception as e:
+            logger.error(f"Storage ledger reconciliation failed: {e}")
+
 
 async def shutdown_span():
+    if app.state.template_watch_task:
+        app.state.template_watch_task.cancel()
+    if app.state.storage_reconcile_task:
+        app.state.storage_reconcile_task.cancel()
     await app.state.vectordb_client.disconnect()
+    await close_postgres_pool()
 
 app.include_router(base.base_router)
 app.include_router(data.data_router)
@@ -1,18 +1,21 @@
 from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
+from datetime import datetime, timezone
 
 class AssetModel(BaseDataModel):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
         self.table_name = DataBaseEnum.COLLECTION_ASSETS.value
 
-    @classmethod
-    async def create_instance(cls, db_client: object = None):
-        instance = cls()
-        return instance
-
     async def create_asset(self, asset_project_id: int, asset_type: str, asset_name: str, asset_size: int, asset_config: dict):
+        if self.db_client is not None:
+            return await self.fetch_one(
+                f"""INSERT INTO {self.table_name} (asset_project_id, asset_type, asset_name, asset_size, asset_config)
+                    VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+                asset_project_id, asset_type, asset_name, asset_size, asset_config
+            )
+
         data = {
             "asset_project_id": asset_project_id,
             "asset_type": asset_type,
@@ -25,15 +28,82 @@ class AssetModel(BaseDataModel):
             return res.data[0]
         return None
 
+    async def create_assets(self, assets: list):
+        # One insert for a whole upload batch; assets are dicts with the create_asset fields
+        if not assets:
+            return []
+
+        if self.db_client is not None:
+            return await self.fetch_all(
+                f"""INSERT INTO {self.table_name} (asset_project_id, asset_type, asset_name, asset_size, asset_config)
+                    SELECT * FROM unnest($1::int[], $2::text[], $3::text[], $4::int[], $5::jsonb[]) RETURNING *""",
+                [a["asset_project_id"] for a in assets], [a["asset_type"] for a in assets],
+                [a["asset_name"] for a in assets], [a["asset_size"] for a in assets],
+                [a["asset_config"] for a in assets]
+            )
+
+        res = self.supabase.table(self.table_name).insert(assets).execute()
+        return res.data or []
+
     async def get_all_project_assets(self, asset_project_id: int, asset_type: str):
+        if self.db_client is not None:
+            return await self.fetch_all(
+                f"SELECT * FROM {self.table_name} WHERE asset_project_id = $1 AND asset_type = $2",
+                asset_project_id, asset_type
+            )
+
         res = self.supabase.table(self.table_name).select("*").eq("asset_project_id", asset_project_id).eq("asset_type", asset_type).execute()
         return res.data
 
+    async def get_assets_by_ids(self, asset_project_id: int, asset_ids: list):
+        # One query for a whole batch of assets; returns {asset_id: record}
+        if not asset_ids:
+            return {}
+
+        if self.db_client is not None:
+            records = await self.fetch_all(
+                f"SELECT * FROM {self.table_name} WHERE asset_project_id = $1 AND asset_id = ANY($2::int[])",
+                asset_project_id, list(asset_ids)
+            )
+        else:
+            records = self.supabase.table(self.table_name).select("*").eq("asset_project_id", asset_project_id) \
+                .in_("asset_id", list(asset_ids)).execute().data or []
+        return {record["asset_id"]: record for record in records}
+
     async def get_asset_record(self, asset_project_id: int, asset_name: str):
+        if self.db_client is not None:
+            return await self.fetch_one(
+                f"SELECT * FROM {self.table_name} WHERE asset_project_id = $1 AND asset_name = $2 LIMIT 1",
+                asset_project_id, asset_name
+            )
+
         res = self.supabase.table(self.table_name).select("*").eq("asset_project_id", asset_project_id).eq("asset_name", asset_name).execute()
         if res.data:
             return res.data[0]
         return None
 
+    async def get_asset_by_name(self, asset_name: str):
+        # Stored file names are unique across projects: whichever project registered the object
+        if self.db_client is not None:
+            return await self.fetch_one(f"SELECT * FROM {self.table_name} WHERE asset_name = $1 LIMIT 1", asset_name)
+
+        res = self.supabase.table(self.table_name).select("*").eq("asset_name", asset_name).limit(1).execute()
+        if res.data:
+            return res.data[0]
+        return None
+
+    async def mark_asset_processed(self, asset_id: int, generation: int):
+        # Lets an interrupted reset skip assets already written into its generation
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"""UPDATE {self.table_name} SET asset_processed_generation = $2, asset_processed_at = NOW()
+                    WHERE asset_id = $1""",
+                asset_id, generation
+            )
+            return True
 
-    
\ No newline at end of file
+        self.supabase.table(self.table_name).update({
+            "asset_processed_generation": generation,
+            "asset_processed_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("asset_id", asset_id).execute()
+        return True
@@ -1,8 +1,41 @@
+import json
 from helpers.config import get_settings, Settings
 from helpers.supabase_client import get_supabase_client
+from helpers.postgres_client import get_postgres_pool
+from .enums.DataBackendEnum import DataBackendEnum
 
 class BaseDataModel:
-    def __init__(self):
+    def __init__(self, db_client: object = None):
         self.settings: Settings = get_settings()
-        self.supabase = get_supabase_client()
 
+        # db_client is an asyncpg pool when DATA_BACKEND is POSTGRES, otherwise queries go through PostgREST
+        self.db_client = db_client
+        self._supabase = None
+
+    @property
+    def supabase(self):
+        # Built on first query, so a model that answers from a cache never creates a client
+        if self._supabase is None and self.db_client is None:
+            self._supabase = get_supabase_client()
+        return self._supabase
+
+    @classmethod
+    async def create_instance(cls, db_client: object = None):
+        if db_client is None and get_settings().DATA_BACKEND == DataBackendEnum.POSTGRES.value:
+            db_client = await get_postgres_pool()
+        return cls(db_client=db_client)
+
+    async def fetch_one(self, query: str, *args):
+        row = await self.db_client.fetchrow(query, *args)
+        return dict(row) if row else None
+
+    async def fetch_all(self, query: str, *args):
+        rows = await self.db_client.fetch(query, *args)
+        return [dict(row) for row in rows]
+
+    async def estimate_count(self, query: str, *args) -> int:
+        # The planner's row estimate for `query`: no rows are read (like PostgREST's count=planned)
+        plan = await self.db_client.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -3,16 +3,21 @@ from .enums.DataBaseEnum import DataBaseEnum
 
 class ChunkModel(BaseDataModel):
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
         self.table_name = DataBaseEnum.COLLECTION_CHUNKS.value
-
-    @classmethod
-    async def create_instance(cls, db_client: object = None):
-        instance = cls()
-        return instance
+        # what index_into_vector_db reads from a stored chunk
+        self.index_columns = ["chunk_id", "chunk_text", "chunk_metadata", "chunk_order", "chunk_asset_id",
+                              "chunk_duplicate_of"]
 
     async def create_chunk(self, chunk_text: str, chunk_metadata: dict, chunk_order: int, chunk_project_id: int, chunk_asset_id: int):
+        if self.db_client is not None:
+            return await self.fetch_one(
+                f"""INSERT INTO {self.table_name} (chunk_text, chunk_metadata, chunk_order, chunk_project_id, chunk_asset_id)
+                    VALUES ($1, $2, $3, $4, $5) RETURNING *""",
+                chunk_text, chunk_metadata, chunk_order, chunk_project_id, chunk_asset_id
+            )
+
         data = {
             "chunk_text": chunk_text,
             "chunk_metadata": chunk_metadata,
@@ -26,27 +31,249 @@ class ChunkModel(BaseDataModel):
         return None
 
     async def get_chunk(self, chunk_id: int):
+        if self.db_client is not None:
+            return await self.fetch_one(f"SELECT * FROM {self.table_name} WHERE chunk_id = $1", chunk_id)
+
         res = self.supabase.table(self.table_name).select("*").eq("chunk_id", chunk_id).execute()
         if res.data:
             return res.data[0]
         return None
 
-    async def insert_many_chunks(self, chunks_data: list):
+    async def insert_many_chunks(self, chunks_data: list, batch_size: int = None):
         # chunks_data should be a list of dicts reflecting the table schema
-        res = self.supabase.table(self.table_name).insert(chunks_data).execute()
-        return res.data
+        # Returns the number of inserted chunks
+        batch_size = batch_size or self.settings.CHUNKS_INSERT_BATCH_SIZE
+
+        if self.db_client is not None:
+            return await self.copy_chunks(chunks_data, batch_size=batch_size)
+
+        # Bounded batches keep each PostgREST payload under its size limit;
+        # returning=minimal stops the server from echoing the vectors back
+        inserted_count = 0
+        for i in range(0, len(chunks_data), batch_size):
+            res = self.supabase.table(self.table_name).insert(
+                chunks_data[i:i+batch_size], count="exact", returning="minimal"
+            ).execute()
+            inserted_count += res.count or 0
+        return inserted_count
+
+    async def copy_chunks(self, chunks_data: list, batch_size: int):
+        # Binary COPY: vectors go over the wire as float4, not JSON decimal text
+        columns = ["chunk_text", "chunk_metadata", "chunk_order", "chunk_project_id", "chunk_asset_id", "chunk_generation",
+                   "chunk_hash", "chunk_duplicate_of", "vector"]
+
+        async with self.db_client.acquire() as connection:
+            async with connection.transaction():
+                for i in range(0, len(chunks_data), batch_size):
+                    await connection.copy_records_to_table(
+                        self.table_name,
+                        columns=columns,
+                        records=(
+                            (c["chunk_text"], c.get("chunk_metadata"), c["chunk_order"],
+                             c["chunk_project_id"], c["chunk_asset_id"], c.get("chunk_generation", 0),
+                             c.get("chunk_hash"), c.get("chunk_duplicate_of"), c.get("vector"))
+                            for c in chunks_data[i:i+batch_size]
+                        ),
+                    )
+        return len(chunks_data)
 
     async def delete_chunks_by_project_id(self, project_id: int):
+        if self.db_client is not None:
+            status = await self.db_client.execute(f"DELETE FROM {self.table_name} WHERE chunk_project_id = $1", project_id)
+            # status is "DELETE <count>"
+            return int(status.split()[-1])
+
         res = self.supabase.table(self.table_name).delete().eq("chunk_project_id", project_id).execute()
         return len(res.data) if res.data else 0
     
-    async def get_project_chunks(self, project_id: int, page_no: int=1, page_size: int=5):
+    async def get_max_asset_chunk_id(self, project_id: int, asset_id: int):
+        # chunk_id is a serial, so everything inserted afterwards has a larger id
+        if self.db_client is not None:
+            return await self.db_client.fetchval(
+                f"SELECT MAX(chunk_id) FROM {self.table_name} WHERE chunk_project_id = $1 AND chunk_asset_id = $2",
+                project_id, asset_id
+            )
+
+        res = self.supabase.table(self.table_name).select("chunk_id").eq("chunk_project_id", project_id) \
+            .eq("chunk_asset_id", asset_id).order("chunk_id", desc=True).limit(1).execute()
+        return res.data[0]["chunk_id"] if res.data else None
+
+    async def get_asset_chunk_ids(self, project_id: int, asset_id: int, max_chunk_id: int = None, page_size: int = 1000):
+        if self.db_client is not None:
+            rows = await self.db_client.fetch(
+                f"""SELECT chunk_id FROM {self.table_name}
+                    WHERE chunk_project_id = $1 AND chunk_asset_id = $2 AND ($3::int IS NULL OR chunk_id <= $3)""",
+                project_id, asset_id, max_chunk_id
+            )
+            return [row["chunk_id"] for row in rows]
+
+        chunk_ids, offset = [], 0
+        while True:
+            query = self.supabase.table(self.table_name).select("chunk_id") \
+                .eq("chunk_project_id", project_id).eq("chunk_asset_id", asset_id)
+            if max_chunk_id is not None:
+                query = query.lte("chunk_id", max_chunk_id)
+            res = query.order("chunk_id").range(offset, offset + page_size - 1).execute()
+            chunk_ids.extend(item["chunk_id"] for item in res.data)
+            if len(res.data) < page_size:
+                return chunk_ids
+            offset += page_size
+
+    async def get_asset_chunks_after(self, project_id: int, asset_id: int, after_chunk_id: int = 0,
+                                     page_size: int = 1000):
+        # One asset's chunks newer than after_chunk_id, with the columns indexing reads
+        if self.db_client is not None:
+            return await self.fetch_all(
+                f"""SELECT {", ".join(self.index_columns)} FROM {self.table_name}
+                    WHERE chunk_project_id = $1 AND chunk_asset_id = $2 AND chunk_id > $3
+                    ORDER BY chunk_id""",
+                project_id, asset_id, after_chunk_id
+            )
+
+        chunks = []
+        while True:
+            res = self.supabase.table(self.table_name).select(*self.index_columns) \
+                .eq("chunk_project_id", project_id).eq("chunk_asset_id", asset_id).gt("chunk_id", after_chunk_id) \
+                .order("chunk_id").limit(page_size).execute()
+            chunks.extend(res.data)
+            if len(res.data) < page_size:
+                return chunks
+            after_chunk_id = res.data[-1]["chunk_id"]
+
+    async def delete_chunks_by_asset_id(self, project_id: int, asset_id: int, max_chunk_id: int = None,
+                                        generation: int = None):
+        # max_chunk_id limits the delete to chunks that existed before a reprocess started
+        if self.db_client is not None:
+            status = await self.db_client.execute(
+                f"""DELETE FROM {self.table_name}
+                    WHERE chunk_project_id = $1 AND chunk_asset_id = $2 AND ($3::int IS NULL OR chunk_id <= $3)
+                      AND ($4::int IS NULL OR chunk_generation = $4)""",
+                project_id, asset_id, max_chunk_id, generation
+            )
+            return int(status.split()[-1])
+
+        query = self.supabase.table(self.table_name).delete(returning="minimal", count="exact") \
+            .eq("chunk_project_id", project_id).eq("chunk_asset_id", asset_id)
+        if max_chunk_id is not None:
+            query = query.lte("chunk_id", max_chunk_id)
+        if generation is not None:
+            query = query.eq("chunk_generation", generation)
+        res = query.execute()
+        return res.count or 0
+
+    async def get_canonical_hashes(self, project_id: int, generation: int, hashes: list,
+                                   exclude_asset_id: int = None, batch_size: int = 100):
+        # Which of `hashes` already belong to a stored canonical chunk of the project
+        if not hashes:
+            return set()
+
+        if self.db_client is not None:
+            rows = await self.db_client.fetch(
+                f"""SELECT DISTINCT chunk_hash FROM {self.table_name}
+                    WHERE chunk_project_id = $1 AND chunk_generation = $2 AND chunk_hash = ANY($3::text[])
+                      AND chunk_duplicate_of IS NULL AND ($4::int IS NULL OR chunk_asset_id <> $4)""",
+                project_id, generation, hashes, exclude_asset_id
+            )
+            return {row["chunk_hash"] for row in rows}
+
+        found = set()
+        for i in range(0, len(hashes), batch_size):
+            query = self.supabase.table(self.table_name).select("chunk_hash") \
+                .eq("chunk_project_id", project_id).eq("chunk_generation", generation) \
+                .in_("chunk_hash", hashes[i:i+batch_size]).is_("chunk_duplicate_of", "null")
+            if exclude_asset_id is not None:
+                query = query.neq("chunk_asset_id", exclude_asset_id)
+            res = query.execute()
+            found.update(item["chunk_hash"] for item in res.data)
+        return found
+
+    async def promote_orphaned_duplicates(self, project_id: int):
+        # Returns the duplicates that became canonical because their canonical chunk was deleted
+        if self.db_client is not None:
+            return await self.fetch_all("SELECT * FROM promote_orphaned_duplicates($1)", project_id)
+
+        res = self.supabase.rpc("promote_orphaned_duplicates", {"p_project_id": project_id}).execute()
+        return res.data or []
+
+    async def delete_chunks_outside_generation(self, project_id: int, generation: int):
+        # Garbage-collects superseded (or abandoned) index generations
+        if self.db_client is not None:
+            status = await self.db_client.execute(
+                f"DELETE FROM {self.table_name} WHERE chunk_project_id = $1 AND chunk_generation <> $2",
+                project_id, generation
+            )
+            return int(status.split()[-1])
+
+        res = self.supabase.table(self.table_name).delete(returning="minimal", count="exact") \
+            .eq("chunk_project_id", project_id).neq("chunk_generation", generation).execute()
+        return res.count or 0
+
+    async def copy_chunks_to_generation(self, project_id: int, generation: int):
+        # Server-side copy of the active generation's chunks, without vectors
+        if self.db_client is not None:
+            return await self.db_client.fetchval("SELECT copy_chunks_to_generation($1, $2)", project_id, generation)
+
+        res = self.supabase.rpc("copy_chunks_to_generation", {
+            "p_project_id": project_id,
+            "p_generation": generation,
+        }).execute()
+        return res.data or 0
+
+    async def get_project_chunks(self, project_id: int, page_no: int=1, page_size: int=5, generation: int=None):
         offset = (page_no - 1) * page_size
-        res = self.supabase.table(self.table_name).select("*").eq("chunk_project_id", project_id).range(offset, offset + page_size - 1).execute()
+        if self.db_client is not None:
+            if generation is not None:
+                return await self.fetch_all(
+                    f"""SELECT * FROM {self.table_name} WHERE chunk_project_id = $1 AND chunk_generation = $2
+                        ORDER BY chunk_id LIMIT $3 OFFSET $4""",
+                    project_id, generation, page_size, offset
+                )
+            return await self.fetch_all(
+                f"SELECT * FROM {self.table_name} WHERE chunk_project_id = $1 ORDER BY chunk_id LIMIT $2 OFFSET $3",
+                project_id, page_size, offset
+            )
+
+        query = self.supabase.table(self.table_name).select("*").eq("chunk_project_id", project_id)
+        if generation is not None:
+            query = query.eq("chunk_generation", generation)
+        res = query.order("chunk_id").range(offset, offset + page_size - 1).execute()
         return res.data
 
-    async def get_total_chunks_coumt(self, project_id: int):
-        res = self.supabase.table(self.table_name).select("*", count="exact").eq("chunk_project_id", project_id).execute()
-        return res.count if res.count is not None else 0
+    async def get_chunks_after(self, project_id: int, generation: int, after_chunk_id: int = 0, page_size: int = 100):
+        # Keyset pagination: resumable from any checkpointed chunk_id and stable while vectors are written.
+        # Only the columns indexing reads: never the (possibly stale) vectors
+        if self.db_client is not None:
+            return await self.fetch_all(
+                f"""SELECT {", ".join(self.index_columns)} FROM {self.table_name}
+                    WHERE chunk_project_id = $1 AND chunk_generation = $2 AND chunk_id > $3
+                    ORDER BY chunk_id LIMIT $4""",
+                project_id, generation, after_chunk_id, page_size
+            )
 
+        res = self.supabase.table(self.table_name).select(*self.index_columns).eq("chunk_project_id", project_id) \
+            .eq("chunk_generation", generation).gt("chunk_id", after_chunk_id) \
+            .order("chunk_id").limit(page_size).execute()
+        return res.data
+
+    async def get_total_chunks_coumt(self, project_id: int, generation: int=None, after_chunk_id: int=0,
+                                     estimated: bool=False):
+        # estimated=True returns the planner's estimate instead of scanning (fine for progress totals)
+        if self.db_client is not None:
+            if generation is not None:
+                query = f"""SELECT COUNT(*) FROM {self.table_name}
+                            WHERE chunk_project_id = $1 AND chunk_generation = $2 AND chunk_id > $3"""
+                args = (project_id, generation, after_chunk_id)
+            else:
+                query = f"SELECT COUNT(*) FROM {self.table_name} WHERE chunk_project_id = $1"
+                args = (project_id,)
+            if estimated:
+                return await self.estimate_count(query.replace("COUNT(*)", "1", 1), *args)
+            return await self.db_client.fetchval(query, *args)
 
+        # head=True: only the count comes back, no rows (and no vectors)
+        query = self.supabase.table(self.table_name).select("chunk_id", count="estimated" if estimated else "exact", head=True) \
+            .eq("chunk_project_id", project_id)
+        if generation is not None:
+            query = query.eq("chunk_generation", generation).gt("chunk_id", after_chunk_id)
+        res = query.execute()
+        return res.count if res.count is not None else 0
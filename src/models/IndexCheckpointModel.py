@@ -0,0 +1,72 @@
+from .BaseDataModel import BaseDataModel
+from datetime import datetime, timezone
+from .enums.DataBaseEnum import DataBaseEnum
+
+class IndexCheckpointModel(BaseDataModel):
+
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
+        self.table_name = DataBaseEnum.COLLECTION_INDEX_CHECKPOINTS.value
+
+    async def get_checkpoint(self, project_id: int, generation: int, stage: str):
+        # Returns the last indexed chunk_id, or None when there is no checkpoint
+        if self.db_client is not None:
+            return await self.db_client.fetchval(
+                f"""SELECT last_chunk_id FROM {self.table_name}
+                    WHERE checkpoint_project_id = $1 AND checkpoint_generation = $2 AND checkpoint_stage = $3""",
+                project_id, generation, stage
+            )
+
+        res = self.supabase.table(self.table_name).select("last_chunk_id") \
+            .eq("checkpoint_project_id", project_id).eq("checkpoint_generation", generation) \
+            .eq("checkpoint_stage", stage).execute()
+        if res.data:
+            return res.data[0]["last_chunk_id"]
+        return None
+
+    async def save_checkpoint(self, project_id: int, generation: int, stage: str, last_chunk_id: int = 0):
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"""INSERT INTO {self.table_name} (checkpoint_project_id, checkpoint_generation, checkpoint_stage, last_chunk_id)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (checkpoint_project_id, checkpoint_generation, checkpoint_stage)
+                    DO UPDATE SET last_chunk_id = EXCLUDED.last_chunk_id, updated_at = NOW()""",
+                project_id, generation, stage, last_chunk_id
+            )
+            return True
+
+        self.supabase.table(self.table_name).upsert({
+            "checkpoint_project_id": project_id,
+            "checkpoint_generation": generation,
+            "checkpoint_stage": stage,
+            "last_chunk_id": last_chunk_id,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }, returning="minimal").execute()
+        return True
+
+    async def delete_checkpoint(self, project_id: int, generation: int, stage: str):
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"""DELETE FROM {self.table_name}
+                    WHERE checkpoint_project_id = $1 AND checkpoint_generation = $2 AND checkpoint_stage = $3""",
+                project_id, generation, stage
+            )
+            return True
+
+        self.supabase.table(self.table_name).delete(returning="minimal") \
+            .eq("checkpoint_project_id", project_id).eq("checkpoint_generation", generation) \
+            .eq("checkpoint_stage", stage).execute()
+        return True
+
+    async def delete_checkpoints_outside_generation(self, project_id: int, generation: int):
+        # Checkpoints of superseded generations are meaningless once a generation is promoted
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"DELETE FROM {self.table_name} WHERE checkpoint_project_id = $1 AND checkpoint_generation <> $2",
+                project_id, generation
+            )
+            return True
+
+        self.supabase.table(self.table_name).delete(returning="minimal") \
+            .eq("checkpoint_project_id", project_id).neq("checkpoint_generation", generation).execute()
+        return True
@@ -1,43 +1,170 @@
 from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
+import time
 
 class ProjectModel(BaseDataModel):
-    def __init__(self):
-        super().__init__()
+    # Process-wide project cache: project_id -> (expires_at, record, or None for a project known to be missing).
+    # Changes made through this class invalidate it; changes from other workers (a generation swap,
+    # a deleted project) show up within PROJECT_CACHE_TTL.
+    _cache = {}
+
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
         self.table_name = DataBaseEnum.COLLECTION_PROJECTS.value
 
+    @property
+    def cache_enabled(self) -> bool:
+        # Stores outside the chunks table name collections by generation and drop the old collection
+        # on a swap, so a stale project_active_generation would point other workers at a deleted one
+        # (VectorDBEnums values; the stores package imports the models, so not imported here)
+        return self.settings.VECTOR_DB_BACKEND in ("SUPABASE", "PGVECTOR")
+
+    def _cache_get(self, project_id: int):
+        # Returns (hit, record); records are copied because callers update their project dicts
+        if not self.cache_enabled:
+            return False, None
+        entry = ProjectModel._cache.get(project_id)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, dict(entry[1]) if entry[1] is not None else None
+
+    def _cache_set(self, project_id: int, project: dict):
+        ttl = self.settings.PROJECT_CACHE_TTL if project is not None else self.settings.PROJECT_CACHE_NEGATIVE_TTL
+        if ttl <= 0 or not self.cache_enabled:
+            return
+        if len(ProjectModel._cache) >= self.settings.PROJECT_CACHE_MAX_SIZE:
+            now = time.monotonic()
+            for key in [key for key, entry in ProjectModel._cache.items() if entry[0] < now]:
+                del ProjectModel._cache[key]
+            # still full: drop the oldest entries (dicts keep insertion order)
+            while len(ProjectModel._cache) >= self.settings.PROJECT_CACHE_MAX_SIZE:
+                del ProjectModel._cache[next(iter(ProjectModel._cache))]
+        ProjectModel._cache.pop(project_id, None)
+        ProjectModel._cache[project_id] = (time.monotonic() + ttl, dict(project) if project is not None else None)
+
     @classmethod
-    async def create_instance(cls, db_client: object = None):
-        # db_client is no longer needed but kept for signature compatibility if used elsewhere
-        instance = cls()
-        return instance
+    def invalidate(cls, project_id: int):
+        cls._cache.pop(project_id, None)
 
     async def create_project(self, project_id: int):
-        data = {
-            "project_id": project_id
-        }
-        res = self.supabase.table(self.table_name).insert(data).execute()
-        if res.data:
-            return res.data[0]
-        return None
+        if self.db_client is not None:
+            project = await self.fetch_one(
+                f"INSERT INTO {self.table_name} (project_id) VALUES ($1) RETURNING *",
+                project_id
+            )
+        else:
+            data = {
+                "project_id": project_id
+            }
+            res = self.supabase.table(self.table_name).insert(data).execute()
+            project = res.data[0] if res.data else None
+
+        if project:
+            self._cache_set(project_id, project)
+        return project
+
+    async def get_project(self, project_id: int):
+        # None when the project doesn't exist (cached briefly too)
+        hit, project = self._cache_get(project_id)
+        if hit:
+            return project
+
+        if self.db_client is not None:
+            project = await self.fetch_one(f"SELECT * FROM {self.table_name} WHERE project_id = $1", project_id)
+        else:
+            res = self.supabase.table(self.table_name).select("*").eq("project_id", project_id).execute()
+            project = res.data[0] if res.data else None
+
+        self._cache_set(project_id, project)
+        return dict(project) if project else None
 
     async def get_project_or_create_one(self, project_id: int):
+        hit, project = self._cache_get(project_id)
+        if hit and project is not None:
+            return project
+
+        if self.db_client is not None:
+            # One round trip: insert if missing, otherwise read the existing row
+            project = await self.fetch_one(
+                f"""WITH inserted AS (
+                        INSERT INTO {self.table_name} (project_id) VALUES ($1)
+                        ON CONFLICT (project_id) DO NOTHING RETURNING *
+                    )
+                    SELECT * FROM inserted
+                    UNION ALL
+                    SELECT * FROM {self.table_name} WHERE project_id = $1
+                    LIMIT 1""",
+                project_id
+            )
+            self._cache_set(project_id, project)
+            return dict(project) if project else None
+
         res = self.supabase.table(self.table_name).select("*").eq("project_id", project_id).execute()
         if res.data:
+            self._cache_set(project_id, res.data[0])
             return res.data[0]
         
         return await self.create_project(project_id=project_id)
 
+    async def delete_project(self, project_id: int):
+        # Assets, chunks and the rest cascade
+        if self.db_client is not None:
+            status = await self.db_client.execute(f"DELETE FROM {self.table_name} WHERE project_id = $1", project_id)
+            deleted = status.split()[-1] != "0"
+        else:
+            res = self.supabase.table(self.table_name).delete().eq("project_id", project_id).execute()
+            deleted = bool(res.data)
+
+        self.invalidate(project_id)
+        return deleted
+
     async def get_all_projects(self, page: int=1, page_size: int=10):
         # Get count
-        count_res = self.supabase.table(self.table_name).select("*", count="exact").execute()
-        total_documents = count_res.count if count_res.count is not None else 0
+        if self.db_client is not None:
+            total_documents = await self.db_client.fetchval(f"SELECT COUNT(*) FROM {self.table_name}")
+        else:
+            count_res = self.supabase.table(self.table_name).select("project_id", count="exact", head=True).execute()
+            total_documents = count_res.count if count_res.count is not None else 0
 
         total_pages = total_documents // page_size
         if total_documents % page_size > 0:
             total_pages += 1
 
         offset = (page - 1) * page_size
+        if self.db_client is not None:
+            projects = await self.fetch_all(
+                f"SELECT * FROM {self.table_name} ORDER BY project_id LIMIT $1 OFFSET $2",
+                page_size, offset
+            )
+            return projects, total_pages
+
         projects_res = self.supabase.table(self.table_name).select("*").range(offset, offset + page_size - 1).execute()
         
         return projects_res.data, total_pages
+
+    async def begin_index_generation(self, project_id: int):
+        # Reserves the next index generation number for a rebuild
+        if self.db_client is not None:
+            generation = await self.db_client.fetchval("SELECT begin_index_generation($1)", project_id)
+        else:
+            generation = self.supabase.rpc("begin_index_generation", {"p_project_id": project_id}).execute().data
+
+        self.invalidate(project_id)
+        return generation
+
+    async def promote_index_generation(self, project_id: int, generation: int, index_model: str = None):
+        # Atomically makes `generation` the active one; returns the previous active
+        # generation, or None if another rebuild has superseded this one
+        if self.db_client is not None:
+            previous_generation = await self.db_client.fetchval(
+                "SELECT promote_index_generation($1, $2, $3)", project_id, generation, index_model
+            )
+        else:
+            previous_generation = self.supabase.rpc("promote_index_generation", {
+                "p_project_id": project_id,
+                "p_generation": generation,
+                "p_index_model": index_model,
+            }).execute().data
+
+        self.invalidate(project_id)
+        return previous_generation
@@ -0,0 +1,70 @@
+from .BaseDataModel import BaseDataModel
+from datetime import datetime, timezone
+from .enums.DataBaseEnum import DataBaseEnum
+
+class ProjectStatsModel(BaseDataModel):
+    """
+    Reads the per-(project, generation) counters that triggers on chunks keep current.
+    Nothing here scans the chunks table except refresh_stats.
+    """
+
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
+        self.table_name = DataBaseEnum.COLLECTION_PROJECT_STATS.value
+        self.active_view_name = DataBaseEnum.COLLECTION_ACTIVE_PROJECT_STATS.value
+
+    async def get_stats(self, project_id: int, generation: int = None):
+        # The given generation, or the project's active one; None when it has no chunks
+        if self.db_client is not None:
+            if generation is None:
+                return await self.fetch_one(
+                    f"SELECT * FROM {self.active_view_name} WHERE stats_project_id = $1", project_id
+                )
+            return await self.fetch_one(
+                f"SELECT * FROM {self.table_name} WHERE stats_project_id = $1 AND stats_generation = $2",
+                project_id, generation
+            )
+
+        if generation is None:
+            query = self.supabase.table(self.active_view_name).select("*").eq("stats_project_id", project_id)
+        else:
+            query = self.supabase.table(self.table_name).select("*").eq("stats_project_id", project_id) \
+                .eq("stats_generation", generation)
+        res = query.execute()
+        if res.data:
+            return res.data[0]
+        return None
+
+    async def get_project_ids_with_chunks(self):
+        if self.db_client is not None:
+            rows = await self.fetch_all(
+                f"SELECT stats_project_id FROM {self.active_view_name} WHERE chunk_count > 0"
+            )
+        else:
+            rows = self.supabase.table(self.active_view_name).select("stats_project_id").gt("chunk_count", 0).execute().data
+        return sorted({row["stats_project_id"] for row in rows or []})
+
+    async def set_embedding_model(self, project_id: int, generation: int, embedding_model: str):
+        # Counters come from triggers; the model that wrote the vectors is only known to the index path
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"""UPDATE {self.table_name} SET embedding_model = $3, updated_at = NOW()
+                    WHERE stats_project_id = $1 AND stats_generation = $2""",
+                project_id, generation, embedding_model
+            )
+            return True
+
+        self.supabase.table(self.table_name).update({
+            "embedding_model": embedding_model,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }, returning="minimal").eq("stats_project_id", project_id).eq("stats_generation", generation).execute()
+        return True
+
+    async def refresh_stats(self, project_id: int):
+        # Recounts from chunks: for repairs, not for the request path
+        if self.db_client is not None:
+            await self.db_client.execute("SELECT refresh_project_stats($1)", project_id)
+            return True
+
+        self.supabase.rpc("refresh_project_stats", {"p_project_id": project_id}).execute()
+        return True
@@ -0,0 +1,61 @@
+from .BaseDataModel import BaseDataModel
+from datetime import datetime, timezone
+from .enums.DataBaseEnum import DataBaseEnum
+
+class StorageBucketModel(BaseDataModel):
+
+    def __init__(self, db_client: object = None):
+        super().__init__(db_client=db_client)
+        self.table_name = DataBaseEnum.COLLECTION_STORAGE_BUCKETS.value
+
+    async def get_active_bucket(self):
+        # The bucket with the highest index, or None when the ledger is empty
+        if self.db_client is not None:
+            return await self.fetch_one(
+                f"SELECT * FROM {self.table_name} ORDER BY bucket_index DESC LIMIT 1"
+            )
+
+        res = self.supabase.table(self.table_name).select("*").order("bucket_index", desc=True).limit(1).execute()
+        if res.data:
+            return res.data[0]
+        return None
+
+    async def record_usage(self, bucket_name: str, bucket_index: int, size_delta: int = 0, file_delta: int = 0) -> int:
+        # Atomic increment (negative deltas on delete); returns the bucket's new size
+        if self.db_client is not None:
+            return await self.db_client.fetchval(
+                "SELECT record_bucket_usage($1, $2, $3, $4)",
+                bucket_name, bucket_index, size_delta, file_delta
+            )
+
+        res = self.supabase.rpc("record_bucket_usage", {
+            "p_bucket_name": bucket_name,
+            "p_bucket_index": bucket_index,
+            "p_size_delta": size_delta,
+            "p_file_delta": file_delta,
+        }).execute()
+        return res.data
+
+    async def set_usage(self, bucket_name: str, bucket_index: int, bucket_size: int, file_count: int):
+        # Overwrites the running totals with a recount from storage
+        if self.db_client is not None:
+            await self.db_client.execute(
+                f"""INSERT INTO {self.table_name} (bucket_name, bucket_index, bucket_size, bucket_file_count, reconciled_at)
+                    VALUES ($1, $2, $3, $4, NOW())
+                    ON CONFLICT (bucket_name) DO UPDATE
+                    SET bucket_size = EXCLUDED.bucket_size, bucket_file_count = EXCLUDED.bucket_file_count,
+                        reconciled_at = NOW(), updated_at = NOW()""",
+                bucket_name, bucket_index, bucket_size, file_count
+            )
+            return True
+
+        now = datetime.now(timezone.utc).isoformat()
+        self.supabase.table(self.table_name).upsert({
+            "bucket_name": bucket_name,
+            "bucket_index": bucket_index,
+            "bucket_size": bucket_size,
+            "bucket_file_count": file_count,
+            "reconciled_at": now,
+            "updated_at": now,
+        }, returning="minimal").execute()
+        return True
@@ -1,5 +1,9 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class RetrievedDocument(BaseModel):
     text: str
     score: float
+    chunk_id: Optional[int] = None
+    chunk_asset_id: Optional[int] = None
+    chunk_order: Optional[int] = None
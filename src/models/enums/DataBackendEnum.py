@@ -0,0 +1,5 @@
+from enum import Enum
+
+class DataBackendEnum(Enum):
+    SUPABASE = "SUPABASE"
+    POSTGRES = "POSTGRES"
@@ -4,6 +4,10 @@ class DataBaseEnum(Enum):
     COLLECTION_PROJECTS = "projects"
     COLLECTION_CHUNKS = "chunks"
     COLLECTION_ASSETS = "assets"
+    COLLECTION_INDEX_CHECKPOINTS = "index_checkpoints"
+    COLLECTION_STORAGE_BUCKETS = "storage_buckets"
+    COLLECTION_PROJECT_STATS = "project_stats"
+    COLLECTION_ACTIVE_PROJECT_STATS = "active_project_stats"
     
 
     
\ No newline at end of file
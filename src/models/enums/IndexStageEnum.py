@@ -0,0 +1,6 @@
+from enum import Enum
+
+class IndexStageEnum(Enum):
+    PUSH = "push"
+    REBUILD = "rebuild"
+    PROCESS = "process"
@@ -17,5 +17,12 @@ class ResponseStatus(Enum):
     VECTORDB_SEARCH_SUCCESS = "vectordb_search_success"
     RAG_ANSWER_ERROR = "rag_answer_error"
     RAG_ANSWER_SUCCESS = "rag_answer_success"
+    INDEX_REBUILD_STARTED = "index_rebuild_started"
+    ASSET_CHUNKS_DELETED = "asset_chunks_deleted"
+    PROJECT_DELETED = "project_deleted"
+    FILES_BATCH_UPLOADED = "files_batch_uploaded"
+    FILES_BATCH_TOO_LARGE = "files_batch_too_large"
+    UPLOAD_URL_CREATED = "upload_url_created"
+    UPLOAD_VERIFICATION_FAILED = "upload_verification_failed"
     
     
\ No newline at end of file
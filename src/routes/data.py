@@ -1,13 +1,14 @@
 from fastapi import APIRouter, FastAPI, Depends, UploadFile, status, Request, File
 from fastapi.responses import JSONResponse
-from typing import Annotated
+from typing import Annotated, List
+import asyncio
 import os
 from helpers.config import get_settings, Settings
 from controllers import DataController, ProjectController
 import aiofiles
 from models.enums.ResponseEnums import ResponseStatus
 import logging
-from .schemas.data import ProcessRequest
+from .schemas.data import ProcessRequest, SignedUploadRequest, ConfirmUploadRequest
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -58,12 +59,13 @@ async def upload_data(request: Request, project_id: int, file: UploadFile = File
     file_path, file_id = data_controller.generate_unique_file_path(original_file_name=file.filename, project_id=str(project_id))
     
     try:
-        file_content = await file.read()
+        # streamed from the spooled upload in chunks, never read into memory whole
         storage_manager = SupabaseStorageManager()
-        upload_result = await storage_manager.upload_file(
-            file=file_content,
+        upload_result = await storage_manager.upload_stream(
+            file=file.file,
             file_name=file_id,
-            content_type=file.content_type
+            content_type=file.content_type,
+            file_size=data_controller.get_file_size(file)
         )
     except Exception as e:
         logger.error(f"Error uploading file to Supabase: {e}")
@@ -76,8 +78,8 @@ async def upload_data(request: Request, project_id: int, file: UploadFile = File
       asset_project_id = project["project_id"],
       asset_type = AssetTypeEnum.FILE.value,
       asset_name = file_id,
-      asset_size = 0, # Cannot easily get size from stream without reading, set to 0 or use file.size if available (often not for stream)
-      asset_config = {"bucket": upload_result["bucket"]}
+      asset_size = upload_result["size"],
+      asset_config = {"bucket": upload_result["bucket"], "sha256": upload_result["sha256"]}
     )
 
     return JSONResponse(content={
@@ -85,6 +87,171 @@ async def upload_data(request: Request, project_id: int, file: UploadFile = File
       "file_id": asset_record["asset_name"]
     })
 
+@data_router.post("/upload/batch/{project_id}")
+async def upload_data_batch(request: Request, project_id: int, files: List[UploadFile] = File(...), app_settings: Settings = Depends(get_settings)):
+    if len(files) > app_settings.FILE_MAX_BATCH_COUNT:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={
+            "signal": ResponseStatus.FILES_BATCH_TOO_LARGE.value,
+            "message": f"At most {app_settings.FILE_MAX_BATCH_COUNT} files per request."
+        })
+
+    project_model = await ProjectModel.create_instance()
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    data_controller = DataController()
+    storage_manager = SupabaseStorageManager()
+    upload_slots = asyncio.Semaphore(app_settings.STORAGE_UPLOAD_CONCURRENCY)
+
+    # Validate everything up front; invalid files are reported and skipped
+    results = []
+    for file in files:
+        is_valid, result_signal = data_controller.validate_file(file=file)
+        results.append({"file_name": file.filename, "signal": result_signal if not is_valid else None})
+
+    async def upload_one(file: UploadFile, result: dict):
+        _, file_id = data_controller.generate_unique_file_path(original_file_name=file.filename, project_id=str(project_id))
+        async with upload_slots:
+            try:
+                result["upload"] = await storage_manager.upload_stream(
+                    file=file.file,
+                    file_name=file_id,
+                    content_type=file.content_type,
+                    file_size=data_controller.get_file_size(file)
+                )
+            except Exception as e:
+                logger.error(f"Error uploading {file.filename} to Supabase: {e}")
+                result["signal"] = ResponseStatus.FILE_UPLOADED_FAILED.value
+                result["message"] = str(e)
+
+    await asyncio.gather(*[
+        upload_one(file, result) for file, result in zip(files, results) if result["signal"] is None
+    ])
+
+    uploaded = [result for result in results if "upload" in result]
+    asset_model = await AssetModel.create_instance()
+    try:
+        asset_records = await asset_model.create_assets([
+            {
+                "asset_project_id": project["project_id"],
+                "asset_type": AssetTypeEnum.FILE.value,
+                "asset_name": result["upload"]["path"],
+                "asset_size": result["upload"]["size"],
+                "asset_config": {"bucket": result["upload"]["bucket"], "sha256": result["upload"]["sha256"]},
+            }
+            for result in uploaded
+        ])
+    except Exception as e:
+        logger.error(f"Error registering {len(uploaded)} uploaded files: {e}")
+        asset_records = []
+        for result in uploaded:
+            result["message"] = str(e)
+
+    async def remove_unregistered(upload: dict):
+        # Stored but without an asset row: remove it so it neither lingers nor stays counted in the bucket ledger
+        async with upload_slots:
+            try:
+                await storage_manager.delete_file(upload["bucket"], upload["path"], upload["size"])
+            except Exception as e:
+                logger.error(f"Error removing unregistered upload {upload['path']} from {upload['bucket']}: {e}")
+
+    asset_names = {record["asset_name"] for record in asset_records}
+    unregistered = []
+    for result in uploaded:
+        upload = result.pop("upload")
+        if upload["path"] in asset_names:
+            result["signal"] = ResponseStatus.FILE_UPLOADED_SUCCESSFULLY.value
+            result["file_id"] = upload["path"]
+        else:
+            result["signal"] = ResponseStatus.FILE_UPLOADED_FAILED.value
+            unregistered.append(upload)
+
+    await asyncio.gather(*[remove_unregistered(upload) for upload in unregistered])
+
+    return JSONResponse(content={
+        "signal": ResponseStatus.FILES_BATCH_UPLOADED.value,
+        "uploaded_files": len(asset_names),
+        "failed_files": len(results) - len(asset_names),
+        "files": results
+    })
+
+@data_router.post("/upload/sign/{project_id}")
+async def create_signed_upload(request: Request, project_id: int, upload_request: SignedUploadRequest):
+    # Step 1 of a direct upload: the client PUTs the bytes to upload_url, then calls /upload/confirm
+    data_controller = DataController()
+    is_valid, result_signal = data_controller.validate_file_metadata(content_type=upload_request.content_type,
+                                                                     file_size=upload_request.file_size)
+    if not is_valid:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": result_signal, "message": "File validation failed."})
+
+    project_model = await ProjectModel.create_instance()
+    await project_model.get_project_or_create_one(project_id=project_id)
+
+    _, file_id = data_controller.generate_unique_file_path(original_file_name=upload_request.file_name, project_id=str(project_id))
+    try:
+        signed_upload = await SupabaseStorageManager().create_signed_upload(file_name=file_id, file_size=upload_request.file_size)
+    except Exception as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.FILE_UPLOADED_FAILED.value, "message": str(e)})
+
+    upload_ticket = data_controller.create_upload_ticket(project_id=project_id, bucket=signed_upload["bucket"], file_id=file_id,
+                                                         file_size=upload_request.file_size, md5=upload_request.md5)
+
+    return JSONResponse(content={
+        "signal": ResponseStatus.UPLOAD_URL_CREATED.value,
+        "file_id": file_id,
+        "bucket": signed_upload["bucket"],
+        "upload_url": signed_upload["upload_url"],
+        "token": signed_upload["token"],
+        "upload_ticket": upload_ticket,
+    })
+
+@data_router.post("/upload/confirm/{project_id}")
+async def confirm_signed_upload(request: Request, project_id: int, confirm_request: ConfirmUploadRequest):
+    # Step 2: verify what landed in storage and register it as an asset.
+    # Only the upload this project's sign step issued is confirmed (or deleted on a mismatch)
+    upload = DataController().read_upload_ticket(confirm_request.upload_ticket, project_id=project_id)
+    storage_manager = SupabaseStorageManager()
+    if upload is None or not storage_manager.is_upload_bucket(upload["bucket"]):
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.UPLOAD_VERIFICATION_FAILED.value, "message": "Invalid or expired upload ticket."})
+
+    project_model = await ProjectModel.create_instance()
+    project = await project_model.get_project(project_id=project_id)
+    if project is None:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value})
+
+    asset_model = await AssetModel.create_instance()
+    existing_asset = await asset_model.get_asset_by_name(asset_name=upload["file_id"])
+    if existing_asset is not None:
+        if existing_asset["asset_project_id"] == project["project_id"]:
+            return JSONResponse(content={"signal": ResponseStatus.FILE_UPLOADED_SUCCESSFULLY.value, "file_id": upload["file_id"]})
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.UPLOAD_VERIFICATION_FAILED.value, "message": "File belongs to another project."})
+
+    try:
+        verification = await storage_manager.confirm_signed_upload(
+            bucket_name=upload["bucket"],
+            file_path=upload["file_id"],
+            file_size=upload["file_size"],
+            md5=upload["md5"]
+        )
+    except Exception as e:
+        logger.error(f"Error verifying direct upload {upload['file_id']}: {e}")
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.UPLOAD_VERIFICATION_FAILED.value, "message": str(e)})
+
+    if not verification["verified"]:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.UPLOAD_VERIFICATION_FAILED.value, "message": verification["reason"]})
+
+    asset_record = await asset_model.create_asset(
+      asset_project_id = project["project_id"],
+      asset_type = AssetTypeEnum.FILE.value,
+      asset_name = upload["file_id"],
+      asset_size = verification["size"],
+      asset_config = {"bucket": upload["bucket"], "md5": verification["md5"]}
+    )
+
+    return JSONResponse(content={
+      "signal": ResponseStatus.FILE_UPLOADED_SUCCESSFULLY.value,
+      "file_id": asset_record["asset_name"]
+    })
+
 @data_router.post("/process/{project_id}")
 async def process_endpoint(request: Request, project_id: int, process_request: ProcessRequest, app_settings: Settings = Depends(get_settings)):  
     chunk_size = process_request.chunk_size
@@ -108,10 +275,10 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
       asset_record = await asset_model.get_asset_record(asset_project_id=project["project_id"], asset_name=process_request.file_id)
       if asset_record is None:
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.FILE_ID_ERROR.value, "message": "File not found with this id."})
-      project_file_ids = {asset_record["asset_id"]:asset_record["asset_name"]}
+      project_files = [asset_record]
     else:
         project_files = await asset_model.get_all_project_assets(asset_project_id=project["project_id"], asset_type=AssetTypeEnum.FILE.value)
-        project_file_ids = {record["asset_id"]:record["asset_name"] for record in project_files}
+    project_file_ids = {record["asset_id"]:record["asset_name"] for record in project_files}
 
     if len(project_file_ids) == 0:
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.FILE_NOT_FOUND.value, "message": "File not found."})
@@ -119,6 +286,11 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
     logger.info(f"Processing {len(project_file_ids)} files in project: {project_id}")
     
     process_controller = ProcessController(project_id=str(project_id))
+
+    # With a file_id, a reset only replaces that asset's chunks
+    replace_assets = bool(process_request.file_id) and do_reset == 1
+    if replace_assets:
+        do_reset = 0
     
     # Delegating logic to NLPController
     num_records, num_files = await nlp_controller.process_project_files(
@@ -127,7 +299,66 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
         do_reset=do_reset,
         chunk_size=chunk_size,
         overlap_size=overlap_size,
-        process_controller=process_controller
+        process_controller=process_controller,
+        replace_assets=replace_assets,
+        # already loaded above: no per-file lookups
+        asset_records={record["asset_id"]: record for record in project_files},
     )
           
-    return JSONResponse(content={"signal": ResponseStatus.FILE_PROCESSED_SUCCESSFULLY.value, "inserted_chunks": num_records, "processed_files": num_files})
+    return JSONResponse(content={"signal": ResponseStatus.FILE_PROCESSED_SUCCESSFULLY.value, "inserted_chunks": num_records, "processed_files": num_files,
+                                 "deduplication": nlp_controller.dedup_report})
+
+@data_router.delete("/chunks/{project_id}/{file_id}")
+async def delete_asset_chunks(request: Request, project_id: int, file_id: str):
+    project_model = await ProjectModel.create_instance()
+    project = await project_model.get_project(project_id=project_id)
+    if project is None:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value})
+
+    asset_model = await AssetModel.create_instance()
+    asset_record = await asset_model.get_asset_record(asset_project_id=project["project_id"], asset_name=file_id)
+    if asset_record is None:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.FILE_ID_ERROR.value, "message": "File not found with this id."})
+
+    nlp_controller = NLPController(
+        vectordb_client=request.app.state.vectordb_client,
+        generation_client=request.app.state.generation_client,
+        embedding_client=request.app.state.embedding_client,
+        template_parser=request.app.state.template_parser
+    )
+
+    deleted_chunks = await nlp_controller.delete_asset_chunks(project=project, asset_id=asset_record["asset_id"])
+
+    return JSONResponse(content={"signal": ResponseStatus.ASSET_CHUNKS_DELETED.value, "deleted_chunks": deleted_chunks})
+
+@data_router.delete("/project/{project_id}")
+async def delete_project(request: Request, project_id: int):
+    project_model = await ProjectModel.create_instance()
+    project = await project_model.get_project(project_id=project_id)
+    if project is None:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value})
+
+    # Stored files first: their asset rows go with the project, and the bucket ledger is adjusted per file
+    asset_model = await AssetModel.create_instance()
+    project_files = await asset_model.get_all_project_assets(asset_project_id=project["project_id"], asset_type=AssetTypeEnum.FILE.value)
+
+    storage_manager = SupabaseStorageManager()
+    deleted_files = 0
+    for record in project_files:
+        bucket_name = (record.get("asset_config") or {}).get("bucket", "fields1")
+        try:
+            await storage_manager.delete_file(bucket_name, record["asset_name"], record["asset_size"])
+            deleted_files += 1
+        except Exception as e:
+            logger.error(f"Failed to delete {record['asset_name']} from {bucket_name}: {e}")
+
+    nlp_controller = NLPController(
+        vectordb_client=request.app.state.vectordb_client,
+        generation_client=request.app.state.generation_client,
+        embedding_client=request.app.state.embedding_client,
+        template_parser=request.app.state.template_parser
+    )
+
+    await nlp_controller.delete_project(project=project)
+
+    return JSONResponse(content={"signal": ResponseStatus.PROJECT_DELETED.value, "deleted_files": deleted_files})
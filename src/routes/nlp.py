@@ -1,10 +1,13 @@
-from fastapi import FastAPI, APIRouter, status, Request
+from fastapi import FastAPI, APIRouter, status, Request, BackgroundTasks
 from fastapi.responses import JSONResponse
-from routes.schemas.nlp import PushRequest, SearchRequest
+from routes.schemas.nlp import PushRequest, SearchRequest, BatchSearchRequest
 from models.ProjectModel import ProjectModel
 from models.ChunkModel import ChunkModel
+from models.IndexCheckpointModel import IndexCheckpointModel
+from models.enums.IndexStageEnum import IndexStageEnum
 from controllers import NLPController
 from models.enums.ResponseEnums import ResponseStatus
+from helpers.pipeline import StagePipeline
 from tqdm.auto import tqdm
 
 import logging
@@ -19,6 +22,7 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
 
     project_model = await ProjectModel.create_instance()
     chunk_model = await ChunkModel.create_instance()
+    checkpoint_model = await IndexCheckpointModel.create_instance()
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
@@ -39,46 +43,52 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
         template_parser=request.app.state.template_parser,
     )
 
-    has_records = True
-    page_no = 1
-    inserted_items_count = 0
-
-    collection_name = nlp_controller.create_collection_name(project_id=project["project_id"])
-    _ = await request.app.state.vectordb_client.create_collection(
-        collection_name=collection_name,
-        embedding_size=nlp_controller.embedding_client.embedding_dimension,
-        do_reset=push_request.do_reset
-    )
-
-    total_chunks_count = await chunk_model.get_total_chunks_coumt(project_id=project["project_id"])
-    pbar = tqdm(total=total_chunks_count, desc="Vector Indexing", position=0)
-
-    while has_records:
-        page_chunks = await chunk_model.get_project_chunks(project_id=project["project_id"], page_no=page_no)
-        if len(page_chunks):
-            page_no += 1
-        
-        if not page_chunks or len(page_chunks) == 0:
-            has_records = False
-            break
-
-        chunks_ids = [chunk["chunk_id"] for chunk in page_chunks]
-        
-        is_inserted = await nlp_controller.index_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            chunks_ids=chunks_ids
-        )
-
-        if not is_inserted:
+    # A reset re-embeds into a new index generation; searches use the current one until the swap
+    if push_request.do_reset:
+        inserted_items_count = await nlp_controller.build_index_generation(project=project)
+        if inserted_items_count is None:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     "signal": ResponseStatus.INSERT_INTO_VECTORDB_ERROR.value
                 }
             )
-        pbar.update(len(page_chunks))
-        inserted_items_count += len(page_chunks)
+        return JSONResponse(
+            content={
+                "signal": ResponseStatus.INSERT_INTO_VECTORDB_SUCCESS.value,
+                "inserted_items_count": inserted_items_count
+            }
+        )
+
+    # Continues after the last checkpointed chunk, so a failed or repeated push only embeds what is left
+    active_generation = project.get("project_active_generation") or 0
+    last_chunk_id = await checkpoint_model.get_checkpoint(project_id=project["project_id"], generation=active_generation,
+                                                          stage=IndexStageEnum.PUSH.value) or 0
+
+    # Only sizes the progress bar: the stats row for a fresh push, the planner's estimate when resuming
+    if last_chunk_id:
+        total_chunks_count = await chunk_model.get_total_chunks_coumt(project_id=project["project_id"], generation=active_generation,
+                                                                      after_chunk_id=last_chunk_id, estimated=True)
+    else:
+        total_chunks_count = (await nlp_controller.get_project_stats(project=project))["chunk_count"]
+    pbar = tqdm(total=total_chunks_count, desc="Vector Indexing", position=0)
+
+    inserted_items_count = await nlp_controller.index_generation_chunks(
+        project=project,
+        generation=active_generation,
+        stage=IndexStageEnum.PUSH.value,
+        throttle=False,
+        progress=pbar,
+    )
+    pbar.close()
+
+    if inserted_items_count is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseStatus.INSERT_INTO_VECTORDB_ERROR.value
+            }
+        )
         
     return JSONResponse(
         content={
@@ -87,14 +97,48 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
         }
     )
 
+@nlp_router.post("/index/rebuild/{project_id}")
+async def rebuild_index(request: Request, project_id: int, background_tasks: BackgroundTasks):
+
+    project_model = await ProjectModel.create_instance()
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    nlp_controller = NLPController(
+        vectordb_client=request.app.state.vectordb_client,
+        generation_client=request.app.state.generation_client,
+        embedding_client=request.app.state.embedding_client,
+        template_parser=request.app.state.template_parser,
+    )
+
+    # Builds and promotes the new generation after the response is sent
+    background_tasks.add_task(nlp_controller.build_index_generation, project=project)
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "signal": ResponseStatus.INDEX_REBUILD_STARTED.value,
+            "active_generation": project.get("project_active_generation") or 0
+        }
+    )
+
 @nlp_router.get("/index/info/{project_id}")
 async def get_project_index_info(request: Request, project_id: int):
     
     project_model = await ProjectModel.create_instance()
-    project = await project_model.get_project_or_create_one(
+    project = await project_model.get_project(
         project_id=project_id
     )
 
+    if not project:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value
+            }
+        )
+
     nlp_controller = NLPController(
         vectordb_client=request.app.state.vectordb_client,
         generation_client=request.app.state.generation_client,
@@ -107,17 +151,18 @@ async def get_project_index_info(request: Request, project_id: int):
     return JSONResponse(
         content={
             "signal": ResponseStatus.VECTORDB_COLLECTION_RETRIEVED.value,
-            "collection_info": collection_info
+            "collection_info": collection_info,
+            "active_generation": project.get("project_active_generation") or 0,
+            "building_generation": project.get("project_building_generation"),
+            "index_model": project.get("project_index_model"),
+            "stats": await nlp_controller.get_project_stats(project=project)
         }
     )
 
 @nlp_router.post("/index/search/{project_id}")
 async def search_index(request: Request, project_id: int, search_request: SearchRequest):
-    
+
     project_model = await ProjectModel.create_instance()
-    project = await project_model.get_project_or_create_one(
-        project_id=project_id
-    )
 
     nlp_controller = NLPController(
         vectordb_client=request.app.state.vectordb_client,
@@ -126,32 +171,109 @@ async def search_index(request: Request, project_id: int, search_request: Search
         template_parser=request.app.state.template_parser,
     )
 
-    results = await nlp_controller.search_vector_db_collection(
-        project=project, text=search_request.text, limit=search_request.limit
+    # The query is embedded while the project resolves; the search needs both
+    pipeline = StagePipeline("search")
+    pipeline.add_stage("project", lambda: project_model.get_project(project_id=project_id))
+    pipeline.add_stage("query_vector", lambda: nlp_controller.embed_query(text=search_request.text), in_thread=True)
+    pipeline.add_stage("documents", lambda project, query_vector: nlp_controller.search_by_query_vector(
+        project=project, query_vector=query_vector, limit=search_request.limit
+    ), depends_on=("project", "query_vector"))
+
+    results = await pipeline.run()
+    timing_headers = {"Server-Timing": pipeline.server_timing()}
+
+    if not results["project"]:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value
+                },
+                headers=timing_headers
+            )
+
+    if results["documents"] is None:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseStatus.VECTORDB_SEARCH_ERROR.value
+                },
+                headers=timing_headers
+            )
+    
+    return JSONResponse(
+        content={
+            "signal": ResponseStatus.VECTORDB_SEARCH_SUCCESS.value,
+            "results": [ result.dict()  for result in results["documents"] ]
+        },
+        headers=timing_headers
     )
 
-    if results is False:
+@nlp_router.post("/index/search/batch/{project_id}")
+async def search_index_batch(request: Request, project_id: int, search_request: BatchSearchRequest):
+
+    if not search_request.texts:
         return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     "signal": ResponseStatus.VECTORDB_SEARCH_ERROR.value
                 }
             )
-    
+
+    project_model = await ProjectModel.create_instance()
+
+    nlp_controller = NLPController(
+        vectordb_client=request.app.state.vectordb_client,
+        generation_client=request.app.state.generation_client,
+        embedding_client=request.app.state.embedding_client,
+        template_parser=request.app.state.template_parser,
+    )
+
+    # repeated queries are embedded and searched once
+    unique_texts = list(dict.fromkeys(search_request.texts))
+
+    pipeline = StagePipeline("batch search")
+    pipeline.add_stage("project", lambda: project_model.get_project(project_id=project_id))
+    pipeline.add_stage("query_vectors", lambda: nlp_controller.embed_queries(texts=unique_texts), in_thread=True)
+    pipeline.add_stage("documents", lambda project, query_vectors: nlp_controller.search_by_query_vectors(
+        project=project, query_vectors=query_vectors, limit=search_request.limit
+    ), depends_on=("project", "query_vectors"))
+
+    results = await pipeline.run()
+    timing_headers = {"Server-Timing": pipeline.server_timing()}
+
+    if not results["project"]:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value
+                },
+                headers=timing_headers
+            )
+
+    if results["documents"] is None:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseStatus.VECTORDB_SEARCH_ERROR.value
+                },
+                headers=timing_headers
+            )
+
     return JSONResponse(
         content={
             "signal": ResponseStatus.VECTORDB_SEARCH_SUCCESS.value,
-            "results": [ result.dict()  for result in results ]
-        }
+            "results": {
+                text: [ result.dict() for result in text_results ]
+                for text, text_results in zip(unique_texts, results["documents"])
+            }
+        },
+        headers=timing_headers
     )
 
 @nlp_router.post("/index/answer/{project_id}")
 async def answer_rag(request: Request, project_id: int, search_request: SearchRequest):
     
     project_model = await ProjectModel.create_instance()
-    project = await project_model.get_project_or_create_one(
-        project_id=project_id
-    )
 
     nlp_controller = NLPController(
         vectordb_client=request.app.state.vectordb_client,
@@ -160,27 +282,49 @@ async def answer_rag(request: Request, project_id: int, search_request: SearchRe
         template_parser=request.app.state.template_parser,
     )
 
-    answer, full_prompt, chat_history = await nlp_controller.answer_rag_question(
-        project=project,
-        query=search_request.text,
-        limit=search_request.limit,
-    )
+    # project || query embedding -> search -> context and prompt -> generation
+    pipeline = StagePipeline("answer")
+    pipeline.add_stage("project", lambda: project_model.get_project(project_id=project_id))
+    pipeline.add_stage("query_vector", lambda: nlp_controller.embed_query(text=search_request.text), in_thread=True)
+    pipeline.add_stage("documents", lambda project, query_vector: nlp_controller.search_by_query_vector(
+        project=project, query_vector=query_vector, limit=search_request.limit
+    ), depends_on=("project", "query_vector"))
+    pipeline.add_stage("prompt", lambda documents: nlp_controller.build_rag_prompt(
+        query=search_request.text, retrieved_documents=documents
+    ), depends_on=("documents",))
+    pipeline.add_stage("answer", lambda prompt: nlp_controller.generate_answer(
+        full_prompt=prompt[0], chat_history=prompt[1]
+    ), depends_on=("prompt",), in_thread=True)
+
+    results = await pipeline.run()
+    timing_headers = {"Server-Timing": pipeline.server_timing()}
+
+    if not results["project"]:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value
+                },
+                headers=timing_headers
+        )
 
-    if not answer:
+    if not results["answer"]:
         return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
                     "signal": ResponseStatus.RAG_ANSWER_ERROR.value
-                }
+                },
+                headers=timing_headers
         )
+
+    full_prompt, chat_history = results["prompt"]
     
     return JSONResponse(
         content={
             "signal": ResponseStatus.RAG_ANSWER_SUCCESS.value,
-            "answer": answer,
+            "answer": results["answer"],
             "full_prompt": full_prompt,
             "chat_history": chat_history
-        }
+        },
+        headers=timing_headers
     )
-
-
@@ -3,9 +3,22 @@ from typing import Optional
 
 class ProcessRequest(BaseModel):
     file_id: str = None
+    # in CHUNK_SIZE_UNIT (characters by default)
     chunk_size: Optional[int] = 1024
     overlap_size: Optional[int] = 20
     do_reset : Optional[int] = 1
 
 
 
+
+
+class SignedUploadRequest(BaseModel):
+    file_name: str
+    content_type: str
+    file_size: int
+    # hex MD5 of the file; checked against the stored object's ETag on confirm
+    md5: Optional[str] = None
+
+class ConfirmUploadRequest(BaseModel):
+    # returned by /upload/sign; carries the bucket, path and declared size/MD5
+    upload_ticket: str
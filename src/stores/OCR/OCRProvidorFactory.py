@@ -1,5 +1,5 @@
 from .OCREnims import OCREnums
-from stores.OCR.providers.MistralProvidor import MistralProvidor
+from helpers.import_timer import timed_import
 
 class OCRProviderFactory:
   def __init__(self, config):
@@ -8,6 +8,7 @@ class OCRProviderFactory:
   def create_provider(self, provider: str):
 
     if provider == OCREnums.MISTRAL.value:
+      MistralProvidor = timed_import("stores.OCR.providers.MistralProvidor").MistralProvidor
       return MistralProvidor(
         api_key=self.config.MISTRAL_API_KEY,
         model_id=self.config.OCR_MODEL_ID,
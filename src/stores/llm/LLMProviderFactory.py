@@ -1,7 +1,5 @@
 from .LLMEnums import LLMEnums
-from stores.llm.providers.OpenAIProvider import OpenAIProvider
-from stores.llm.providers.CohereProvider import CohereProvider
-from stores.llm.providers.GeminiProvider import GeminiProvider
+from helpers.import_timer import timed_import
 
 
 class LLMProviderFactory:
@@ -11,15 +9,18 @@ class LLMProviderFactory:
   def create_provider(self, provider: str):
 
     if provider == LLMEnums.OPENAI.value:
+      # SDKs are heavy; import only the configured backend
+      OpenAIProvider = timed_import("stores.llm.providers.OpenAIProvider").OpenAIProvider
       return OpenAIProvider(
         api_key=self.config.OPENAI_API_KEY,
         api_url=self.config.OPENAI_API_URL,
         default_input_max_characters=self.config.INPUT_DEFAULT_MAX_CHARACTERS,
         default_output_max_tokens=self.config.GENERATION_DEFAULT_MAX_TOKENS,
-        default_temperature=self.config.GENERATION_DEFAULT_TEMPERATURE
+        default_generation_temperature=self.config.GENERATION_DEFAULT_TEMPERATURE
       )
 
     elif provider == LLMEnums.COHERE.value:
+      CohereProvider = timed_import("stores.llm.providers.CohereProvider").CohereProvider
       return CohereProvider(
         api_key=self.config.COHERE_API_KEY,
         default_input_max_characters=self.config.INPUT_DEFAULT_MAX_CHARACTERS,
@@ -28,6 +29,7 @@ class LLMProviderFactory:
       )
 
     elif provider == LLMEnums.GEMINI.value:
+      GeminiProvider = timed_import("stores.llm.providers.GeminiProvider").GeminiProvider
       return GeminiProvider(
         api_key=self.config.GEMINI_API_KEY,
         default_input_max_characters=self.config.INPUT_DEFAULT_MAX_CHARACTERS,
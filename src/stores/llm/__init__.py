@@ -1,4 +1,13 @@
-from .providers.CohereProvider import CohereProvider
-from .providers.OpenAIProvider import OpenAIProvider
-from .providers.GeminiProvider import GeminiProvider
+# Providers are resolved on first access so importing this package doesn't pull in every SDK
+_providers = {
+    "CohereProvider": "CohereProvider",
+    "OpenAIProvider": "OpenAIProvider",
+    "GeminiProvider": "GeminiProvider",
+}
 
+
+def __getattr__(name):
+    if name not in _providers:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = __import__(f"stores.llm.providers.{_providers[name]}", fromlist=[name])
+    return getattr(module, name)
@@ -124,22 +124,22 @@ class GeminiProvider(LLMInterface):
                   self.logger.error(f"Failed to generate embedding from Gemini. Response: {response}")
                   return None
 
-              # The new SDK returns a list of embeddings
-              embedding = response.embeddings[0].values
+              # The new SDK returns one embedding per input text
+              embeddings = [e.values for e in response.embeddings]
               
               # Update the actual embedding dimension to match what was generated
-              actual_dimension = len(embedding)
+              actual_dimension = len(embeddings[0])
               if actual_dimension != self.embedding_dimension:
                   self.logger.info(f"Actual embedding dimension: {actual_dimension} (configured: {self.embedding_dimension})")
                   self.embedding_dimension = actual_dimension
 
-              # Truncate embedding if it's too large for HNSW (though output_dimensionality should handle this)
-              if len(embedding) > 2000:
-                  embedding = embedding[:1536]  # Truncate to 1536 dimensions
-                  self.logger.warning(f"Truncated embedding from {len(embedding)} to 1536 dimensions for HNSW compatibility")
-                  self.embedding_dimension = len(embedding)
+              # Truncate embeddings if they're too large for HNSW (though output_dimensionality should handle this)
+              if actual_dimension > 2000:
+                  embeddings = [embedding[:1536] for embedding in embeddings]  # Truncate to 1536 dimensions
+                  self.logger.warning(f"Truncated embeddings from {actual_dimension} to 1536 dimensions for HNSW compatibility")
+                  self.embedding_dimension = 1536
 
-              return [embedding]
+              return embeddings
               
           except Exception as e:
               if "quota" in str(e).lower() or "429" in str(e):
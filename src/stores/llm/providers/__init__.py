@@ -1,4 +1 @@
-from .CohereProvider import CohereProvider
-from .GeminiProvider import GeminiProvider
-from .OpenAIProvider import OpenAIProvider
-
+# Provider modules are imported on demand by LLMProviderFactory, so only the configured SDKs load
@@ -1,43 +1,96 @@
 import os
+import asyncio
+import importlib
+import logging
+from string import Template
 
 class TemplateParser:
 
     def __init__(self, language: str=None, default_language='ar'):
         self.current_path = os.path.dirname(os.path.abspath(__file__))
+        self.locales_path = os.path.join(self.current_path, "locales")
         self.default_language = default_language
         self.language = None
+        self.logger = logging.getLogger(__name__)
 
+        # (language, group, key) -> Template, loaded once so lookups never touch the filesystem
+        self.templates = {}
+        self.files_mtimes = {}
+
+        self.load()
         self.set_language(language)
 
-    
-    def set_language(self, language: str):
-        if not language:
-            self.language = self.default_language
+    def scan_locale_files(self) -> dict:
+        files_mtimes = {}
+        for language in os.listdir(self.locales_path):
+            language_path = os.path.join(self.locales_path, language)
+            if language.startswith("__") or not os.path.isdir(language_path):
+                continue
+
+            for file_name in os.listdir(language_path):
+                if file_name.startswith("__") or not file_name.endswith(".py"):
+                    continue
+                file_path = os.path.join(language_path, file_name)
+                files_mtimes[(language, file_name[:-3])] = os.path.getmtime(file_path)
+
+        return files_mtimes
+
+    def load(self, reload: bool = False):
+        files_mtimes = self.scan_locale_files()
+        templates = {}
+
+        for language, group in files_mtimes:
+            module = importlib.import_module(f"stores.llm.templates.locales.{language}.{group}")
+            if reload:
+                module = importlib.reload(module)
+
+            for key, value in vars(module).items():
+                if isinstance(value, Template):
+                    templates[(language, group, key)] = value
+
+        # swap in one assignment so concurrent lookups see either the old or the new registry
+        self.templates = templates
+        self.files_mtimes = files_mtimes
+        self.logger.info(f"Loaded {len(templates)} templates from {len(files_mtimes)} locale groups")
 
-        language_path = os.path.join(self.current_path, "locales", language)
-        if os.path.exists(language_path):
+    async def watch(self, interval: float = 2.0):
+        # Polls locale files off the request path and reloads the registry when they change
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.scan_locale_files() != self.files_mtimes:
+                    self.load(reload=True)
+            except Exception as e:
+                self.logger.error(f"Failed to reload templates: {e}")
+
+    def set_language(self, language: str):
+        languages = {template_language for template_language, _, _ in self.templates}
+        if language and language in languages:
             self.language = language
         else:
             self.language = self.default_language
 
-    def get(self, group: str, key: str, vars: dict={}):
+    def get_template(self, group: str, key: str):
         if not group or not key:
             return None
-        
-        group_path = os.path.join(self.current_path, "locales", self.language, f"{group}.py" )
-        targeted_language = self.language
-        if not os.path.exists(group_path):
-            group_path = os.path.join(self.current_path, "locales", self.default_language, f"{group}.py" )
-            targeted_language = self.default_language
-
-        if not os.path.exists(group_path):
+
+        template = self.templates.get((self.language, group, key))
+        if template is None:
+            template = self.templates.get((self.default_language, group, key))
+
+        return template
+
+    def get(self, group: str, key: str, vars: dict={}):
+        template = self.get_template(group, key)
+        if template is None:
             return None
-        
-        # import group module
-        module = __import__(f"stores.llm.templates.locales.{targeted_language}.{group}", fromlist=[group])
 
-        if not module:
+        return template.safe_substitute(vars)
+
+    def render_many(self, group: str, key: str, vars_list: list):
+        # Resolves the template once and renders it for every set of vars
+        template = self.get_template(group, key)
+        if template is None:
             return None
-        
-        key_attribute = getattr(module, key)
-        return key_attribute.safe_substitute(vars)
\ No newline at end of file
+
+        return [template.safe_substitute(vars) for vars in vars_list]
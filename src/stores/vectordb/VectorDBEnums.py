@@ -2,7 +2,17 @@ from enum import Enum
 
 class VectorDBEnums(Enum):
     SUPABASE = "SUPABASE"
+    PGVECTOR = "PGVECTOR"
+    LOCAL = "LOCAL"
 
 class DistanceMethodEnums(Enum):
     COSINE = "cosine"
     DOT = "dot"
+
+class VectorCompactModeEnums(Enum):
+    HALFVEC = "halfvec"
+    BINARY = "binary"
+
+class LocalIndexEnums(Enum):
+    FLAT = "FLAT"
+    HNSW = "HNSW"
@@ -46,7 +46,14 @@ class VectorDBInterface(ABC):
                           record_ids: list = None, batch_size: int = 50):
         pass
 
+    @abstractmethod
+    def delete_records(self, collection_name: str, record_ids: list):
+        pass
+
     @abstractmethod
     def search_by_vector(self, collection_name: str, vector: list, limit: int)-> List[RetrievedDocument]:
         pass
-    
\ No newline at end of file
+
+    @abstractmethod
+    def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int)-> List[List[RetrievedDocument]]:
+        pass
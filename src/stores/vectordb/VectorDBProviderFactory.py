@@ -1,5 +1,5 @@
-from .providers.SupabaseVectorProvider import SupabaseVectorProvider
-from .VectorDBEnums import VectorDBEnums
+from .VectorDBEnums import VectorDBEnums, VectorCompactModeEnums
+from helpers.import_timer import timed_import
 from controllers.BaseController import BaseController
 
 
@@ -10,10 +10,49 @@ class VectorDBProviderFactory:
         self.db_client = db_client
 
     def create_provider(self, provider: str):
+        compact_modes = [mode.value for mode in VectorCompactModeEnums]
+        if self.config.VECTOR_DB_COMPACT_MODE and self.config.VECTOR_DB_COMPACT_MODE not in compact_modes:
+            raise ValueError(f"Unsupported VECTOR_DB_COMPACT_MODE: {self.config.VECTOR_DB_COMPACT_MODE}. Use one of {compact_modes}.")
+
         if provider == VectorDBEnums.SUPABASE.value:
-            return SupabaseVectorProvider(
+            SupabaseVectorProvider = timed_import("stores.vectordb.providers.SupabaseVectorProvider").SupabaseVectorProvider
+            supabase_provider = SupabaseVectorProvider(
+                distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
+                default_vector_size=self.config.EMBEDDING_MODEL_SIZE or self.config.VECTOR_DB_DEFAULT_VECTOR_SIZE,
+                compact_mode=self.config.VECTOR_DB_COMPACT_MODE,
+                rerank_multiplier=self.config.VECTOR_DB_RERANK_MULTIPLIER,
+            )
+            if not self.config.VECTOR_DB_CACHE_ENABLED:
+                return supabase_provider
+
+            CachedVectorProvider = timed_import("stores.vectordb.providers.CachedVectorProvider").CachedVectorProvider
+            return CachedVectorProvider(
+                supabase_provider,
+                max_projects=self.config.VECTOR_DB_CACHE_MAX_PROJECTS,
+                max_mb=self.config.VECTOR_DB_CACHE_MAX_MB,
+                min_hits=self.config.VECTOR_DB_CACHE_MIN_HITS,
+                version_check_interval=self.config.VECTOR_DB_CACHE_VERSION_CHECK_INTERVAL,
+            )
+
+        if provider == VectorDBEnums.PGVECTOR.value:
+            PGVectorProvider = timed_import("stores.vectordb.providers.PGVectorProvider").PGVectorProvider
+            return PGVectorProvider(
+                distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
+                default_vector_size=self.config.EMBEDDING_MODEL_SIZE or self.config.VECTOR_DB_DEFAULT_VECTOR_SIZE,
+                compact_mode=self.config.VECTOR_DB_COMPACT_MODE,
+                rerank_multiplier=self.config.VECTOR_DB_RERANK_MULTIPLIER,
+            )
+
+        if provider == VectorDBEnums.LOCAL.value:
+            LocalVectorProvider = timed_import("stores.vectordb.providers.LocalVectorProvider").LocalVectorProvider
+            return LocalVectorProvider(
+                db_path=self.base_controller.get_database_path(db_name=self.config.VECTOR_DB_PATH),
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE or self.config.VECTOR_DB_DEFAULT_VECTOR_SIZE,
+                index_type=self.config.VECTOR_DB_LOCAL_INDEX,
+                hnsw_m=self.config.VECTOR_DB_HNSW_M,
+                hnsw_ef_construction=self.config.VECTOR_DB_HNSW_EF_CONSTRUCTION,
+                hnsw_ef_search=self.config.VECTOR_DB_HNSW_EF_SEARCH,
             )
         
         raise ValueError(f"Unsupported Vector DB provider: {provider}. This app is optimized for Supabase.")
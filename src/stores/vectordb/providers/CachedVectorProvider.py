@@ -0,0 +1,254 @@
+from ..VectorDBInterface import VectorDBInterface
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, Counter
+from typing import List
+import numpy as np
+from models.db_schemes import RetrievedDocument
+
+
+class CachedProject:
+    """
+    Read-only replica of one project's vectors: a contiguous row-normalized float32 matrix
+    plus the chunk columns needed to build RetrievedDocument results.
+    """
+
+    def __init__(self, version: tuple, rows: list):
+        self.version = version
+        self.checked_at = time.monotonic()
+
+        self.chunk_ids = [row["chunk_id"] for row in rows]
+        self.asset_ids = [row.get("chunk_asset_id") for row in rows]
+        self.orders = [row.get("chunk_order") for row in rows]
+        self.texts = [row["chunk_text"] for row in rows]
+
+        matrix = np.array([CachedProject.parse_vector(row["vector"]) for row in rows], dtype=np.float32)
+        if len(rows):
+            # match_vectors scores by cosine similarity, so normalize once here
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1, norms)
+        self.matrix = np.ascontiguousarray(matrix)
+
+    @staticmethod
+    def parse_vector(value):
+        # PostgREST returns pgvector columns in their text form: "[0.1,0.2,...]"
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + sum(len(text) for text in self.texts)
+
+    def search(self, vectors: np.ndarray, limit: int) -> List[List[RetrievedDocument]]:
+        if not len(self.chunk_ids):
+            return [[] for _ in vectors]
+
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        scores = queries @ self.matrix.T
+        limit = min(limit, scores.shape[1])
+
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, limit - 1)[:limit]
+            top = top[np.argsort(-row[top])]
+            results.append([
+                RetrievedDocument(
+                    text=self.texts[i],
+                    score=float(row[i]),
+                    chunk_id=self.chunk_ids[i],
+                    chunk_asset_id=self.asset_ids[i],
+                    chunk_order=self.orders[i],
+                )
+                # same match_threshold (0.0) the RPCs use
+                for i in top if row[i] > 0.0
+            ])
+        return results
+
+
+class CachedVectorProvider(VectorDBInterface):
+    """
+    Read-through replica tier in front of SupabaseVectorProvider.
+    Projects that receive at least `min_hits` searches are loaded in the background and then
+    answered in-process; everything else (and every write) goes to the wrapped provider.
+    Cached copies are dropped on local writes and re-checked against projects.project_vectors_version
+    and the active index generation at most every `version_check_interval` seconds to catch writes
+    from other workers.
+    """
+
+    def __init__(self, provider: VectorDBInterface,
+                       max_projects: int = 8,
+                       max_mb: int = 512,
+                       min_hits: int = 3,
+                       version_check_interval: float = 5.0,
+                       page_size: int = 1000):
+
+        self.provider = provider
+        self.supabase = provider.supabase
+        self.default_vector_size = provider.default_vector_size
+        self.max_projects = max_projects
+        self.max_bytes = max_mb * 1024 * 1024
+        self.min_hits = min_hits
+        self.version_check_interval = version_check_interval
+        self.page_size = page_size
+
+        self.projects = OrderedDict()  # project_id -> CachedProject, least recently used first
+        self.hits = Counter()
+        self.loading = {}  # project_id -> asyncio.Task
+        self.invalidations = Counter()  # bumped on local writes so in-flight loads are discarded
+        self.logger = logging.getLogger("uvicorn")
+
+    def _extract_project_id(self, collection_name: str) -> int:
+        return self.provider._extract_project_id(collection_name)
+
+    async def connect(self):
+        await self.provider.connect()
+
+    async def disconnect(self):
+        for task in self.loading.values():
+            task.cancel()
+        self.loading.clear()
+        self.projects.clear()
+        await self.provider.disconnect()
+
+    def invalidate(self, project_id: int):
+        self.invalidations[project_id] += 1
+        self.projects.pop(project_id, None)
+
+    def _fetch_version(self, project_id: int):
+        # (vectors version, active index generation): promoting a generation also invalidates
+        res = self.supabase.table("projects").select("project_vectors_version, project_active_generation") \
+            .eq("project_id", project_id).execute()
+        if not res.data:
+            return None
+        return res.data[0]["project_vectors_version"], res.data[0]["project_active_generation"]
+
+    def _fetch_rows(self, project_id: int, generation: int) -> list:
+        rows, start = [], 0
+        while True:
+            res = self.supabase.table("chunks") \
+                .select("chunk_id, chunk_text, chunk_asset_id, chunk_order, vector") \
+                .eq("chunk_project_id", project_id) \
+                .eq("chunk_generation", generation) \
+                .not_.is_("vector", "null") \
+                .order("chunk_id") \
+                .range(start, start + self.page_size - 1) \
+                .execute()
+            rows.extend(res.data)
+            if len(res.data) < self.page_size:
+                return rows
+            start += self.page_size
+
+    async def _load(self, project_id: int):
+        invalidations = self.invalidations[project_id]
+        try:
+            # Read the version first: a write that lands during the scan bumps it past ours
+            version = await asyncio.to_thread(self._fetch_version, project_id)
+            if version is None:
+                return
+            rows = await asyncio.to_thread(self._fetch_rows, project_id, version[1])
+            cached = await asyncio.to_thread(CachedProject, version, rows)
+        except Exception as e:
+            self.logger.error(f"Error loading project {project_id} into the vector cache: {e}")
+            return
+        finally:
+            self.loading.pop(project_id, None)
+
+        if invalidations != self.invalidations[project_id]:
+            return
+
+        if cached.nbytes > self.max_bytes:
+            self.logger.warning(f"Project {project_id} ({cached.nbytes / 1e6:.0f} MB) exceeds the vector cache budget.")
+            self.hits[project_id] = 0
+            return
+
+        self.projects[project_id] = cached
+        self.projects.move_to_end(project_id)
+        self.logger.info(f"Cached {len(rows)} vectors for project {project_id} ({cached.nbytes / 1e6:.1f} MB).")
+        self._evict()
+
+    def _evict(self):
+        total_bytes = sum(cached.nbytes for cached in self.projects.values())
+        while self.projects and (len(self.projects) > self.max_projects or total_bytes > self.max_bytes):
+            project_id, cached = self.projects.popitem(last=False)
+            total_bytes -= cached.nbytes
+            self.hits[project_id] = 0
+            self.logger.info(f"Evicted project {project_id} from the vector cache.")
+
+    async def _get_cached(self, project_id: int):
+        self.hits[project_id] += 1
+
+        cached = self.projects.get(project_id)
+        if cached is not None and time.monotonic() - cached.checked_at >= self.version_check_interval:
+            try:
+                version = await asyncio.to_thread(self._fetch_version, project_id)
+            except Exception as e:
+                self.logger.error(f"Error checking vector version for project {project_id}: {e}")
+                version = None
+            if version != cached.version:
+                self.invalidate(project_id)
+                cached = None
+            else:
+                cached.checked_at = time.monotonic()
+
+        if cached is not None:
+            self.projects.move_to_end(project_id)
+            return cached
+
+        if self.hits[project_id] >= self.min_hits and project_id not in self.loading:
+            self.loading[project_id] = asyncio.create_task(self._load(project_id))
+        return None
+
+    async def is_collection_existed(self, collection_name: str) -> bool:
+        return await self.provider.is_collection_existed(collection_name)
+
+    async def list_all_collections(self) -> List:
+        return await self.provider.list_all_collections()
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        return await self.provider.get_collection_info(collection_name)
+
+    async def delete_collection(self, collection_name: str):
+        self.invalidate(self._extract_project_id(collection_name))
+        return await self.provider.delete_collection(collection_name)
+
+    async def create_collection(self, collection_name: str,
+                                       embedding_size: int,
+                                       do_reset: bool = False):
+        if do_reset:
+            self.invalidate(self._extract_project_id(collection_name))
+        return await self.provider.create_collection(collection_name, embedding_size, do_reset=do_reset)
+
+    async def insert_one(self, collection_name: str, text: str, vector: list,
+                            metadata: dict = None,
+                            record_id: int = None):
+        self.invalidate(self._extract_project_id(collection_name))
+        return await self.provider.insert_one(collection_name, text, vector, metadata=metadata, record_id=record_id)
+
+    async def insert_many(self, collection_name: str, texts: list,
+                         vectors: list, metadata: list = None,
+                         record_ids: list = None, batch_size: int = 50):
+        self.invalidate(self._extract_project_id(collection_name))
+        return await self.provider.insert_many(collection_name, texts, vectors, metadata=metadata,
+                                               record_ids=record_ids, batch_size=batch_size)
+
+    async def delete_records(self, collection_name: str, record_ids: list):
+        self.invalidate(self._extract_project_id(collection_name))
+        return await self.provider.delete_records(collection_name, record_ids)
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int):
+        cached = await self._get_cached(self._extract_project_id(collection_name))
+        if cached is None:
+            return await self.provider.search_by_vector(collection_name, vector, limit)
+        return cached.search([vector], limit)[0]
+
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int):
+        cached = await self._get_cached(self._extract_project_id(collection_name))
+        if cached is None:
+            return await self.provider.search_by_vectors(collection_name, vectors, limit)
+        return cached.search(vectors, limit)
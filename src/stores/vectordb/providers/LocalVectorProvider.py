@@ -0,0 +1,378 @@
+from ..VectorDBInterface import VectorDBInterface
+from ..VectorDBEnums import DistanceMethodEnums, LocalIndexEnums
+from helpers.import_timer import timed_import
+import json
+import logging
+import os
+import shutil
+from typing import List
+import numpy as np
+from models.db_schemes import RetrievedDocument
+
+
+class LocalCollection:
+    """
+    One collection on disk:
+      vectors.f32      append-only float32 matrix (rows x dimension), memory-mapped for search
+      records.jsonl    one {"id", "text", "metadata"} line per vector row
+      tombstones.jsonl deleted row numbers; rows are skipped until the collection is compacted
+      hnsw.bin         optional HNSW graph over the rows (labels are row numbers)
+      info.json        {"dimension"}
+    """
+
+    def __init__(self, path: str, dimension: int, hnsw_params: dict = None):
+        self.path = path
+        self.dimension = dimension
+
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.records_path = os.path.join(path, "records.jsonl")
+        self.tombstones_path = os.path.join(path, "tombstones.jsonl")
+        self.hnsw_path = os.path.join(path, "hnsw.bin")
+
+        # {"M", "ef_construction", "ef_search"} to search with HNSW instead of a flat scan
+        self.hnsw_params = hnsw_params
+        self.hnsw = None
+        self.hnsw_dirty = False
+
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.records = []
+        self.deleted = np.zeros(0, dtype=bool)
+        self.row_by_id = {}
+
+    @classmethod
+    def create(cls, path: str, dimension: int, hnsw_params: dict = None):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "info.json"), "w") as f:
+            json.dump({"dimension": dimension}, f)
+
+        collection = cls(path=path, dimension=dimension, hnsw_params=hnsw_params)
+        collection.load_hnsw()
+        return collection
+
+    @classmethod
+    def load(cls, path: str, hnsw_params: dict = None):
+        with open(os.path.join(path, "info.json")) as f:
+            collection = cls(path=path, dimension=json.load(f)["dimension"], hnsw_params=hnsw_params)
+
+        if os.path.exists(collection.records_path):
+            with open(collection.records_path) as f:
+                collection.records = [json.loads(line) for line in f if line.strip()]
+
+        collection.deleted = np.zeros(len(collection.records), dtype=bool)
+        if os.path.exists(collection.tombstones_path):
+            with open(collection.tombstones_path) as f:
+                for line in f:
+                    if line.strip():
+                        collection.deleted[int(line)] = True
+
+        collection.row_by_id = {
+            record["id"]: row for row, record in enumerate(collection.records)
+            if record["id"] is not None and not collection.deleted[row]
+        }
+        collection.map_vectors()
+        collection.load_hnsw()
+        return collection
+
+    @property
+    def size(self) -> int:
+        return len(self.records)
+
+    @property
+    def live_count(self) -> int:
+        return int(self.size - self.deleted.sum())
+
+    def map_vectors(self):
+        if self.size == 0:
+            self.vectors = np.empty((0, self.dimension), dtype=np.float32)
+            return
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.size, self.dimension))
+
+    def load_hnsw(self):
+        if not self.hnsw_params:
+            return
+
+        hnswlib = timed_import("hnswlib")
+        self.hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+
+        if os.path.exists(self.hnsw_path):
+            self.hnsw.load_index(self.hnsw_path, max_elements=max(self.size, 1), allow_replace_deleted=False)
+        else:
+            self.hnsw.init_index(max_elements=max(self.size, 1024), M=self.hnsw_params["M"],
+                                 ef_construction=self.hnsw_params["ef_construction"])
+        self.hnsw.set_ef(self.hnsw_params["ef_search"])
+
+        # rows appended or deleted after the last save (e.g. a crash) are replayed from the files
+        indexed = self.hnsw.element_count
+        if indexed < self.size:
+            self.add_to_hnsw(np.asarray(self.vectors[indexed:]), np.arange(indexed, self.size))
+        for row in np.flatnonzero(self.deleted):
+            try:
+                self.hnsw.mark_deleted(int(row))
+            except RuntimeError:
+                pass # already marked in the saved index
+
+    def add_to_hnsw(self, vectors: np.ndarray, rows: np.ndarray):
+        if self.hnsw is None or len(rows) == 0:
+            return
+
+        required = self.hnsw.element_count + len(rows)
+        if required > self.hnsw.max_elements:
+            self.hnsw.resize_index(max(required, self.hnsw.max_elements * 2))
+        self.hnsw.add_items(vectors, rows)
+        self.hnsw_dirty = True
+
+    def save_hnsw(self):
+        if self.hnsw is not None and self.hnsw_dirty:
+            self.hnsw.save_index(self.hnsw_path)
+            self.hnsw_dirty = False
+
+    def append(self, vectors: np.ndarray, records: list):
+        # a re-inserted id replaces its previous row
+        replaced_rows = [self.row_by_id[r["id"]] for r in records if r["id"] in self.row_by_id]
+        self.tombstone(replaced_rows)
+
+        with open(self.vectors_path, "ab") as f:
+            vectors.astype(np.float32).tofile(f)
+        with open(self.records_path, "a") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+
+        first_row = self.size
+        self.add_to_hnsw(vectors, np.arange(first_row, first_row + len(records)))
+        self.records.extend(records)
+        self.deleted = np.concatenate([self.deleted, np.zeros(len(records), dtype=bool)])
+        for offset, record in enumerate(records):
+            if record["id"] is not None:
+                self.row_by_id[record["id"]] = first_row + offset
+
+        self.map_vectors()
+
+    def tombstone(self, rows: list):
+        rows = [row for row in rows if not self.deleted[row]]
+        if not rows:
+            return
+
+        with open(self.tombstones_path, "a") as f:
+            f.writelines(f"{row}\n" for row in rows)
+
+        self.deleted[rows] = True
+        for row in rows:
+            self.row_by_id.pop(self.records[row]["id"], None)
+            if self.hnsw is not None:
+                self.hnsw.mark_deleted(row)
+                self.hnsw_dirty = True
+
+    def compact(self):
+        # Rewrites the files without tombstoned rows
+        live_rows = np.flatnonzero(~self.deleted)
+        live_vectors = np.asarray(self.vectors[live_rows]) if self.size else self.vectors
+        live_records = [self.records[row] for row in live_rows]
+
+        self.vectors = np.empty((0, self.dimension), dtype=np.float32)
+        for path in (self.vectors_path, self.records_path, self.tombstones_path, self.hnsw_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        # rows are renumbered, so the graph is rebuilt from the live rows
+        self.records, self.deleted, self.row_by_id = [], np.zeros(0, dtype=bool), {}
+        self.load_hnsw()
+        if live_records:
+            self.append(live_vectors, live_records)
+        self.save_hnsw()
+
+    def search(self, queries: np.ndarray, limit: int):
+        """
+        Returns (rows, scores) per query, best first, skipping deleted rows.
+        """
+        k = min(limit, self.live_count)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0)) for _ in queries]
+
+        if self.hnsw is not None:
+            self.hnsw.set_ef(max(self.hnsw_params["ef_search"], k))
+            try:
+                labels, distances = self.hnsw.knn_query(queries, k=k)
+                # hnswlib "ip" distance is 1 - dot product
+                return [(rows.astype(np.int64), 1 - dists) for rows, dists in zip(labels, distances)]
+            except RuntimeError:
+                pass # too few reachable live rows for k; fall back to the exact scan
+
+        scores = queries @ self.vectors.T
+        results = []
+        for query_scores in scores:
+            query_scores = np.where(self.deleted, -np.inf, query_scores)
+            top_rows = np.argpartition(-query_scores, k - 1)[:k]
+            top_rows = top_rows[np.argsort(-query_scores[top_rows])]
+            results.append((top_rows, query_scores[top_rows]))
+        return results
+
+
+class LocalVectorProvider(VectorDBInterface):
+    """
+    Embedded vector store for single-node deployments: each collection is a memory-mapped
+    float32 matrix searched in-process with one matrix product and argpartition.
+    """
+
+    # compact a collection once more than this fraction of its rows are tombstones
+    compact_ratio = 0.5
+
+    def __init__(self, db_path: str, default_vector_size: int = 768,
+                       distance_method: str = "cosine",
+                       index_type: str = LocalIndexEnums.FLAT.value,
+                       hnsw_m: int = 16, hnsw_ef_construction: int = 200,
+                       hnsw_ef_search: int = 64):
+
+        self.db_path = db_path
+        self.default_vector_size = default_vector_size
+        self.distance_method = distance_method
+        self.hnsw_params = None
+        if index_type == LocalIndexEnums.HNSW.value:
+            self.hnsw_params = {"M": hnsw_m, "ef_construction": hnsw_ef_construction, "ef_search": hnsw_ef_search}
+        self.collections = {}
+        self.logger = logging.getLogger("uvicorn")
+
+    async def connect(self):
+        os.makedirs(self.db_path, exist_ok=True)
+
+        # load every collection (and its graph) at startup rather than on the first query
+        for collection_name in await self.list_all_collections():
+            self._get_collection(collection_name)
+
+    async def disconnect(self):
+        for collection in self.collections.values():
+            collection.save_hnsw()
+        self.collections = {}
+
+    def _collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.db_path, collection_name)
+
+    def _get_collection(self, collection_name: str):
+        if collection_name not in self.collections:
+            path = self._collection_path(collection_name)
+            if not os.path.exists(os.path.join(path, "info.json")):
+                return None
+            self.collections[collection_name] = LocalCollection.load(path, hnsw_params=self.hnsw_params)
+        return self.collections[collection_name]
+
+    def _prepare_vectors(self, vectors: list) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+
+        # store unit vectors so cosine similarity is a plain dot product
+        if self.distance_method == DistanceMethodEnums.COSINE.value:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    async def is_collection_existed(self, collection_name: str) -> bool:
+        return self._get_collection(collection_name) is not None
+
+    async def list_all_collections(self) -> List:
+        if not os.path.exists(self.db_path):
+            return []
+        return [
+            name for name in os.listdir(self.db_path)
+            if os.path.exists(os.path.join(self._collection_path(name), "info.json"))
+        ]
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+
+        return {
+            "record_count": collection.live_count,
+            "deleted_count": collection.size - collection.live_count,
+            "vector_size": collection.dimension,
+        }
+
+    async def delete_collection(self, collection_name: str):
+        self.collections.pop(collection_name, None)
+        path = self._collection_path(collection_name)
+        if os.path.exists(path):
+            self.logger.info(f"Deleting local collection: {collection_name}")
+            shutil.rmtree(path)
+        return True
+
+    async def create_collection(self, collection_name: str,
+                                       embedding_size: int,
+                                       do_reset: bool = False):
+        if do_reset:
+            await self.delete_collection(collection_name)
+
+        if await self.is_collection_existed(collection_name):
+            return False
+
+        self.logger.info(f"Creating new local collection: {collection_name}")
+        self.collections[collection_name] = LocalCollection.create(
+            path=self._collection_path(collection_name),
+            dimension=embedding_size or self.default_vector_size,
+            hnsw_params=self.hnsw_params,
+        )
+        return True
+
+    async def insert_one(self, collection_name: str, text: str, vector: list,
+                            metadata: dict = None,
+                            record_id: int = None):
+        return await self.insert_many(
+            collection_name=collection_name, texts=[text], vectors=[vector],
+            metadata=[metadata], record_ids=[record_id],
+        )
+
+    async def insert_many(self, collection_name: str, texts: list,
+                         vectors: list, metadata: list = None,
+                         record_ids: list = None, batch_size: int = 50):
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            self.logger.error(f"Can not insert into non-existent collection: {collection_name}")
+            return False
+
+        records = [
+            {
+                "id": record_ids[i] if record_ids else None,
+                "text": texts[i],
+                "metadata": metadata[i] if metadata else {},
+            }
+            for i in range(len(texts))
+        ]
+        collection.append(self._prepare_vectors(vectors), records)
+        return True
+
+    async def delete_records(self, collection_name: str, record_ids: list):
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return False
+
+        collection.tombstone([collection.row_by_id[i] for i in record_ids if i in collection.row_by_id])
+        if collection.size and (collection.size - collection.live_count) / collection.size > self.compact_ratio:
+            collection.compact()
+        return True
+
+    def _to_retrieved_documents(self, collection: LocalCollection, rows: np.ndarray, scores: np.ndarray) -> List[RetrievedDocument]:
+        results = []
+        for row, score in zip(rows, scores):
+            record = collection.records[row]
+            metadata = record.get("metadata") or {}
+            results.append(RetrievedDocument(
+                text=record["text"],
+                score=float(score),
+                chunk_id=record["id"],
+                chunk_asset_id=metadata.get("chunk_asset_id"),
+                chunk_order=metadata.get("chunk_order"),
+            ))
+        return results
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int):
+        results = await self.search_by_vectors(collection_name=collection_name, vectors=[vector], limit=limit)
+        return results[0]
+
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int):
+        collection = self._get_collection(collection_name)
+        if collection is None or collection.size == 0:
+            return [[] for _ in vectors]
+
+        queries = self._prepare_vectors(vectors)
+        return [
+            self._to_retrieved_documents(collection, rows, scores)
+            for rows, scores in collection.search(queries, limit=limit)
+        ]
@@ -0,0 +1,214 @@
+from ..VectorDBInterface import VectorDBInterface
+from ..VectorDBEnums import DistanceMethodEnums
+import logging
+from typing import List
+from models.db_schemes import RetrievedDocument
+from helpers.postgres_client import get_postgres_pool, close_postgres_pool
+
+class PGVectorProvider(VectorDBInterface):
+    """
+    Same chunks-table layout as SupabaseVectorProvider, but queries Postgres directly
+    over the shared asyncpg pool instead of PostgREST.
+    """
+
+    def __init__(self, default_vector_size: int = 768,
+                       distance_method: str = "cosine",
+                       compact_mode: str = None,
+                       rerank_multiplier: int = 4):
+
+        self.pool = None
+        self.default_vector_size = default_vector_size
+        self.distance_method = distance_method
+        # halfvec/binary: coarse ANN search on compact vectors, exact rerank of limit * rerank_multiplier candidates
+        self.compact_mode = compact_mode
+        self.rerank_multiplier = rerank_multiplier
+        self.table_name = "chunks"
+        self.logger = logging.getLogger("uvicorn")
+
+        # pgvector operators: <=> cosine distance, <#> negative inner product
+        if distance_method == DistanceMethodEnums.DOT.value:
+            self.distance_operator, self.score_expression = "<#>", "-(vector <#> $1)"
+        else:
+            self.distance_operator, self.score_expression = "<=>", "1 - (vector <=> $1)"
+
+    async def connect(self):
+        self.pool = await get_postgres_pool()
+
+    async def disconnect(self):
+        await close_postgres_pool()
+        self.pool = None
+
+    def _extract_project_id(self, collection_name: str) -> int:
+        try:
+            # collection_1024_5 -> 5
+            return int(collection_name.split('_')[-1])
+        except Exception:
+            return 0
+
+    def _to_retrieved_document(self, row) -> RetrievedDocument:
+        return RetrievedDocument(
+            text=row["chunk_text"],
+            score=row["score"],
+            chunk_id=row["chunk_id"],
+            chunk_asset_id=row["chunk_asset_id"],
+            chunk_order=row["chunk_order"],
+        )
+
+    async def is_collection_existed(self, collection_name: str) -> bool:
+        return True # The chunks table is created via migration
+
+    async def list_all_collections(self) -> List:
+        # project_stats has a row per project with chunks, so the chunks table isn't scanned
+        try:
+            rows = await self.pool.fetch("SELECT stats_project_id FROM active_project_stats WHERE chunk_count > 0")
+            return [f"collection_{self.default_vector_size}_{row['stats_project_id']}" for row in rows]
+        except Exception:
+            return []
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        # Trigger-maintained counters of the active generation (see project_stats)
+        project_id = self._extract_project_id(collection_name)
+        try:
+            stats = await self.pool.fetchrow(
+                "SELECT chunk_count, vector_count FROM active_project_stats WHERE stats_project_id = $1",
+                project_id
+            )
+            return {
+                "record_count": stats["vector_count"] if stats else 0,
+                "chunk_count": stats["chunk_count"] if stats else 0
+            }
+        except Exception:
+            return None
+
+    async def delete_collection(self, collection_name: str):
+        project_id = self._extract_project_id(collection_name)
+        try:
+            self.logger.info(f"Resetting vectors for project: {project_id}")
+            await self.pool.execute(
+                f"UPDATE {self.table_name} SET vector = NULL WHERE chunk_project_id = $1", project_id
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Error resetting vectors for {collection_name}: {e}")
+            return False
+
+    async def create_collection(self, collection_name: str,
+                                       embedding_size: int,
+                                       do_reset: bool = False):
+        if do_reset:
+            await self.delete_collection(collection_name)
+        return True
+
+    async def insert_one(self, collection_name: str, text: str, vector: list,
+                            metadata: dict = None,
+                            record_id: int = None):
+        project_id = self._extract_project_id(collection_name)
+        status = await self.pool.execute(
+            f"INSERT INTO {self.table_name} (chunk_text, vector, chunk_metadata, chunk_project_id) VALUES ($1, $2, $3, $4)",
+            text, vector, metadata, project_id
+        )
+        return status.endswith(" 1")
+
+    async def insert_many(self, collection_name: str, texts: list,
+                         vectors: list, metadata: list = None,
+                         record_ids: list = None, batch_size: int = 500):
+        project_id = self._extract_project_id(collection_name)
+
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                # If we have record_ids, we are updating existing chunks (e.g. during Push):
+                # COPY the vectors into a staging table, then one UPDATE ... FROM
+                if record_ids:
+                    self.logger.info(f"Updating {len(record_ids)} existing chunks with vectors.")
+                    await connection.execute(
+                        f"""CREATE TEMP TABLE chunk_vectors_staging ON COMMIT DROP AS
+                            SELECT chunk_id, vector FROM {self.table_name} WITH NO DATA"""
+                    )
+                    for i in range(0, len(record_ids), batch_size):
+                        await connection.copy_records_to_table(
+                            "chunk_vectors_staging",
+                            columns=["chunk_id", "vector"],
+                            records=zip(record_ids[i:i+batch_size], vectors[i:i+batch_size]),
+                        )
+                    await connection.execute(
+                        f"""UPDATE {self.table_name} c SET vector = s.vector
+                            FROM chunk_vectors_staging s WHERE c.chunk_id = s.chunk_id"""
+                    )
+                    return True
+
+                for i in range(0, len(texts), batch_size):
+                    await connection.copy_records_to_table(
+                        self.table_name,
+                        columns=["chunk_text", "vector", "chunk_metadata", "chunk_project_id"],
+                        records=(
+                            (texts[j], vectors[j], metadata[j] if metadata else {}, project_id)
+                            for j in range(i, min(i + batch_size, len(texts)))
+                        ),
+                    )
+
+        return True
+
+    async def delete_records(self, collection_name: str, record_ids: list):
+        # Vectors live on the chunk rows: clearing them drops the records from search
+        try:
+            await self.pool.execute(
+                f"UPDATE {self.table_name} SET vector = NULL WHERE chunk_id = ANY($1::int[])", record_ids
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Error deleting vectors from {collection_name}: {e}")
+            return False
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int):
+        project_id = self._extract_project_id(collection_name)
+
+        if self.compact_mode:
+            try:
+                rows = await self.pool.fetch(
+                    "SELECT * FROM match_vectors_compact($1, $2, $3, $4, $5, $6)",
+                    vector, 0.0, limit, limit * self.rerank_multiplier, self.compact_mode, project_id
+                )
+            except Exception as e:
+                self.logger.error(f"Error calling match_vectors_compact: {e}")
+                return []
+            return [self._to_retrieved_document(row) for row in rows]
+
+        # ORDER BY the raw distance operator so the ANN index on vector can be used
+        try:
+            rows = await self.pool.fetch(
+                f"""SELECT chunk_id, chunk_text, chunk_asset_id, chunk_order, {self.score_expression} AS score
+                    FROM {self.table_name}
+                    WHERE chunk_project_id = $2 AND vector IS NOT NULL
+                      AND chunk_generation = (SELECT project_active_generation FROM projects WHERE project_id = $2)
+                    ORDER BY vector {self.distance_operator} $1
+                    LIMIT $3""",
+                vector, project_id, limit
+            )
+        except Exception as e:
+            self.logger.error(f"Error searching vectors: {e}")
+            return []
+
+        return [self._to_retrieved_document(row) for row in rows]
+
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int):
+        project_id = self._extract_project_id(collection_name)
+
+        try:
+            if self.compact_mode:
+                rows = await self.pool.fetch(
+                    "SELECT * FROM match_vectors_compact_batch($1, $2, $3, $4, $5, $6)",
+                    vectors, 0.0, limit, limit * self.rerank_multiplier, self.compact_mode, project_id
+                )
+            else:
+                rows = await self.pool.fetch(
+                    "SELECT * FROM match_vectors_batch($1, $2, $3, $4)",
+                    vectors, 0.0, limit, project_id
+                )
+        except Exception as e:
+            self.logger.error(f"Error calling batched vector search: {e}")
+            return [[] for _ in vectors]
+
+        results = [[] for _ in vectors]
+        for row in rows:
+            results[row["query_index"]].append(self._to_retrieved_document(row))
+        return results
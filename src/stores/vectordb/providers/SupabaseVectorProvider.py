@@ -8,11 +8,16 @@ from helpers.supabase_client import get_supabase_client
 class SupabaseVectorProvider(VectorDBInterface):
 
     def __init__(self, default_vector_size: int = 768,
-                       distance_method: str = "cosine"):
+                       distance_method: str = "cosine",
+                       compact_mode: str = None,
+                       rerank_multiplier: int = 4):
         
         self.supabase = get_supabase_client()
         self.default_vector_size = default_vector_size
         self.distance_method = distance_method
+        # halfvec/binary: coarse ANN search on compact vectors, exact rerank of limit * rerank_multiplier candidates
+        self.compact_mode = compact_mode
+        self.rerank_multiplier = rerank_multiplier
         self.logger = logging.getLogger("uvicorn")
 
     async def connect(self):
@@ -26,23 +31,36 @@ class SupabaseVectorProvider(VectorDBInterface):
         return True # The chunks table is created via migration
     
     async def list_all_collections(self) -> List:
+        # project_stats has a row per project with chunks, so the chunks table isn't scanned
         try:
-            res = self.supabase.table("chunks").select("chunk_project_id").execute()
-            projects = set(item["chunk_project_id"] for item in res.data)
-            return [f"collection_{self.default_vector_size}_{p}" for p in projects]
+            res = self.supabase.table("active_project_stats").select("stats_project_id").gt("chunk_count", 0).execute()
+            return [f"collection_{self.default_vector_size}_{item['stats_project_id']}" for item in res.data]
         except Exception:
             return []
     
     async def get_collection_info(self, collection_name: str) -> dict:
+        # Trigger-maintained counters of the active generation (see project_stats)
         project_id = self._extract_project_id(collection_name)
         try:
-            res = self.supabase.table("chunks").select("*", count="exact").eq("chunk_project_id", project_id).execute()
+            res = self.supabase.table("active_project_stats").select("chunk_count, vector_count") \
+                .eq("stats_project_id", project_id).execute()
+            stats = res.data[0] if res.data else {}
             return {
-                "record_count": res.count
+                "record_count": stats.get("vector_count", 0),
+                "chunk_count": stats.get("chunk_count", 0)
             }
         except Exception:
             return None
 
+    def _to_retrieved_document(self, item: dict) -> RetrievedDocument:
+        return RetrievedDocument(
+            text=item.get("chunk_text", item.get("text")),
+            score=item["score"],
+            chunk_id=item.get("chunk_id"),
+            chunk_asset_id=item.get("chunk_asset_id"),
+            chunk_order=item.get("chunk_order"),
+        )
+
     def _extract_project_id(self, collection_name: str) -> int:
         try:
             # collection_1024_5 -> 5
@@ -89,16 +107,18 @@ class SupabaseVectorProvider(VectorDBInterface):
         project_id = self._extract_project_id(collection_name)
         
         # If we have record_ids, it means we are updating existing chunks (e.g. during Push)
-        # We use individual updates to avoid violates not-null constraint on columns we don't provide
+        # One UPDATE per batch through set_chunk_vectors (an upsert would violate not-null
+        # constraints on columns we don't provide), so the chunks triggers fire once per batch
         if record_ids:
             self.logger.info(f"Updating {len(record_ids)} existing chunks with vectors.")
-            for i in range(len(record_ids)):
+            for i in range(0, len(record_ids), batch_size):
                 try:
-                    self.supabase.table("chunks").update({
-                        "vector": vectors[i]
-                    }).eq("chunk_id", record_ids[i]).execute()
+                    self.supabase.rpc("set_chunk_vectors", {
+                        "p_chunk_ids": record_ids[i:i+batch_size],
+                        "p_vectors": vectors[i:i+batch_size],
+                    }).execute()
                 except Exception as e:
-                    self.logger.error(f"Failed to update chunk {record_ids[i]}: {e}")
+                    self.logger.error(f"Failed to update chunks {record_ids[i]}..{record_ids[min(i + batch_size, len(record_ids)) - 1]}: {e}")
             return True
 
         # Otherwise, handles as new insertions
@@ -118,6 +138,17 @@ class SupabaseVectorProvider(VectorDBInterface):
 
         return True
     
+    async def delete_records(self, collection_name: str, record_ids: list, batch_size: int = 200):
+        # Vectors live on the chunk rows: clearing them drops the records from search
+        try:
+            for i in range(0, len(record_ids), batch_size):
+                self.supabase.table("chunks").update({"vector": None}) \
+                    .in_("chunk_id", record_ids[i:i+batch_size]).execute()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error deleting vectors from {collection_name}: {e}")
+            return False
+    
     async def search_by_vector(self, collection_name: str, vector: list, limit: int):
         project_id = self._extract_project_id(collection_name)
         params = {
@@ -128,17 +159,56 @@ class SupabaseVectorProvider(VectorDBInterface):
             "filter_project_id": project_id
         }
         
+        rpc_name = "match_vectors"
+        if self.compact_mode:
+            rpc_name = "match_vectors_compact"
+            params = {
+                "query_embedding": vector,
+                "match_threshold": 0.0,
+                "match_count": limit,
+                "candidate_count": limit * self.rerank_multiplier,
+                "compact_mode": self.compact_mode,
+                "filter_project_id": project_id
+            }
+
         try:
-            res = self.supabase.rpc("match_vectors", params).execute()
+            res = self.supabase.rpc(rpc_name, params).execute()
         except Exception as e:
-            self.logger.error(f"Error calling match_vectors RPC: {e}")
+            self.logger.error(f"Error calling {rpc_name} RPC: {e}")
             return []
         
         results = []
         if res.data:
             for item in res.data:
-                results.append(RetrievedDocument(
-                    text=item.get("chunk_text", item.get("text")),
-                    score=item["score"]
-                ))
+                results.append(self._to_retrieved_document(item))
+        return results
+
+    async def search_by_vectors(self, collection_name: str, vectors: List[list], limit: int):
+        # One RPC for all queries: match_vectors_batch runs a LATERAL top-k per query vector
+        project_id = self._extract_project_id(collection_name)
+        params = {
+            "query_embeddings": vectors,
+            "match_threshold": 0.0,
+            "match_count": limit,
+            "filter_project_id": project_id
+        }
+
+        rpc_name = "match_vectors_batch"
+        if self.compact_mode:
+            rpc_name = "match_vectors_compact_batch"
+            params = {
+                **params,
+                "candidate_count": limit * self.rerank_multiplier,
+                "compact_mode": self.compact_mode,
+            }
+
+        try:
+            res = self.supabase.rpc(rpc_name, params).execute()
+        except Exception as e:
+            self.logger.error(f"Error calling {rpc_name} RPC: {e}")
+            return [[] for _ in vectors]
+
+        results = [[] for _ in vectors]
+        for item in res.data or []:
+            results[item["query_index"]].append(self._to_retrieved_document(item))
         return results
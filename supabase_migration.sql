@@ -43,6 +43,127 @@ BEGIN
     END IF;
 END $$;
 
+-- Index Generations (blue/green reindex)
+-- Every chunk belongs to a generation; searches only read the project's active generation.
+-- A rebuild writes a new generation next to the active one, then promote_index_generation
+-- swaps the pointer in one UPDATE and the old generation's chunks are deleted afterwards.
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS project_active_generation INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS project_building_generation INTEGER;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS project_index_model TEXT;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_generation INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS chunks_project_generation_idx ON chunks (chunk_project_id, chunk_generation);
+
+-- Indexing Checkpoints
+-- One row per (project, generation, stage): 'push' and 'rebuild' keep the last chunk_id whose
+-- vector is stored, 'process' marks a reset in progress. Restarts continue after last_chunk_id.
+CREATE TABLE IF NOT EXISTS index_checkpoints (
+    checkpoint_project_id INTEGER REFERENCES projects(project_id) ON DELETE CASCADE NOT NULL,
+    checkpoint_generation INTEGER NOT NULL,
+    checkpoint_stage TEXT NOT NULL,
+    last_chunk_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (checkpoint_project_id, checkpoint_generation, checkpoint_stage)
+);
+
+-- Per-asset processing state: the generation the asset's chunks were last written into
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS asset_processed_generation INTEGER;
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS asset_processed_at TIMESTAMP WITH TIME ZONE;
+
+-- Chunk Deduplication (CHUNK_DEDUP_ENABLED)
+-- chunk_hash is the SHA-1 of the normalized chunk text. Duplicates and near-duplicates are kept
+-- as rows (so the mapping survives) but get no vector; chunk_duplicate_of holds the canonical chunk's hash.
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_hash TEXT;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_duplicate_of TEXT;
+CREATE INDEX IF NOT EXISTS chunks_project_hash_idx ON chunks (chunk_project_id, chunk_generation, chunk_hash);
+
+-- After an asset's chunks are deleted, duplicates whose canonical chunk is gone become canonical
+-- themselves (one per lost hash); the rest are re-pointed at them. Returns the promoted chunks for embedding.
+CREATE OR REPLACE FUNCTION promote_orphaned_duplicates(p_project_id int)
+RETURNS SETOF chunks
+LANGUAGE sql
+AS $$
+  WITH orphaned AS (
+    SELECT DISTINCT ON (d.chunk_generation, d.chunk_duplicate_of)
+      d.chunk_id, d.chunk_generation, d.chunk_duplicate_of AS lost_hash, d.chunk_hash AS new_hash
+    FROM chunks d
+    WHERE d.chunk_project_id = p_project_id
+      AND d.chunk_duplicate_of IS NOT NULL
+      AND NOT EXISTS (
+        SELECT 1 FROM chunks c
+        WHERE c.chunk_project_id = p_project_id
+          AND c.chunk_generation = d.chunk_generation
+          AND c.chunk_hash = d.chunk_duplicate_of
+          AND c.chunk_duplicate_of IS NULL
+      )
+    ORDER BY d.chunk_generation, d.chunk_duplicate_of, d.chunk_id
+  ),
+  repointed AS (
+    UPDATE chunks c SET chunk_duplicate_of = o.new_hash
+    FROM orphaned o
+    WHERE c.chunk_project_id = p_project_id
+      AND c.chunk_generation = o.chunk_generation
+      AND c.chunk_duplicate_of = o.lost_hash
+      AND c.chunk_id <> o.chunk_id
+  ),
+  promoted AS (
+    UPDATE chunks c SET chunk_duplicate_of = NULL
+    FROM orphaned o
+    WHERE c.chunk_id = o.chunk_id
+    RETURNING c.*
+  )
+  SELECT * FROM promoted;
+$$;
+
+-- Reserves a new generation number; an abandoned build is simply superseded
+CREATE OR REPLACE FUNCTION begin_index_generation(p_project_id int)
+RETURNS int
+LANGUAGE sql
+AS $$
+  UPDATE projects
+  SET project_building_generation = GREATEST(project_active_generation, COALESCE(project_building_generation, 0)) + 1
+  WHERE project_id = p_project_id
+  RETURNING project_building_generation;
+$$;
+
+-- Makes p_generation active and returns the previous active generation,
+-- or NULL when p_generation is no longer the build in progress
+CREATE OR REPLACE FUNCTION promote_index_generation(p_project_id int, p_generation int, p_index_model text DEFAULT NULL)
+RETURNS int
+LANGUAGE sql
+AS $$
+  WITH previous AS (
+    SELECT project_active_generation FROM projects
+    WHERE project_id = p_project_id AND project_building_generation = p_generation
+    FOR UPDATE
+  )
+  UPDATE projects p
+  SET project_active_generation = p_generation,
+      project_building_generation = NULL,
+      project_index_model = p_index_model,
+      updated_at = NOW()
+  FROM previous
+  WHERE p.project_id = p_project_id
+  RETURNING previous.project_active_generation;
+$$;
+
+-- Copies the active generation's chunks (without vectors) into p_generation for re-embedding
+CREATE OR REPLACE FUNCTION copy_chunks_to_generation(p_project_id int, p_generation int)
+RETURNS int
+LANGUAGE sql
+AS $$
+  WITH copied AS (
+    INSERT INTO chunks (chunk_text, chunk_metadata, chunk_order, chunk_project_id, chunk_asset_id, chunk_generation,
+                        chunk_hash, chunk_duplicate_of)
+    SELECT c.chunk_text, c.chunk_metadata, c.chunk_order, c.chunk_project_id, c.chunk_asset_id, p_generation,
+           c.chunk_hash, c.chunk_duplicate_of
+    FROM chunks c JOIN projects p ON p.project_id = c.chunk_project_id
+    WHERE c.chunk_project_id = p_project_id AND c.chunk_generation = p.project_active_generation
+    ORDER BY c.chunk_id
+    RETURNING 1
+  )
+  SELECT COUNT(*)::int FROM copied;
+$$;
+
 -- Vector Search Function
 -- NOTE: We must drop the function before changing its return signature
 DROP FUNCTION IF EXISTS public.match_vectors(vector, float, int, text, bigint);
@@ -61,7 +182,9 @@ RETURNS TABLE (
   chunk_text text,
   chunk_metadata jsonb,
   score float,
-  chunk_project_id int
+  chunk_project_id int,
+  chunk_asset_id int,
+  chunk_order int
 )
 LANGUAGE plpgsql
 AS $$
@@ -72,12 +195,400 @@ BEGIN
       chunk_text, 
       chunk_metadata, 
       1 - (vector <=> %L) as score,
-      chunk_project_id
+      chunk_project_id,
+      chunk_asset_id,
+      chunk_order
     FROM %I
     WHERE (1 - (vector <=> %L) > %L)
       AND (%L IS NULL OR chunk_project_id = %L)
+      AND (%L IS NULL OR chunk_generation = (SELECT p.project_active_generation FROM projects p WHERE p.project_id = %L))
     ORDER BY score DESC
     LIMIT %L', 
-    query_embedding, target_table_name, query_embedding, match_threshold, filter_project_id, filter_project_id, match_count);
+    query_embedding, target_table_name, query_embedding, match_threshold, filter_project_id, filter_project_id,
+    filter_project_id, filter_project_id, match_count);
 END;
 $$;
+
+-- Batched Vector Search Function
+-- Runs one top-k search per query embedding in a single call (LATERAL join over the query array).
+-- query_embeddings is a JSON array of float arrays; each element is cast to vector.
+DROP FUNCTION IF EXISTS public.match_vectors_batch(jsonb, double precision, integer, integer);
+
+CREATE OR REPLACE FUNCTION match_vectors_batch (
+  query_embeddings jsonb,
+  match_threshold float,
+  match_count int,
+  filter_project_id int DEFAULT NULL
+)
+RETURNS TABLE (
+  query_index int,
+  chunk_id int,
+  chunk_text text,
+  chunk_metadata jsonb,
+  score float,
+  chunk_project_id int,
+  chunk_asset_id int,
+  chunk_order int
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    (q.ordinality - 1)::int AS query_index,
+    m.chunk_id,
+    m.chunk_text,
+    m.chunk_metadata,
+    m.score,
+    m.chunk_project_id,
+    m.chunk_asset_id,
+    m.chunk_order
+  FROM jsonb_array_elements(query_embeddings) WITH ORDINALITY AS q(embedding, ordinality)
+  CROSS JOIN LATERAL (
+    SELECT
+      c.chunk_id,
+      c.chunk_text,
+      c.chunk_metadata,
+      1 - (c.vector <=> (q.embedding::text)::vector) AS score,
+      c.chunk_project_id,
+      c.chunk_asset_id,
+      c.chunk_order
+    FROM chunks c
+    WHERE c.vector IS NOT NULL
+      AND (filter_project_id IS NULL OR c.chunk_project_id = filter_project_id)
+      AND (filter_project_id IS NULL OR c.chunk_generation = (
+        SELECT p.project_active_generation FROM projects p WHERE p.project_id = filter_project_id))
+    ORDER BY c.vector <=> (q.embedding::text)::vector
+    LIMIT match_count
+  ) m
+  WHERE m.score > match_threshold
+  ORDER BY query_index, m.score DESC;
+$$;
+
+-- Compact Vector Search (VECTOR_DB_COMPACT_MODE)
+-- The ANN index is built over a compact copy of each vector: half precision
+-- (2 bytes/dim) or binary quantized (1 bit/dim). The full float32 vectors stay in
+-- the table and are used only to rerank the candidate set exactly.
+-- Build the index matching the configured mode; expressions must match the function below:
+--   halfvec: CREATE INDEX IF NOT EXISTS chunks_vector_halfvec_idx ON chunks
+--              USING hnsw ((vector::halfvec(1024)) halfvec_cosine_ops);
+--   binary:  CREATE INDEX IF NOT EXISTS chunks_vector_binary_idx ON chunks
+--              USING hnsw ((binary_quantize(vector)::bit(1024)) bit_hamming_ops);
+DROP FUNCTION IF EXISTS public.match_vectors_compact(vector, double precision, integer, integer, text, integer);
+
+CREATE OR REPLACE FUNCTION match_vectors_compact (
+  query_embedding vector,
+  match_threshold float,
+  match_count int,
+  candidate_count int,
+  compact_mode text DEFAULT 'halfvec',
+  filter_project_id int DEFAULT NULL
+)
+RETURNS TABLE (
+  chunk_id int,
+  chunk_text text,
+  chunk_metadata jsonb,
+  score float,
+  chunk_project_id int,
+  chunk_asset_id int,
+  chunk_order int
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH candidates AS (
+    -- only the branch matching compact_mode runs (one-time filter)
+    (
+      SELECT c.chunk_id AS candidate_id
+      FROM chunks c
+      WHERE compact_mode = 'halfvec'
+        AND c.vector IS NOT NULL
+        AND (filter_project_id IS NULL OR c.chunk_project_id = filter_project_id)
+        AND (filter_project_id IS NULL OR c.chunk_generation = (
+          SELECT p.project_active_generation FROM projects p WHERE p.project_id = filter_project_id))
+      ORDER BY c.vector::halfvec(1024) <=> query_embedding::halfvec(1024)
+      LIMIT candidate_count
+    )
+    UNION ALL
+    (
+      SELECT c.chunk_id AS candidate_id
+      FROM chunks c
+      WHERE compact_mode = 'binary'
+        AND c.vector IS NOT NULL
+        AND (filter_project_id IS NULL OR c.chunk_project_id = filter_project_id)
+        AND (filter_project_id IS NULL OR c.chunk_generation = (
+          SELECT p.project_active_generation FROM projects p WHERE p.project_id = filter_project_id))
+      ORDER BY binary_quantize(c.vector)::bit(1024) <~> binary_quantize(query_embedding)::bit(1024)
+      LIMIT candidate_count
+    )
+  ),
+  reranked AS (
+    SELECT
+      c.chunk_id,
+      c.chunk_text,
+      c.chunk_metadata,
+      1 - (c.vector <=> query_embedding) AS score,
+      c.chunk_project_id,
+      c.chunk_asset_id,
+      c.chunk_order
+    FROM chunks c
+    JOIN candidates k ON k.candidate_id = c.chunk_id
+  )
+  SELECT * FROM reranked
+  WHERE reranked.score > match_threshold
+  ORDER BY reranked.score DESC
+  LIMIT match_count;
+$$;
+
+-- Batched Compact Vector Search
+-- match_vectors_compact once per query embedding (a JSON array of float arrays), in a single call
+DROP FUNCTION IF EXISTS public.match_vectors_compact_batch(jsonb, double precision, integer, integer, text, integer);
+
+CREATE OR REPLACE FUNCTION match_vectors_compact_batch (
+  query_embeddings jsonb,
+  match_threshold float,
+  match_count int,
+  candidate_count int,
+  compact_mode text DEFAULT 'halfvec',
+  filter_project_id int DEFAULT NULL
+)
+RETURNS TABLE (
+  query_index int,
+  chunk_id int,
+  chunk_text text,
+  chunk_metadata jsonb,
+  score float,
+  chunk_project_id int,
+  chunk_asset_id int,
+  chunk_order int
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    (q.ordinality - 1)::int AS query_index,
+    m.chunk_id,
+    m.chunk_text,
+    m.chunk_metadata,
+    m.score,
+    m.chunk_project_id,
+    m.chunk_asset_id,
+    m.chunk_order
+  FROM jsonb_array_elements(query_embeddings) WITH ORDINALITY AS q(embedding, ordinality)
+  CROSS JOIN LATERAL match_vectors_compact(
+    (q.embedding::text)::vector, match_threshold, match_count, candidate_count, compact_mode, filter_project_id
+  ) m
+  ORDER BY query_index, m.score DESC;
+$$;
+
+-- Vector Version Counter (VECTOR_DB_CACHE_ENABLED)
+-- Bumped once per statement that inserts, deletes or changes vectors of a project's chunks,
+-- so the in-process hot-project cache can detect stale copies with a single cheap lookup.
+-- Vector writes are batched (set_chunk_vectors, COPY), so this is one row write per batch.
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS project_vectors_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_project_vectors_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE projects p SET project_vectors_version = p.project_vectors_version + 1
+    WHERE p.project_id IN (SELECT DISTINCT chunk_project_id FROM new_rows);
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE projects p SET project_vectors_version = p.project_vectors_version + 1
+    WHERE p.project_id IN (SELECT DISTINCT chunk_project_id FROM old_rows);
+  ELSE
+    UPDATE projects p SET project_vectors_version = p.project_vectors_version + 1
+    WHERE p.project_id IN (
+      SELECT DISTINCT n.chunk_project_id
+      FROM new_rows n JOIN old_rows o ON o.chunk_id = n.chunk_id
+      WHERE n.vector IS DISTINCT FROM o.vector OR n.chunk_text IS DISTINCT FROM o.chunk_text
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS chunks_vectors_version_insert ON chunks;
+CREATE TRIGGER chunks_vectors_version_insert AFTER INSERT ON chunks
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_project_vectors_version();
+
+DROP TRIGGER IF EXISTS chunks_vectors_version_update ON chunks;
+CREATE TRIGGER chunks_vectors_version_update AFTER UPDATE ON chunks
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_project_vectors_version();
+
+DROP TRIGGER IF EXISTS chunks_vectors_version_delete ON chunks;
+CREATE TRIGGER chunks_vectors_version_delete AFTER DELETE ON chunks
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_project_vectors_version();
+
+-- Batched Vector Writes
+-- Stores the vectors of many existing chunks in one UPDATE, so the statement-level triggers on
+-- chunks (the version counter above, project stats) write their project rows once per batch
+-- instead of once per chunk. p_vectors is a JSON array of float arrays aligned with p_chunk_ids.
+CREATE OR REPLACE FUNCTION set_chunk_vectors(p_chunk_ids int[], p_vectors jsonb)
+RETURNS int
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE chunks c SET vector = v.vector
+    FROM (
+      SELECT ids.chunk_id, vecs.embedding::text::vector AS vector
+      FROM unnest(p_chunk_ids) WITH ORDINALITY AS ids(chunk_id, ordinality)
+      JOIN jsonb_array_elements(p_vectors) WITH ORDINALITY AS vecs(embedding, ordinality) USING (ordinality)
+    ) v
+    WHERE c.chunk_id = v.chunk_id
+    RETURNING 1
+  )
+  SELECT COUNT(*)::int FROM updated;
+$$;
+
+-- Storage Bucket Ledger
+-- Running size of every upload bucket (fields1, fields2, ...). Uploads and deletes adjust it
+-- atomically through record_bucket_usage, so choosing the active bucket never lists its files.
+-- SupabaseStorageManager.reconcile_bucket_sizes rewrites the totals from storage to correct drift.
+CREATE TABLE IF NOT EXISTS storage_buckets (
+    bucket_name TEXT PRIMARY KEY,
+    bucket_index INTEGER UNIQUE NOT NULL,
+    bucket_size BIGINT NOT NULL DEFAULT 0,
+    bucket_file_count INTEGER NOT NULL DEFAULT 0,
+    reconciled_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Adds the deltas (negative on delete) and returns the bucket's new size
+CREATE OR REPLACE FUNCTION record_bucket_usage(p_bucket_name text, p_bucket_index int, p_size_delta bigint, p_file_delta int)
+RETURNS bigint
+LANGUAGE sql
+AS $$
+  INSERT INTO storage_buckets (bucket_name, bucket_index, bucket_size, bucket_file_count)
+  VALUES (p_bucket_name, p_bucket_index, GREATEST(p_size_delta, 0), GREATEST(p_file_delta, 0))
+  ON CONFLICT (bucket_name) DO UPDATE
+    SET bucket_size = GREATEST(storage_buckets.bucket_size + p_size_delta, 0),
+        bucket_file_count = GREATEST(storage_buckets.bucket_file_count + p_file_delta, 0),
+        updated_at = NOW()
+  RETURNING bucket_size;
+$$;
+
+-- Project Statistics
+-- Per (project, generation) counters kept current by statement-level triggers on chunks, so info
+-- endpoints and collection listings read one row instead of scanning chunks.
+-- The triggers write once per statement: vector writes are batched (set_chunk_vectors, COPY).
+-- vector_count counts chunks with a stored vector; text/vector bytes are their stored sizes.
+CREATE TABLE IF NOT EXISTS project_stats (
+    stats_project_id INTEGER REFERENCES projects(project_id) ON DELETE CASCADE NOT NULL,
+    stats_generation INTEGER NOT NULL DEFAULT 0,
+    chunk_count BIGINT NOT NULL DEFAULT 0,
+    vector_count BIGINT NOT NULL DEFAULT 0,
+    text_bytes BIGINT NOT NULL DEFAULT 0,
+    vector_bytes BIGINT NOT NULL DEFAULT 0,
+    last_indexed_at TIMESTAMP WITH TIME ZONE,
+    embedding_model TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (stats_project_id, stats_generation)
+);
+
+-- The stats of each project's active generation (what searches read)
+CREATE OR REPLACE VIEW active_project_stats AS
+SELECT s.*
+FROM project_stats s
+JOIN projects p ON p.project_id = s.stats_project_id AND s.stats_generation = p.project_active_generation;
+
+CREATE OR REPLACE FUNCTION update_project_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO project_stats AS s (stats_project_id, stats_generation, chunk_count, vector_count,
+                                    text_bytes, vector_bytes, last_indexed_at)
+    SELECT chunk_project_id, chunk_generation, COUNT(*), COUNT(vector),
+           SUM(octet_length(chunk_text)), COALESCE(SUM(pg_column_size(vector)), 0),
+           CASE WHEN COUNT(vector) > 0 THEN NOW() END
+    FROM new_rows GROUP BY chunk_project_id, chunk_generation
+    ON CONFLICT (stats_project_id, stats_generation) DO UPDATE
+      SET chunk_count = s.chunk_count + EXCLUDED.chunk_count,
+          vector_count = s.vector_count + EXCLUDED.vector_count,
+          text_bytes = s.text_bytes + EXCLUDED.text_bytes,
+          vector_bytes = s.vector_bytes + EXCLUDED.vector_bytes,
+          last_indexed_at = COALESCE(EXCLUDED.last_indexed_at, s.last_indexed_at),
+          updated_at = NOW();
+
+  ELSIF TG_OP = 'DELETE' THEN
+    -- UPDATE only: when the project itself is being deleted its stats rows are already gone
+    UPDATE project_stats s
+    SET chunk_count = s.chunk_count - d.chunk_count,
+        vector_count = s.vector_count - d.vector_count,
+        text_bytes = s.text_bytes - d.text_bytes,
+        vector_bytes = s.vector_bytes - d.vector_bytes,
+        updated_at = NOW()
+    FROM (
+      SELECT chunk_project_id, chunk_generation, COUNT(*) AS chunk_count, COUNT(vector) AS vector_count,
+             SUM(octet_length(chunk_text)) AS text_bytes, COALESCE(SUM(pg_column_size(vector)), 0) AS vector_bytes
+      FROM old_rows GROUP BY chunk_project_id, chunk_generation
+    ) d
+    WHERE s.stats_project_id = d.chunk_project_id AND s.stats_generation = d.chunk_generation;
+
+    DELETE FROM project_stats WHERE chunk_count <= 0
+      AND stats_project_id IN (SELECT DISTINCT chunk_project_id FROM old_rows);
+
+  ELSE
+    UPDATE project_stats s
+    SET vector_count = s.vector_count + d.vector_count,
+        text_bytes = s.text_bytes + d.text_bytes,
+        vector_bytes = s.vector_bytes + d.vector_bytes,
+        last_indexed_at = COALESCE(d.last_indexed_at, s.last_indexed_at),
+        updated_at = NOW()
+    FROM (
+      SELECT n.chunk_project_id, n.chunk_generation,
+             SUM((n.vector IS NOT NULL)::int - (o.vector IS NOT NULL)::int) AS vector_count,
+             SUM(octet_length(n.chunk_text) - octet_length(o.chunk_text)) AS text_bytes,
+             SUM(COALESCE(pg_column_size(n.vector), 0) - COALESCE(pg_column_size(o.vector), 0)) AS vector_bytes,
+             MAX(CASE WHEN n.vector IS NOT NULL AND n.vector IS DISTINCT FROM o.vector THEN NOW() END) AS last_indexed_at
+      FROM new_rows n JOIN old_rows o ON o.chunk_id = n.chunk_id
+      -- metadata-only updates (dedup links, processing state) leave the stats row alone
+      WHERE n.vector IS DISTINCT FROM o.vector OR n.chunk_text IS DISTINCT FROM o.chunk_text
+      GROUP BY n.chunk_project_id, n.chunk_generation
+    ) d
+    WHERE s.stats_project_id = d.chunk_project_id AND s.stats_generation = d.chunk_generation;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS chunks_project_stats_insert ON chunks;
+CREATE TRIGGER chunks_project_stats_insert AFTER INSERT ON chunks
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION update_project_stats();
+
+DROP TRIGGER IF EXISTS chunks_project_stats_update ON chunks;
+CREATE TRIGGER chunks_project_stats_update AFTER UPDATE ON chunks
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION update_project_stats();
+
+DROP TRIGGER IF EXISTS chunks_project_stats_delete ON chunks;
+CREATE TRIGGER chunks_project_stats_delete AFTER DELETE ON chunks
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION update_project_stats();
+
+-- Recomputes a project's stats from chunks (backfill, or repair after manual edits)
+CREATE OR REPLACE FUNCTION refresh_project_stats(p_project_id int)
+RETURNS void
+LANGUAGE sql
+AS $$
+  DELETE FROM project_stats WHERE stats_project_id = p_project_id
+    AND stats_generation NOT IN (SELECT DISTINCT chunk_generation FROM chunks WHERE chunk_project_id = p_project_id);
+
+  INSERT INTO project_stats AS s (stats_project_id, stats_generation, chunk_count, vector_count, text_bytes, vector_bytes)
+  SELECT chunk_project_id, chunk_generation, COUNT(*), COUNT(vector),
+         SUM(octet_length(chunk_text)), COALESCE(SUM(pg_column_size(vector)), 0)
+  FROM chunks WHERE chunk_project_id = p_project_id
+  GROUP BY chunk_project_id, chunk_generation
+  ON CONFLICT (stats_project_id, stats_generation) DO UPDATE
+    SET chunk_count = EXCLUDED.chunk_count, vector_count = EXCLUDED.vector_count,
+        text_bytes = EXCLUDED.text_bytes, vector_bytes = EXCLUDED.vector_bytes, updated_at = NOW();
+$$;
+
+-- Backfill projects that have chunks but no stats yet
+SELECT refresh_project_stats(p.project_id) FROM projects p
+WHERE NOT EXISTS (SELECT 1 FROM project_stats s WHERE s.stats_project_id = p.project_id);